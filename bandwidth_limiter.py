@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Bandwidth caps for transfers, and background transfers yielding to foreground ones
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+UP = 'up'
+DOWN = 'down'
+
+# A capped transfer may send this much of its rate at once
+BURST_SECONDS = 1.0
+# Chunk sizes when capped: about BURST_SECONDS of data, but at least this
+MIN_CHUNK = 256 * 1024
+
+# Longest a background transfer pauses for foreground ones before going on anyway
+MAX_PAUSE = 60.0  # seconds
+
+
+class TokenBucket:
+    """Token bucket of bytes: refills at rate bytes/s, holding at most burst
+
+    consume() may take more than the bucket holds; the caller then waits
+    until the debt is repaid, so the average rate never exceeds rate
+    whatever the piece sizes. A rate of None means unlimited.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate: Optional[float], burst: Optional[float] = None):
+        with self._lock:
+            self.rate = rate or None
+            self.burst = burst or (self.rate * BURST_SECONDS if self.rate else 0)
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+
+    def consume(self, amount: int):
+        """Take amount bytes of budget, sleeping as long as the rate requires"""
+        with self._lock:
+            if self.rate is None:
+                return
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class BandwidthLimiter:
+    """Upload and download caps shared by every transfer of the service
+
+    Transfers run in the background unless wrapped in foreground(), as
+    imports are: the game is waiting for them. While any foreground
+    transfer runs, background transfers pause at their next chunk, so a
+    launch-time import gets the whole link instead of sharing it with a
+    long upload.
+    """
+
+    def __init__(self, upload_rate: Optional[float] = None, download_rate: Optional[float] = None):
+        self.buckets: Dict[str, TokenBucket] = {UP: TokenBucket(), DOWN: TokenBucket()}
+        self._foreground = 0
+        self._changed = threading.Condition()
+        self._local = threading.local()
+        self.configure(upload_rate, download_rate)
+
+    def configure(self, upload_rate: Optional[float], download_rate: Optional[float]):
+        """Set the caps in bytes/s (None or 0: unlimited); applies to transfers in progress"""
+        for direction, rate in ((UP, upload_rate), (DOWN, download_rate)):
+            bucket = self.buckets[direction]
+            if (rate or None) != bucket.rate:
+                bucket.configure(rate)
+
+    def limited(self, direction: str) -> bool:
+        return self.buckets[direction].rate is not None
+
+    def chunk_size(self, direction: str, default: int) -> int:
+        """Piece size for a transfer: default, or about one burst when capped"""
+        rate = self.buckets[direction].rate
+        if rate is None:
+            return default
+        return max(MIN_CHUNK, min(default, int(rate * BURST_SECONDS)))
+
+    @contextmanager
+    def foreground(self):
+        """Run the calling thread's transfers in the foreground while in this block"""
+        nested = getattr(self._local, 'foreground', False)
+        self._local.foreground = True
+        with self._changed:
+            self._foreground += 1
+        try:
+            yield
+        finally:
+            self._local.foreground = nested
+            with self._changed:
+                self._foreground -= 1
+                self._changed.notify_all()
+
+    def throttle(self, direction: str, amount: int):
+        """Called before moving amount bytes: yields to foreground transfers, then applies the cap"""
+        if not getattr(self._local, 'foreground', False):
+            with self._changed:
+                if self._foreground:
+                    logger.debug("Background transfer paused for a foreground one")
+                    if not self._changed.wait_for(lambda: not self._foreground, MAX_PAUSE):
+                        logger.info(f"Foreground transfer still running after {MAX_PAUSE:.0f}s - "
+                                    f"resuming background transfer")
+        self.buckets[direction].consume(amount)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Benchmark the OAuth flow against a local token server
+
+Times the authorize -> exchange -> refresh cycle of DropboxTokenManager end
+to end, then load-tests it:
+
+  provision many machines authorizing at once on OS-chosen callback ports
+  shared    many threads asking one token manager for a token right after
+            it expired (should cost a single refresh request)
+  managers  many token managers, each with its own config, refreshing at once
+
+    python benchmarks/bench_oauth.py --threads 200 --managers 200 --latency 20
+    python benchmarks/bench_oauth.py --callback paste --no-secret
+"""
+
+import argparse
+import json
+import logging
+import math
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from dropbox_oauth import DropboxTokenManager
+from fake_dropbox import FaultProfile
+from fake_oauth import FakeOAuthServer
+
+
+def free_port():
+    """Ask the OS for an unused localhost port for the OAuth callback"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def headless_browser(url):
+    """Stand-in for webbrowser.open: follow the authorize redirect to the callback"""
+    if 'redirect_uri=' not in url:
+        # Paste mode; paste_code() reads the code instead
+        return True
+
+    def visit():
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+    threading.Thread(target=visit, daemon=True).start()
+    return True
+
+
+def paste_code(url):
+    """Stand-in for the user copying the code shown on the authorize page"""
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read().decode()
+
+
+def timed(durations, name, func):
+    """Wrap func so each call's duration is appended to durations[name]"""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            durations.setdefault(name, []).append(time.perf_counter() - start)
+    return wrapper
+
+
+def make_manager(server, config_path, callback='fixed', secret=True):
+    """Token manager pointed at the fake server
+
+    callback is 'fixed' (a free port picked up front), 'ephemeral' (port 0,
+    chosen by the OS when binding) or 'paste' (no callback server).
+    """
+    options = server.oauth_options()
+    options['open_browser'] = headless_browser
+    options['code_prompt'] = paste_code
+    if callback == 'fixed':
+        options['redirect_uri'] = f"http://localhost:{free_port()}/oauth/callback"
+    else:
+        options['callback_ports'] = [0]
+    manager = DropboxTokenManager(str(config_path), server.state.app_key,
+                                  server.state.app_secret if secret else "", **options)
+    if callback == 'paste':
+        manager.oauth.get_auth_code_via_browser = manager.oauth.get_auth_code_via_paste
+    return manager
+
+
+def expire(manager):
+    """Make the manager's access token look expired"""
+    manager._token_expires_at = time.time() - 1
+
+
+def run_concurrently(count, func):
+    """Run func(index) on count threads released together; returns (durations, failures, wall time)"""
+    barrier = threading.Barrier(count + 1)
+    durations = [None] * count
+    failures = []
+
+    def worker(index):
+        barrier.wait()
+        start = time.perf_counter()
+        ok = func(index)
+        durations[index] = time.perf_counter() - start
+        if not ok:
+            failures.append(index)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return durations, len(failures), time.perf_counter() - start
+
+
+def summarize(durations):
+    ordered = sorted(durations)
+    return {
+        'calls': len(ordered),
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[math.ceil(len(ordered) * 0.95) - 1] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+
+def run_cycle(server, workdir, rounds, callback, secret):
+    """Full authorize -> exchange -> refresh cycle, rounds times"""
+    durations = {}
+    failures = 0
+    for index in range(rounds):
+        manager = make_manager(server, workdir / f"cycle_{index}.json", callback, secret)
+        oauth = manager.oauth
+        oauth.get_auth_code_via_browser = timed(durations, 'authorize', oauth.get_auth_code_via_browser)
+        oauth.exchange_code_for_tokens = timed(durations, 'exchange', oauth.exchange_code_for_tokens)
+        oauth.refresh_access_token = timed(durations, 'refresh', oauth.refresh_access_token)
+
+        start = time.perf_counter()
+        ok = manager.authorize_new_user()
+        expire(manager)
+        ok = ok and manager.get_valid_access_token() is not None
+        durations.setdefault('full cycle', []).append(time.perf_counter() - start)
+        if not ok:
+            failures += 1
+    return {name: dict(summarize(values), failures=failures) for name, values in durations.items()}
+
+
+def run_provision(server, workdir, count, secret):
+    """Many machines authorize at the same time, each on its own ephemeral port"""
+    managers = [make_manager(server, workdir / f"provision_{i}.json", 'ephemeral', secret) for i in range(count)]
+    durations, failures, wall = run_concurrently(count, lambda i: managers[i].authorize_new_user())
+    row = summarize(durations)
+    row.update(failures=failures, wall_s=wall)
+    return row
+
+
+def run_shared(server, workdir, threads, secret):
+    """Many threads hit one manager whose token just expired"""
+    manager = make_manager(server, workdir / "shared.json", secret=secret)
+    if not manager.authorize_new_user():
+        raise SystemExit("Authorization against the fake server failed")
+    expire(manager)
+
+    before = server.state.counts['refresh_token']
+    durations, failures, wall = run_concurrently(threads, lambda i: manager.get_valid_access_token() is not None)
+    row = summarize(durations)
+    row.update(failures=failures, wall_s=wall, refresh_requests=server.state.counts['refresh_token'] - before)
+    return row
+
+
+def run_managers(server, workdir, count, secret):
+    """Many independent managers refresh at the same moment"""
+    template = make_manager(server, workdir / "template.json", secret=secret)
+    if not template.authorize_new_user():
+        raise SystemExit("Authorization against the fake server failed")
+
+    managers = []
+    for index in range(count):
+        config_path = workdir / f"manager_{index}.json"
+        shutil.copyfile(template.config_path, config_path)
+        manager = make_manager(server, config_path, secret=secret)
+        expire(manager)
+        managers.append(manager)
+
+    before = server.state.counts['refresh_token']
+    durations, failures, wall = run_concurrently(count, lambda i: managers[i].get_valid_access_token() is not None)
+    row = summarize(durations)
+    row.update(failures=failures, wall_s=wall, refresh_requests=server.state.counts['refresh_token'] - before)
+    return row
+
+
+def print_table(results):
+    print(f"{'phase':<14}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'fail':>6}{'requests':>10}{'wall s':>8}")
+    for name, row in results.items():
+        requests = row.get('refresh_requests')
+        wall = row.get('wall_s')
+        print(f"{name:<14}{row['calls']:>7}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['max_ms']:>10.2f}"
+              f"{row['failures']:>6}{requests if requests is not None else '-':>10}"
+              f"{f'{wall:.2f}' if wall is not None else '-':>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Dropbox OAuth flow offline')
+    parser.add_argument('--rounds', type=int, default=5, help='Full authorize/exchange/refresh cycles')
+    parser.add_argument('--callback', choices=['fixed', 'ephemeral', 'paste'], default='fixed',
+                        help='How the authorization code comes back in the cycle phase')
+    parser.add_argument('--no-secret', action='store_true', help='Authorize as a public client (PKCE only)')
+    parser.add_argument('--provision', type=int, default=20, help='Concurrent authorizations on ephemeral ports')
+    parser.add_argument('--threads', type=int, default=200, help='Threads sharing one token manager')
+    parser.add_argument('--managers', type=int, default=200, help='Independent token managers refreshing at once')
+    parser.add_argument('--latency', type=float, default=0.0, help='Injected token endpoint latency (ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of an injected 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Probability of an injected 429')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for error injection')
+    parser.add_argument('--save', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    # Keep benchmark output readable; warnings and errors still show up
+    logging.basicConfig(level=logging.WARNING)
+
+    faults = FaultProfile(
+        latency=args.latency / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    server = FakeOAuthServer(faults=faults).start()
+    workdir = Path(tempfile.mkdtemp(prefix="maa_oauth_bench_"))
+
+    try:
+        secret = not args.no_secret
+        results = run_cycle(server, workdir, args.rounds, args.callback, secret)
+        if args.provision:
+            results['provision'] = run_provision(server, workdir, args.provision, secret)
+        if args.threads:
+            results['shared'] = run_shared(server, workdir, args.threads, secret)
+        if args.managers:
+            results['managers'] = run_managers(server, workdir, args.managers, secret)
+
+        print_table(results)
+        print(f"\nToken server: {server.state.counts}")
+
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                json.dump({'settings': vars(args), 'results': results}, f, indent=4)
+
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Benchmark the sync hot paths against a local Dropbox stand-in
+
+Runs MAAReduxSync.upload_save, quick_import, create_backup,
+is_app_running and the daemon's idle monitor tick (poll_app) on synthetic saves of
+increasing size, plus upload and import of a save that is already in sync
+(which should skip the transfer), and prints a latency/throughput table. Results can be
+saved and compared with a previous run to catch regressions:
+
+    python benchmarks/bench_sync.py --sizes 1K,1M,64M --save baseline.json
+    python benchmarks/bench_sync.py --sizes 1K,1M,64M --compare baseline.json
+
+--backend memory or local runs the same operations against the in-memory
+or local-directory storage backend instead of the fake Dropbox server,
+which separates the sync logic's own cost from the network's.
+
+--encrypt turns on client-side encryption; comparing against a plaintext
+run shows what it costs:
+
+    python benchmarks/bench_sync.py --backend memory --sizes 1M,128M --save plain.json
+    python benchmarks/bench_sync.py --backend memory --sizes 1M,128M --encrypt --compare plain.json
+
+--compress does the same for transfer compression; its gain shows on a
+slow link (--bandwidth). The synthetic saves repeat one block, so they
+compress far better than real saves.
+
+--upload-limit and --download-limit (KB/s) set the service's bandwidth
+caps; throughput should settle at the cap.
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fake_dropbox import FakeDropboxServer, FaultProfile
+from storage_backends import MemoryBackend
+
+SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+DEFAULT_SIZES = "1K,64K,1M,16M,128M,500M"
+BACKENDS = ('dropbox', 'memory', 'local')
+OPERATIONS = ['upload_save', 'upload_unchanged', 'quick_import', 'import_unchanged', 'create_backup',
+              'is_app_running', 'poll_app']
+TIMING_ONLY = ('is_app_running', 'poll_app')
+
+
+def parse_size(text):
+    """Parse sizes like 1K, 16M or 500M into bytes"""
+    text = text.strip().upper()
+    if text[-1] in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def format_size(size):
+    for unit in ('G', 'M', 'K'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def write_synthetic_save(path, size):
+    """Write a save of the given size with JSON-ish, partly compressible content"""
+    pattern = b'{"player": "bench", "level": 42, "inventory": [1, 2, 3], "flags": "'
+    block = (pattern + os.urandom(2048).hex().encode() + b'"}\n') * 64
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            data = block[:remaining]
+            f.write(data)
+            remaining -= len(data)
+
+
+def load_sync_module():
+    """Import the sync service straight from the repository"""
+    # Keep benchmark output readable; warnings and errors still show up
+    logging.basicConfig(level=logging.WARNING)
+    return importlib.import_module('maa_sync')
+
+
+def make_sync(module, server, save_path, backend='dropbox', encrypt=False, compress=False,
+              upload_limit=0, download_limit=0):
+    """Create a MAAReduxSync whose Dropbox client talks to the fake server
+
+    With backend 'memory' it stores saves in memory instead, and with
+    'local' in a directory next to the save. With encrypt saves are stored
+    encrypted under a fresh key, and with compress compressed. The limits
+    are bandwidth caps in KB/s.
+    """
+
+    class BenchSync(module.MAAReduxSync):
+        def create_client(self, access_token):
+            return module.dropbox.Dropbox(access_token, session=server.session(),
+                                          max_retries_on_error=0, max_retries_on_rate_limit=0)
+
+        def create_storage(self, connect=True):
+            if backend == 'memory':
+                return MemoryBackend()
+            return super().create_storage(connect)
+
+    config = {
+        "app_name": "maa-bench-no-such-process",
+        "save_file_path": str(save_path),
+        "dropbox_token": "bench-token",
+        "dropbox_folder": "/Bench",
+        "sync_filename": save_path.name,
+        "retry_max_delay": 2
+    }
+    if backend == 'local':
+        storage_dir = save_path.parent.parent / "storage"
+        storage_dir.mkdir(exist_ok=True)
+        config.update(storage='local', storage_path=str(storage_dir))
+    if encrypt:
+        config['encryption'] = True
+    if compress:
+        config['compression'] = True
+    config.update(upload_rate_limit=upload_limit, download_rate_limit=download_limit)
+    with open('config.json', 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=4)
+
+    return BenchSync()
+
+
+def time_call(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run_size(sync, daemon, save_path, size, repeat):
+    """Benchmark every operation for one save size"""
+    write_synthetic_save(save_path, size)
+    backups_dir = save_path.parent / "backups"
+    results = {}
+
+    def measure(operation, func, cleanup=None):
+        durations, failures = [], 0
+        for _ in range(repeat):
+            elapsed, ok = time_call(func)
+            durations.append(elapsed)
+            if not ok:
+                failures += 1
+            if cleanup:
+                cleanup()
+        results[operation] = {
+            'p50_ms': statistics.median(durations) * 1000,
+            'p95_ms': sorted(durations)[math.ceil(len(durations) * 0.95) - 1] * 1000,
+            'mb_per_s': (size / 1e6) / statistics.median(durations) if operation not in TIMING_ONLY else None,
+            'failures': failures
+        }
+
+    def clear_backups():
+        shutil.rmtree(backups_dir, ignore_errors=True)
+
+    def forget_sync():
+        # Otherwise every upload after the first is skipped as unchanged
+        sync.sync_state.forget(sync.remote_path)
+
+    def change_local_save():
+        # One byte differs from the remote save, so the import must download
+        with open(save_path, 'r+b') as f:
+            first = f.read(1)
+            f.seek(0)
+            f.write(bytes([first[0] ^ 1]) if first else b'')
+        clear_backups()
+
+    measure('upload_save', sync.upload_save, forget_sync)
+    sync.upload_save()
+    measure('upload_unchanged', sync.upload_save)
+    change_local_save()
+    measure('quick_import', lambda: sync.quick_import(deadline=600), change_local_save)
+    sync.quick_import(deadline=600)
+    measure('import_unchanged', lambda: sync.quick_import(deadline=600))
+    clear_backups()
+    measure('create_backup', sync.create_backup, clear_backups)
+    measure('is_app_running', lambda: sync.is_app_running() is False)
+    # Idle monitor tick: a pid listing, with no full scan due
+    daemon.poll_app()
+    measure('poll_app', lambda: daemon.poll_app() is False)
+    return results
+
+
+def print_table(all_results):
+    print(f"{'size':>6}  {'operation':<18}{'p50 ms':>11}{'p95 ms':>11}{'MB/s':>10}{'fail':>6}")
+    for size_label, results in all_results.items():
+        for operation in OPERATIONS:
+            row = results[operation]
+            throughput = f"{row['mb_per_s']:.1f}" if row['mb_per_s'] is not None else "-"
+            print(f"{size_label:>6}  {operation:<18}{row['p50_ms']:>11.2f}{row['p95_ms']:>11.2f}"
+                  f"{throughput:>10}{row['failures']:>6}")
+
+
+def compare(all_results, baseline_path, threshold):
+    """Return regressions where p50 grew by more than threshold percent"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    for size_label, results in all_results.items():
+        for operation, row in results.items():
+            before = baseline.get(size_label, {}).get(operation)
+            if not before or before['p50_ms'] <= 0:
+                continue
+            change = (row['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+            if change > threshold:
+                regressions.append(f"{size_label} {operation}: p50 {before['p50_ms']:.2f} -> "
+                                   f"{row['p50_ms']:.2f} ms (+{change:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MAA Redux sync hot paths')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f'Save sizes (default {DEFAULT_SIZES})')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per operation and size')
+    parser.add_argument('--backend', choices=BACKENDS, default='dropbox',
+                        help='Storage backend: the fake Dropbox server (default), memory or a local directory')
+    parser.add_argument('--encrypt', action='store_true', help='Store saves with client-side encryption')
+    parser.add_argument('--compress', action='store_true', help='Store saves with transfer compression')
+    parser.add_argument('--upload-limit', type=float, default=0, help='Upload cap (KB/s, 0 = none)')
+    parser.add_argument('--download-limit', type=float, default=0, help='Download cap (KB/s, 0 = none)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Injected latency per request (ms)')
+    parser.add_argument('--bandwidth', type=float, help='Injected bandwidth limit (MB/s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of an injected 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Probability of an injected 429')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for error injection')
+    parser.add_argument('--save', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Compare p50 latencies against a saved JSON file')
+    parser.add_argument('--threshold', type=float, default=20.0, help='Allowed p50 regression in percent')
+    args = parser.parse_args()
+
+    faults = FaultProfile(
+        latency=args.latency / 1000,
+        bandwidth=args.bandwidth * 1e6 if args.bandwidth else None,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    server = FakeDropboxServer(faults).start()
+    workdir = Path(tempfile.mkdtemp(prefix="maa_sync_bench_"))
+    original_cwd = os.getcwd()
+
+    try:
+        module = load_sync_module()
+        os.chdir(workdir)
+        save_path = workdir / "saves" / "save.dat"
+        save_path.parent.mkdir()
+        sync = make_sync(module, server, save_path, args.backend, args.encrypt, args.compress,
+                         args.upload_limit, args.download_limit)
+        daemon = module.SyncDaemon(sync)
+
+        all_results = {}
+        for size in [parse_size(s) for s in args.sizes.split(',')]:
+            all_results[format_size(size)] = run_size(sync, daemon, save_path, size, args.repeat)
+
+        print_table(all_results)
+        print(f"\nFake server requests: {server.server.request_count}")
+
+        if args.save:
+            with open(Path(original_cwd) / args.save, 'w', encoding='utf-8') as f:
+                json.dump({'faults': vars(args), 'results': all_results}, f, indent=4)
+
+        if args.compare:
+            regressions = compare(all_results, Path(original_cwd) / args.compare, args.threshold)
+            if regressions:
+                print("\nRegressions:")
+                for line in regressions:
+                    print(f"  {line}")
+                sys.exit(1)
+            print("\nNo regressions beyond threshold")
+
+    finally:
+        os.chdir(original_cwd)
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
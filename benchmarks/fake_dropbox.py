@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Local Dropbox API stand-in for benchmarks
+
+Implements the handful of API v2 routes the sync script uses (account
+lookup, metadata, download, upload, upload sessions, revision listing,
+restore, folder listing and long-polling) on a local HTTP server, with
+injectable latency, bandwidth and error rates. Files are kept
+in a temporary directory so large synthetic saves do not have to fit in
+memory.
+"""
+
+import json
+import random
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+import requests
+
+from save_history import content_hash
+
+logger = logging.getLogger(__name__)
+
+IO_CHUNK = 64 * 1024
+# Older revisions are dropped so repeated large uploads don't fill the disk
+KEEP_REVISIONS = 10
+
+ACCOUNT = {
+    "account_id": "dbid:AAH4f99T0taONIb-OurWxbNQ6ywGRopQngc",
+    "name": {
+        "given_name": "Bench",
+        "surname": "User",
+        "familiar_name": "Bench",
+        "display_name": "Bench User",
+        "abbreviated_name": "BU"
+    },
+    "email": "bench@example.com",
+    "email_verified": True,
+    "disabled": False,
+    "locale": "en",
+    "referral_link": "https://db.tt/bench",
+    "is_paired": False,
+    "account_type": {".tag": "basic"},
+    "root_info": {".tag": "user", "root_namespace_id": "1", "home_namespace_id": "1"}
+}
+
+
+class FaultProfile:
+    """Latency, bandwidth and error injection settings"""
+
+    def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency              # seconds added to every request
+        self.bandwidth = bandwidth          # bytes/second for bodies, None = unlimited
+        self.error_rate = error_rate        # probability of a 503
+        self.rate_limit_rate = rate_limit_rate  # probability of a 429
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self) -> Optional[int]:
+        """Pick an injected failure status for a request, if any"""
+        with self._lock:
+            value = self._random.random()
+        if value < self.error_rate:
+            return 503
+        if value < self.error_rate + self.rate_limit_rate:
+            return 429
+        return None
+
+
+class FakeDropboxStore:
+    """File storage behind the fake server"""
+
+    def __init__(self):
+        self.root = Path(tempfile.mkdtemp(prefix="fake_dropbox_"))
+        # lower-cased path -> revisions, newest first
+        self.files: Dict[str, List[Dict]] = {}
+        self.sessions: Dict[str, Path] = {}
+        self.lock = threading.Lock()
+        # Bumped on every commit; list_folder cursors and longpoll compare it
+        self.version = 0
+        self.changed = threading.Condition(self.lock)
+
+    def blob_path(self) -> Path:
+        return self.root / uuid.uuid4().hex
+
+    def commit(self, remote_path: str, blob: Path) -> Dict:
+        """Store blob as the new revision of remote_path and return its metadata"""
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        metadata = {
+            ".tag": "file",
+            "name": remote_path.rsplit('/', 1)[-1],
+            "id": "id:" + uuid.uuid5(uuid.NAMESPACE_URL, remote_path.lower()).hex,
+            "client_modified": now,
+            "server_modified": now,
+            "rev": uuid.uuid4().hex[:16],
+            "size": blob.stat().st_size,
+            "path_lower": remote_path.lower(),
+            "path_display": remote_path,
+            "content_hash": content_hash(blob),
+            "is_downloadable": True
+        }
+        with self.lock:
+            revisions = self.files.setdefault(remote_path.lower(), [])
+            revisions.insert(0, {"metadata": metadata, "blob": blob})
+            dropped = revisions[KEEP_REVISIONS:]
+            del revisions[KEEP_REVISIONS:]
+            self.version += 1
+            self.changed.notify_all()
+        for entry in dropped:
+            entry["blob"].unlink(missing_ok=True)
+        return metadata
+
+    def get(self, remote_path: str, rev: Optional[str] = None) -> Optional[Dict]:
+        """Latest revision of remote_path, or the given one"""
+        with self.lock:
+            for entry in self.files.get(remote_path.lower(), []):
+                if rev is None or entry["metadata"]["rev"] == rev:
+                    return entry
+        return None
+
+    def folder(self, folder: str) -> List[Dict]:
+        """Latest metadata of the files directly inside folder"""
+        prefix = folder.rstrip('/').lower() + '/'
+        with self.lock:
+            return [revisions[0]["metadata"] for path, revisions in self.files.items()
+                    if path.startswith(prefix) and '/' not in path[len(prefix):]]
+
+    def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Block until a commit after version, or timeout; True if something changed"""
+        with self.lock:
+            return self.changed.wait_for(lambda: self.version != version, timeout)
+
+    def revisions(self, remote_path: str) -> List[Dict]:
+        with self.lock:
+            return list(self.files.get(remote_path.lower(), []))
+
+    def restore(self, remote_path: str, rev: str) -> Optional[Dict]:
+        """Commit a copy of an old revision as the newest one"""
+        entry = self.get(remote_path, rev)
+        if not entry:
+            return None
+        blob = self.blob_path()
+        shutil.copyfile(entry["blob"], blob)
+        return self.commit(remote_path, blob)
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class FakeDropboxHandler(BaseHTTPRequestHandler):
+    """Serves the Dropbox API v2 routes used by maa_sync.py"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes; don't let Nagle delay the body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        faults = self.server.faults
+        if faults.latency:
+            time.sleep(faults.latency)
+
+        injected = faults.roll()
+        if injected:
+            self._discard_body()
+            if injected == 429:
+                self._send_json(429, {"error_summary": "too_many_requests/",
+                                      "error": {"reason": {".tag": "too_many_requests"}, "retry_after": 1}})
+            else:
+                self._send_text(503, "Service unavailable (injected)")
+            return
+
+        routes = {
+            '/2/users/get_current_account': self._get_current_account,
+            '/2/files/get_metadata': self._get_metadata,
+            '/2/files/download': self._download,
+            '/2/files/upload': self._upload,
+            '/2/files/upload_session/start': self._session_start,
+            '/2/files/upload_session/append_v2': self._session_append,
+            '/2/files/upload_session/finish': self._session_finish,
+            '/2/files/list_revisions': self._list_revisions,
+            '/2/files/restore': self._restore,
+            '/2/files/list_folder': self._list_folder,
+            '/2/files/list_folder/get_latest_cursor': self._latest_cursor,
+            '/2/files/list_folder/longpoll': self._longpoll,
+        }
+        route = routes.get(self.path.split('?')[0])
+        if not route:
+            self._discard_body()
+            self._send_text(404, f"Unknown route {self.path}")
+            return
+
+        self.server.request_count += 1
+        route()
+
+    # Routes
+
+    def _get_current_account(self):
+        self._discard_body()
+        self._send_json(200, ACCOUNT)
+
+    def _get_metadata(self):
+        arg = json.loads(self._read_body() or b'{}')
+        entry = self.server.store.get(arg['path'])
+        if not entry:
+            self._send_not_found()
+            return
+        self._send_json(200, entry['metadata'])
+
+    def _download(self):
+        self._discard_body()
+        arg = self._api_arg()
+        entry = self.server.store.get(arg['path'], arg.get('rev'))
+        if not entry:
+            self._send_not_found()
+            return
+
+        blob = entry['blob']
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(blob.stat().st_size))
+        self.send_header('Dropbox-API-Result', json.dumps(entry['metadata']))
+        self.end_headers()
+        with open(blob, 'rb') as f:
+            while True:
+                data = f.read(IO_CHUNK)
+                if not data:
+                    break
+                self.wfile.write(data)
+                self._throttle(len(data))
+
+    def _upload(self):
+        arg = self._api_arg()
+        blob = self.server.store.blob_path()
+        self._receive_body(blob)
+        self._send_json(200, self.server.store.commit(arg['path'], blob))
+
+    def _session_start(self):
+        session_id = uuid.uuid4().hex
+        blob = self.server.store.blob_path()
+        self._receive_body(blob)
+        self.server.store.sessions[session_id] = blob
+        self._send_json(200, {"session_id": session_id})
+
+    def _session_append(self):
+        arg = self._api_arg()
+        blob = self.server.store.sessions[arg['cursor']['session_id']]
+        self._receive_body(blob, append=True)
+        self._send_json(200, None)
+
+    def _session_finish(self):
+        arg = self._api_arg()
+        blob = self.server.store.sessions.pop(arg['cursor']['session_id'])
+        self._receive_body(blob, append=True)
+        self._send_json(200, self.server.store.commit(arg['commit']['path'], blob))
+
+    def _list_revisions(self):
+        arg = json.loads(self._read_body() or b'{}')
+        revisions = self.server.store.revisions(arg['path'])
+        if not revisions:
+            self._send_not_found()
+            return
+        entries = [entry['metadata'] for entry in revisions[:arg.get('limit', 10)]]
+        self._send_json(200, {"is_deleted": False, "entries": entries,
+                              "has_more": len(revisions) > len(entries)})
+
+    def _restore(self):
+        arg = json.loads(self._read_body() or b'{}')
+        metadata = self.server.store.restore(arg['path'], arg['rev'])
+        if not metadata:
+            self._send_json(409, {"error_summary": "invalid_revision/",
+                                  "error": {".tag": "invalid_revision"}})
+            return
+        self._send_json(200, metadata)
+
+    def _list_folder(self):
+        arg = json.loads(self._read_body() or b'{}')
+        entries = self.server.store.folder(arg['path'])
+        if not entries:
+            self._send_not_found()
+            return
+        self._send_json(200, {"entries": entries, "cursor": str(self.server.store.version), "has_more": False})
+
+    def _latest_cursor(self):
+        self._discard_body()
+        self._send_json(200, {"cursor": str(self.server.store.version)})
+
+    def _longpoll(self):
+        # The cursor is the store version; any commit anywhere counts as a change
+        arg = json.loads(self._read_body() or b'{}')
+        timeout = min(arg.get('timeout', 30), self.server.longpoll_limit)
+        changes = self.server.store.wait_for_change(int(arg['cursor']), timeout)
+        self._send_json(200, {"changes": changes})
+
+    # Helpers
+
+    def _api_arg(self) -> Dict:
+        return json.loads(self.headers.get('Dropbox-API-Arg', '{}'))
+
+    def _throttle(self, size: int):
+        bandwidth = self.server.faults.bandwidth
+        if bandwidth:
+            time.sleep(size / bandwidth)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def _discard_body(self):
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining:
+            remaining -= len(self.rfile.read(min(IO_CHUNK, remaining)))
+
+    def _receive_body(self, blob: Path, append: bool = False):
+        remaining = int(self.headers.get('Content-Length', 0))
+        with open(blob, 'ab' if append else 'wb') as f:
+            while remaining:
+                data = self.rfile.read(min(IO_CHUNK, remaining))
+                if not data:
+                    break
+                f.write(data)
+                remaining -= len(data)
+                self._throttle(len(data))
+
+    def _send_not_found(self):
+        self._send_json(409, {"error_summary": "path/not_found/",
+                              "error": {".tag": "path", "path": {".tag": "not_found"}}})
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Suppress log messages"""
+        pass
+
+
+class FakeDropboxServer:
+    """Runs the fake API on 127.0.0.1 in a background thread"""
+
+    def __init__(self, faults: Optional[FaultProfile] = None):
+        self.faults = faults or FaultProfile()
+        self.store = FakeDropboxStore()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeDropboxHandler)
+        self.server.daemon_threads = True
+        self.server.faults = self.faults
+        self.server.store = self.store
+        self.server.request_count = 0
+        # Longest a longpoll is held, so benchmarks need not wait Dropbox's 30 s minimum
+        self.server.longpoll_limit = 30
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, name="FakeDropbox", daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+
+    def session(self) -> requests.Session:
+        """A requests session that sends Dropbox API traffic to this server"""
+        session = requests.Session()
+        adapter = _RedirectAdapter(self.url)
+        session.mount('https://', adapter)
+        return session
+
+
+class _RedirectAdapter(requests.adapters.HTTPAdapter):
+    """Rewrites https://<any dropbox host>/... to the local fake server"""
+
+    def __init__(self, target: str):
+        super().__init__()
+        self.target = target
+
+    def send(self, request, **kwargs):
+        _, _, rest = request.url.partition('://')
+        request.url = self.target + '/' + rest.partition('/')[2]
+        return super().send(request, **kwargs)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Local Dropbox OAuth stand-in for benchmarks
+
+Serves the authorize and token endpoints used by dropbox_oauth.py. The
+authorize page approves every request immediately and redirects back with a
+code (or shows it as plain text when there is no redirect URI), so the whole
+authorize -> exchange -> refresh cycle can run offline. PKCE is checked.
+Latency and error injection reuse the FaultProfile from fake_dropbox.
+"""
+
+import base64
+import hashlib
+import json
+import secrets
+import threading
+import time
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional
+import logging
+
+from fake_dropbox import FaultProfile, ACCOUNT
+
+logger = logging.getLogger(__name__)
+
+
+class FakeOAuthHandler(BaseHTTPRequestHandler):
+    """Serves /oauth2/authorize and /oauth2/token"""
+
+    def do_GET(self):
+        parsed_url = urllib.parse.urlparse(self.path)
+        if parsed_url.path != '/oauth2/authorize':
+            self._send_text(404, f"Unknown route {self.path}")
+            return
+
+        params = {k: v[0] for k, v in urllib.parse.parse_qs(parsed_url.query).items()}
+        state = self.server.state
+        if params.get('client_id') != state.app_key:
+            self._send_text(400, "Invalid client_id")
+            return
+        if params.get('response_type') != 'code':
+            self._send_text(400, "Invalid authorize request")
+            return
+
+        code = state.issue_code(params.get('redirect_uri'), params.get('code_challenge'))
+        if not params.get('redirect_uri'):
+            # Paste-the-code mode
+            self._send_text(200, code)
+            return
+
+        query = {'code': code}
+        if 'state' in params:
+            query['state'] = params['state']
+
+        self.send_response(302)
+        self.send_header('Location', f"{params['redirect_uri']}?{urllib.parse.urlencode(query)}")
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        faults = self.server.faults
+        length = int(self.headers.get('Content-Length', 0))
+        form = {k: v[0] for k, v in urllib.parse.parse_qs(self.rfile.read(length).decode()).items()}
+
+        if faults.latency:
+            time.sleep(faults.latency)
+
+        if self.path.split('?')[0] != '/oauth2/token':
+            self._send_text(404, f"Unknown route {self.path}")
+            return
+
+        injected = faults.roll()
+        if injected:
+            self._send_json(injected, {"error": "temporarily_unavailable"})
+            return
+
+        status, payload = self.server.state.token_request(form)
+        self._send_json(status, payload)
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Suppress log messages"""
+        pass
+
+
+class FakeOAuthState:
+    """Codes and tokens issued by the fake server"""
+
+    def __init__(self, app_key: str, app_secret: str, expires_in: int):
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.expires_in = expires_in
+        self.codes: Dict[str, tuple] = {}
+        # refresh token -> True if it was issued through PKCE (no secret needed)
+        self.refresh_tokens: Dict[str, bool] = {}
+        self.counts = {'authorize': 0, 'authorization_code': 0, 'refresh_token': 0, 'rejected': 0}
+        self.lock = threading.Lock()
+
+    def issue_code(self, redirect_uri: Optional[str], code_challenge: Optional[str]) -> str:
+        code = secrets.token_urlsafe(24)
+        with self.lock:
+            self.codes[code] = (redirect_uri, code_challenge)
+            self.counts['authorize'] += 1
+        return code
+
+    def token_request(self, form: Dict[str, str]):
+        """Handle a token endpoint request, returning (status, payload)"""
+        with self.lock:
+            error, refresh_token = self._grant(form)
+            if error:
+                self.counts['rejected'] += 1
+                return 400, {'error': error, 'error_description': f"Fake server rejected request: {error}"}
+            self.counts[form['grant_type']] += 1
+
+        payload = {
+            'access_token': 'sl.' + secrets.token_urlsafe(48),
+            'token_type': 'bearer',
+            'expires_in': self.expires_in,
+            'account_id': ACCOUNT['account_id'],
+            'uid': '1'
+        }
+        if refresh_token:
+            payload['refresh_token'] = refresh_token
+        return 200, payload
+
+    def _grant(self, form: Dict[str, str]):
+        """Validate a token request; returns (error, new refresh token). Caller holds the lock."""
+        secret = form.get('client_secret')
+        if form.get('client_id') != self.app_key or (secret is not None and secret != self.app_secret):
+            return 'invalid_client', None
+
+        grant_type = form.get('grant_type')
+        if grant_type == 'authorization_code':
+            issued = self.codes.pop(form.get('code', ''), None)
+            if issued is None or issued[0] != form.get('redirect_uri'):
+                return 'invalid_grant', None
+            code_challenge = issued[1]
+            if code_challenge:
+                verifier = form.get('code_verifier', '').encode('ascii')
+                expected = base64.urlsafe_b64encode(hashlib.sha256(verifier).digest()).rstrip(b'=').decode()
+                if expected != code_challenge:
+                    return 'invalid_grant', None
+            elif secret is None:
+                return 'invalid_client', None
+            refresh_token = secrets.token_urlsafe(32)
+            self.refresh_tokens[refresh_token] = bool(code_challenge)
+            return None, refresh_token
+        if grant_type == 'refresh_token':
+            pkce = self.refresh_tokens.get(form.get('refresh_token'))
+            if pkce is None:
+                return 'invalid_grant', None
+            if not pkce and secret is None:
+                return 'invalid_client', None
+            return None, None
+        return 'unsupported_grant_type', None
+
+
+class _OAuthHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Refresh storms open hundreds of connections at once
+    request_queue_size = 512
+
+
+class FakeOAuthServer:
+    """Runs the fake OAuth endpoints on 127.0.0.1 in a background thread"""
+
+    def __init__(self, app_key: str = "bench-app-key", app_secret: str = "bench-app-secret",
+                 expires_in: int = 14400, faults: Optional[FaultProfile] = None):
+        self.faults = faults or FaultProfile()
+        self.state = FakeOAuthState(app_key, app_secret, expires_in)
+        self.server = _OAuthHTTPServer(('127.0.0.1', 0), FakeOAuthHandler)
+        self.server.faults = self.faults
+        self.server.state = self.state
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    @property
+    def auth_url(self) -> str:
+        return f"{self.url}/oauth2/authorize"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.url}/oauth2/token"
+
+    def oauth_options(self) -> Dict[str, str]:
+        """Keyword arguments pointing DropboxOAuth/DropboxTokenManager at this server"""
+        return {'auth_url': self.auth_url, 'token_url': self.token_url}
+
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, name="FakeOAuth", daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -21,6 +21,8 @@ def main():
     # Check for key files
     files_to_check = [
         "maa_redux_installer.py",
+        "installer_core.py",
+        "installer_gui.py",
         "maa_sync.py",
         "config.json"
     ]
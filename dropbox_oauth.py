@@ -3,19 +3,41 @@
 Dropbox OAuth 2.0 Helper Module with Refresh Token Support
 """
 
+import base64
+import hashlib
 import json
+import secrets
+import socket
 import time
 import urllib.parse
 import urllib.request
 import webbrowser
-from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import threading
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import logging
 
+from retry_policy import RetryPolicy
+from sync_config import SyncConfig
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_AUTH_URL = "https://www.dropbox.com/oauth2/authorize"
+DEFAULT_TOKEN_URL = "https://api.dropboxapi.com/oauth2/token"
+
+def generate_pkce_pair() -> Tuple[str, str]:
+    """Return a PKCE (code_verifier, S256 code_challenge) pair"""
+    code_verifier = secrets.token_urlsafe(64)
+    digest = hashlib.sha256(code_verifier.encode('ascii')).digest()
+    code_challenge = base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+    return code_verifier, code_challenge
+
+def console_code_prompt(auth_url: str) -> Optional[str]:
+    """Ask for the authorization code on the console (paste-the-code mode)"""
+    print("Open this URL in a browser, allow access and paste the code Dropbox shows:")
+    print(auth_url)
+    return input("Authorization code: ")
+
 class OAuthCallbackHandler(BaseHTTPRequestHandler):
     """HTTP server handler for OAuth callback"""
 
@@ -26,6 +48,7 @@ class OAuthCallbackHandler(BaseHTTPRequestHandler):
 
         if 'code' in query_params:
             self.server.auth_code = query_params['code'][0]
+            self.server.auth_state = query_params.get('state', [None])[0]
             self.send_response(200)
             self.send_header('Content-type', 'text/html')
             self.end_headers()
@@ -36,6 +59,7 @@ class OAuthCallbackHandler(BaseHTTPRequestHandler):
                 <script>window.close();</script>
                 </body></html>
             ''')
+            self.server.auth_event.set()
         elif 'error' in query_params:
             self.server.auth_error = query_params['error'][0]
             self.send_response(400)
@@ -48,6 +72,7 @@ class OAuthCallbackHandler(BaseHTTPRequestHandler):
                 <p>Please close this window and try again.</p>
                 </body></html>
             '''.encode())
+            self.server.auth_event.set()
         else:
             self.send_response(400)
             self.send_header('Content-type', 'text/html')
@@ -58,18 +83,70 @@ class OAuthCallbackHandler(BaseHTTPRequestHandler):
         """Suppress log messages"""
         pass
 
+class OAuthCallbackServer(HTTPServer):
+    """Local server that receives a single OAuth redirect"""
+
+    def __init__(self, server_address):
+        super().__init__(server_address, OAuthCallbackHandler)
+        self.auth_code = None
+        self.auth_state = None
+        self.auth_error = None
+        # Set by the handler as soon as the callback arrives
+        self.auth_event = threading.Event()
+        self.stopping = False
+
+    def serve_until_callback(self):
+        """Handle requests until the callback arrives or stop() is called
+
+        Unlike serve_forever() this blocks in select() without a poll interval,
+        so the thread only wakes up when a request comes in.
+        """
+        while not self.auth_event.is_set() and not self.stopping:
+            self.handle_request()
+
+    def stop(self, server_thread: threading.Thread):
+        """Stop the serving thread and release the port"""
+        if server_thread.is_alive():
+            self.stopping = True
+            # handle_request() is blocked in select(); a throwaway connection wakes it
+            try:
+                socket.create_connection(self.server_address[:2], timeout=1).close()
+            except OSError:
+                pass
+            server_thread.join(timeout=2)
+        self.server_close()
+
 class DropboxOAuth:
     """Dropbox OAuth 2.0 handler with refresh token support"""
 
-    def __init__(self, app_key: str, app_secret: str, redirect_uri: str = "http://localhost:8080/oauth/callback"):
+    def __init__(self, app_key: str, app_secret: str = "", redirect_uri: str = "http://localhost:8080/oauth/callback",
+                 retry_policy: Optional[RetryPolicy] = None, auth_url: str = DEFAULT_AUTH_URL,
+                 token_url: str = DEFAULT_TOKEN_URL, open_browser: Callable[[str], bool] = webbrowser.open,
+                 callback_ports: Optional[List[int]] = None, auth_timeout: float = 300,
+                 code_prompt: Optional[Callable[[str], Optional[str]]] = None):
         self.app_key = app_key
+        # Optional: without a secret the flow relies on PKCE alone
         self.app_secret = app_secret
         self.redirect_uri = redirect_uri
-        self.server_port = 8080
+        # The callback server listens on whatever port the redirect URI names
+        self.server_port = urllib.parse.urlparse(redirect_uri).port or 80
+        # Ports tried in order for the callback server. 0 lets the OS choose one;
+        # the resulting redirect URI must then be accepted by the app settings.
+        self.callback_ports = list(callback_ports) if callback_ports else [self.server_port]
+        self.auth_timeout = auth_timeout
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=4, max_delay=10.0, deadline=60.0)
+        self.open_browser = open_browser
+        self.code_prompt = code_prompt or console_code_prompt
 
         # OAuth endpoints
-        self.auth_url = "https://www.dropbox.com/oauth2/authorize"
-        self.token_url = "https://api.dropboxapi.com/oauth2/token"
+        self.auth_url = auth_url
+        self.token_url = token_url
+
+        # State of the authorization in progress (set by start_auth_flow)
+        self._active_redirect_uri = redirect_uri
+        self._code_verifier = None
+        self._state = None
+        self._callback_server = None
 
     def start_auth_flow(self) -> str:
         """Start OAuth flow and return authorization URL"""
@@ -77,96 +154,124 @@ class DropboxOAuth:
         if not self.app_key or not self.app_key.strip():
             raise ValueError("App key is required")
 
-        if not self.redirect_uri:
-            raise ValueError("Redirect URI is required")
+        # Fresh PKCE verifier and CSRF state for every attempt
+        self._code_verifier, code_challenge = generate_pkce_pair()
+        self._state = secrets.token_urlsafe(16)
 
         params = {
             'client_id': self.app_key.strip(),
             'response_type': 'code',
-            'redirect_uri': self.redirect_uri,
             'token_access_type': 'offline',  # This enables refresh tokens
+            'code_challenge': code_challenge,
+            'code_challenge_method': 'S256',
+            'state': self._state,
         }
+        # Without a redirect URI Dropbox shows the code for the user to paste
+        if self._active_redirect_uri:
+            params['redirect_uri'] = self._active_redirect_uri
 
         # URL encode parameters properly
         auth_url = f"{self.auth_url}?{urllib.parse.urlencode(params)}"
 
         # Log the URL for debugging (without sensitive info)
         logger.info(f"Generated OAuth URL with client_id length: {len(params['client_id'])}")
-        logger.info(f"Redirect URI: {params['redirect_uri']}")
+        logger.info(f"Redirect URI: {params.get('redirect_uri', '(none - paste code)')}")
 
         return auth_url
 
     def get_auth_code_via_browser(self) -> Optional[str]:
-        """Launch browser and wait for OAuth callback"""
-        auth_url = self.start_auth_flow()
-
-        # Try to start server on localhost first, then 127.0.0.1
-        server = None
-        server_addresses = [('localhost', self.server_port), ('127.0.0.1', self.server_port)]
-
-        for address, port in server_addresses:
-            try:
-                server = HTTPServer((address, port), OAuthCallbackHandler)
-                server.auth_code = None
-                server.auth_error = None
-                logger.info(f"OAuth server started on {address}:{port}")
-                break
-            except OSError as e:
-                logger.warning(f"Failed to start server on {address}:{port}: {e}")
-                continue
+        """Launch browser and wait for OAuth callback
 
+        Falls back to paste-the-code mode if none of the callback ports can
+        be bound.
+        """
+        server = self._start_callback_server()
         if not server:
-            raise Exception(f"Could not start OAuth server on port {self.server_port}")
+            logger.warning("No callback port available, falling back to pasting the authorization code")
+            return self.get_auth_code_via_paste()
+
+        host = urllib.parse.urlparse(self.redirect_uri).hostname
+        self._active_redirect_uri = urllib.parse.urlparse(self.redirect_uri)._replace(
+            netloc=f"{host}:{server.server_address[1]}").geturl()
+        auth_url = self.start_auth_flow()
+        self._callback_server = server
 
         # Start server in background
-        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread = threading.Thread(target=server.serve_until_callback)
         server_thread.daemon = True
         server_thread.start()
 
         try:
             # Open browser
             logger.info(f"Opening browser for authorization: {auth_url}")
-            webbrowser.open(auth_url)
+            self.open_browser(auth_url)
 
-            # Wait for callback (max 5 minutes)
-            timeout = 300  # 5 minutes
-            start_time = time.time()
+            # Wait for callback, cancel() or the timeout
+            if not server.auth_event.wait(self.auth_timeout):
+                raise Exception(f"OAuth timeout - no response received within {self.auth_timeout:.0f} seconds")
 
-            while time.time() - start_time < timeout:
-                if server.auth_code:
-                    logger.info("OAuth authorization code received")
-                    return server.auth_code
-                elif server.auth_error:
-                    raise Exception(f"OAuth error from Dropbox: {server.auth_error}")
-                time.sleep(0.5)
+            if server.auth_error:
+                raise Exception(f"OAuth error from Dropbox: {server.auth_error}")
+            if not server.auth_code:
+                raise Exception("OAuth authorization cancelled")
+            if server.auth_state != self._state:
+                raise Exception("OAuth state mismatch - callback did not come from this authorization")
 
-            raise Exception("OAuth timeout - no response received within 5 minutes")
+            logger.info("OAuth authorization code received")
+            return server.auth_code
 
         finally:
-            server.shutdown()
-            server.server_close()
+            self._callback_server = None
+            server.stop(server_thread)
+
+    def get_auth_code_via_paste(self) -> Optional[str]:
+        """Authorize without a redirect; the user pastes the code Dropbox shows"""
+        self._active_redirect_uri = None
+        auth_url = self.start_auth_flow()
+
+        logger.info(f"Opening browser for authorization: {auth_url}")
+        self.open_browser(auth_url)
+
+        code = self.code_prompt(auth_url)
+        return code.strip() if code and code.strip() else None
+
+    def cancel(self):
+        """Abort a pending browser authorization so a new attempt can start right away"""
+        server = self._callback_server
+        if server:
+            server.auth_event.set()
+
+    def _start_callback_server(self) -> Optional[OAuthCallbackServer]:
+        """Bind the callback server to the first free configured port"""
+        host = urllib.parse.urlparse(self.redirect_uri).hostname or 'localhost'
+
+        # Try the redirect host first, then 127.0.0.1
+        for port in self.callback_ports:
+            for address in dict.fromkeys([host, '127.0.0.1']):
+                try:
+                    server = OAuthCallbackServer((address, port))
+                    logger.info(f"OAuth server started on {address}:{server.server_address[1]}")
+                    return server
+                except OSError as e:
+                    logger.warning(f"Failed to start server on {address}:{port}: {e}")
+        return None
 
     def exchange_code_for_tokens(self, auth_code: str) -> Dict[str, str]:
         """Exchange authorization code for access and refresh tokens"""
         data = {
             'code': auth_code,
             'grant_type': 'authorization_code',
-            'client_id': self.app_key,
-            'client_secret': self.app_secret,
-            'redirect_uri': self.redirect_uri
+            'client_id': self.app_key
         }
-
-        # Make request
-        request_data = urllib.parse.urlencode(data).encode()
-        request = urllib.request.Request(
-            self.token_url,
-            data=request_data,
-            headers={'Content-Type': 'application/x-www-form-urlencoded'}
-        )
+        if self._code_verifier:
+            data['code_verifier'] = self._code_verifier
+        if self.app_secret:
+            data['client_secret'] = self.app_secret
+        if self._active_redirect_uri:
+            data['redirect_uri'] = self._active_redirect_uri
 
         try:
-            with urllib.request.urlopen(request) as response:
-                response_data = json.loads(response.read().decode())
+            response_data = self._post_token_request(data, "Token exchange")
 
             if 'access_token' not in response_data:
                 raise Exception(f"Token exchange failed: {response_data}")
@@ -187,20 +292,14 @@ class DropboxOAuth:
         data = {
             'grant_type': 'refresh_token',
             'refresh_token': refresh_token,
-            'client_id': self.app_key,
-            'client_secret': self.app_secret
+            'client_id': self.app_key
         }
-
-        request_data = urllib.parse.urlencode(data).encode()
-        request = urllib.request.Request(
-            self.token_url,
-            data=request_data,
-            headers={'Content-Type': 'application/x-www-form-urlencoded'}
-        )
+        # Tokens obtained with PKCE alone refresh without a secret
+        if self.app_secret:
+            data['client_secret'] = self.app_secret
 
         try:
-            with urllib.request.urlopen(request) as response:
-                response_data = json.loads(response.read().decode())
+            response_data = self._post_token_request(data, "Token refresh")
 
             if 'access_token' not in response_data:
                 raise Exception(f"Token refresh failed: {response_data}")
@@ -215,68 +314,80 @@ class DropboxOAuth:
             error_response = e.read().decode()
             raise Exception(f"Token refresh failed: {error_response}")
 
+    def _post_token_request(self, data: Dict[str, str], description: str) -> Dict:
+        """POST form data to the token endpoint, retrying transient failures"""
+        request_data = urllib.parse.urlencode(data).encode()
+
+        def send():
+            request = urllib.request.Request(
+                self.token_url,
+                data=request_data,
+                headers={'Content-Type': 'application/x-www-form-urlencoded'}
+            )
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return json.loads(response.read().decode())
+
+        return self.retry_policy.call(send, description=description)
+
 class DropboxTokenManager:
     """Manages Dropbox tokens with automatic refresh"""
 
-    def __init__(self, config_path: str, app_key: str, app_secret: str):
-        self.config_path = Path(config_path)
+    def __init__(self, config_path: str, app_key: str, app_secret: str = "",
+                 config: Optional[SyncConfig] = None, **oauth_options):
+        """oauth_options are passed to DropboxOAuth (e.g. auth_url, token_url, redirect_uri)
+
+        Pass config to share an already loaded SyncConfig instead of reading config_path.
+        """
+        self.config = config or SyncConfig(config_path)
+        self.config_path = self.config.path
         self.app_key = app_key
         self.app_secret = app_secret
-        self.oauth = DropboxOAuth(app_key, app_secret)
+        self.oauth = DropboxOAuth(app_key, app_secret, **oauth_options)
 
-        self._tokens = self._load_tokens()
-        self._token_expires_at = 0
+        # Serializes refreshes so concurrent callers share one token request
+        self._refresh_lock = threading.Lock()
 
-    def _load_tokens(self) -> Dict[str, str]:
-        """Load tokens from config file"""
-        if not self.config_path.exists():
-            return {}
+        self._load_tokens()
 
-        try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+    def _load_tokens(self):
+        """Take the tokens and their expiry from the config"""
+        self._config_generation = self.config.generation
+        self._tokens = {
+            'access_token': self.config['dropbox_access_token'],
+            'refresh_token': self.config['dropbox_refresh_token'],
+            'expires_in': self.config['dropbox_token_expires_in'],
+            'obtained_at': self.config['dropbox_token_obtained_at']
+        }
 
-            return {
-                'access_token': config.get('dropbox_access_token', ''),
-                'refresh_token': config.get('dropbox_refresh_token', ''),
-                'expires_in': config.get('dropbox_token_expires_in', 0)
-            }
-        except Exception as e:
-            logger.warning(f"Failed to load tokens: {e}")
-            return {}
+        # Restore the expiry of a previously saved token
+        self._token_expires_at = 0
+        if self._tokens['obtained_at'] and self._tokens['expires_in']:
+            self._token_expires_at = self._tokens['obtained_at'] + self._tokens['expires_in']
 
     def _save_tokens(self, tokens: Dict[str, str]):
         """Save tokens to config file"""
         try:
-            # Load existing config
-            config = {}
-            if self.config_path.exists():
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-
-            # Update with new tokens
-            config.update({
+            self.config.update({
                 'dropbox_access_token': tokens.get('access_token', ''),
                 'dropbox_refresh_token': tokens.get('refresh_token', ''),
-                'dropbox_token_expires_in': tokens.get('expires_in', 0),
+                'dropbox_token_expires_in': int(tokens.get('expires_in') or 0),
                 'dropbox_token_obtained_at': int(time.time())
             })
-
-            # Save config
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4)
-
             self._tokens = tokens
+            self._config_generation = self.config.generation
 
         except Exception as e:
             logger.error(f"Failed to save tokens: {e}")
             raise
 
-    def authorize_new_user(self) -> bool:
-        """Complete OAuth flow for new user"""
+    def authorize_new_user(self, paste: bool = False) -> bool:
+        """Complete OAuth flow for new user (paste=True skips the callback server)"""
         try:
             # Get authorization code
-            auth_code = self.oauth.get_auth_code_via_browser()
+            if paste:
+                auth_code = self.oauth.get_auth_code_via_paste()
+            else:
+                auth_code = self.oauth.get_auth_code_via_browser()
             if not auth_code:
                 return False
 
@@ -299,22 +410,37 @@ class DropboxTokenManager:
 
     def get_valid_access_token(self) -> Optional[str]:
         """Get a valid access token, refreshing if necessary"""
-        # Check if we have tokens
-        if not self._tokens.get('access_token'):
+        # Pick up tokens written by another process (e.g. a manual re-authorization),
+        # whichever reader of the shared config noticed the change
+        self.config.reload_if_changed()
+        if self.config.generation != self._config_generation:
+            with self._refresh_lock:
+                self._load_tokens()
+
+        # Check if we have tokens (a refresh token alone is enough)
+        if not self._tokens.get('access_token') and not self._tokens.get('refresh_token'):
             logger.warning("No access token available")
             return None
 
         # Check if token is expired (with 5 minute buffer)
-        current_time = time.time()
-        if self._token_expires_at and current_time >= (self._token_expires_at - 300):
-            logger.info("Access token expired, refreshing...")
+        if self._token_needs_refresh():
+            with self._refresh_lock:
+                # Another thread may have refreshed while we waited for the lock
+                if self._token_needs_refresh():
+                    logger.info("Access token expired, refreshing...")
 
-            if not self._refresh_token():
-                logger.error("Failed to refresh token")
-                return None
+                    if not self._refresh_token():
+                        logger.error("Failed to refresh token")
+                        return None
 
         return self._tokens.get('access_token')
 
+    def _token_needs_refresh(self) -> bool:
+        """Check if the access token is missing, expired or within 5 minutes of expiring"""
+        if not self._tokens.get('access_token'):
+            return True
+        return bool(self._token_expires_at) and time.time() >= (self._token_expires_at - 300)
+
     def _refresh_token(self) -> bool:
         """Refresh the access token using refresh token"""
         refresh_token = self._tokens.get('refresh_token')
@@ -344,6 +470,11 @@ class DropboxTokenManager:
             logger.error(f"Token refresh failed: {e}")
             return False
 
+    @property
+    def token_expires_at(self) -> Optional[float]:
+        """Unix time the current access token expires, if known"""
+        return self._token_expires_at or None
+
     def is_authorized(self) -> bool:
         """Check if user is properly authorized"""
         return bool(self._tokens.get('access_token') and self._tokens.get('refresh_token'))
@@ -351,22 +482,13 @@ class DropboxTokenManager:
     def revoke_authorization(self):
         """Remove stored tokens"""
         try:
-            if self.config_path.exists():
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-
-                # Remove token fields
-                config.pop('dropbox_access_token', None)
-                config.pop('dropbox_refresh_token', None)
-                config.pop('dropbox_token_expires_in', None)
-                config.pop('dropbox_token_obtained_at', None)
-
-                with open(self.config_path, 'w', encoding='utf-8') as f:
-                    json.dump(config, f, indent=4)
+            self.config.remove(['dropbox_access_token', 'dropbox_refresh_token',
+                                'dropbox_token_expires_in', 'dropbox_token_obtained_at'])
 
             self._tokens = {}
             self._token_expires_at = 0
+            self._config_generation = self.config.generation
             logger.info("Authorization revoked")
 
         except Exception as e:
-            logger.error(f"Failed to revoke authorization: {e}")
\ No newline at end of file
+            logger.error(f"Failed to revoke authorization: {e}")
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+MAA Redux Save Sync - Installer core
+Installation steps shared by the GUI and the headless installer
+"""
+
+import os
+import sys
+import json
+import platform
+import subprocess
+import shutil
+import tempfile
+import zipapp
+import compileall
+import py_compile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The sync service and its support modules are shipped next to the installer
+SOURCE_DIR = Path(__file__).resolve().parent
+SUPPORT_MODULES = ["sync_config.py", "instance_lock.py", "poll_scheduler.py", "process_matcher.py",
+                   "save_settle.py", "save_history.py", "dropbox_oauth.py", "retry_policy.py",
+                   "upload_queue.py", "sync_metrics.py", "status_server.py", "transfer_scheduler.py",
+                   "storage_backends.py", "lan_sync.py", "save_crypto.py",
+                   "save_compression.py", "bandwidth_limiter.py"]
+SYNC_MODULES = ["maa_sync.py"] + SUPPORT_MODULES
+ZIPAPP_NAME = "maa_sync.pyz"
+
+# Exit codes of the headless installer
+EXIT_OK = 0
+EXIT_INSTALL_FAILED = 1
+EXIT_BAD_CONFIG = 2
+EXIT_AUTH_FAILED = 3
+
+class InstallerCore:
+    """Installation logic without any GUI dependencies"""
+
+    def __init__(self, app_key: str = "", app_secret: str = "", save_file_path: str = "",
+                 app_name: str = "MAA Redux", install_location: Optional[str] = None,
+                 auto_start: bool = True, oauth_tokens: Optional[Dict] = None,
+                 zipapp: bool = False, progress: Optional[Callable[[int, str], None]] = None):
+        self.system = platform.system()
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.save_file_path = save_file_path
+        self.app_name = app_name
+        self.install_location = install_location or str(self.default_install_location())
+        self.auto_start = auto_start
+        # dropbox_* token fields; None means read them from the GUI's temp config
+        self.oauth_tokens = oauth_tokens
+        # Also bundle the service as a single-file maa_sync.pyz and start it from that
+        self.zipapp = zipapp
+        self.progress = progress or (lambda value, status: None)
+
+    def sync_command(self) -> List[str]:
+        """Interpreter arguments that start the installed sync service"""
+        if self.zipapp:
+            return [ZIPAPP_NAME]
+        # Run as a module: unlike a script path, -m loads the precompiled bytecode
+        return ["-m", "maa_sync"]
+
+    def default_install_location(self) -> Path:
+        """Default installation path for this OS"""
+        if self.system == "Windows":
+            return Path.home() / "MAA-Redux-Sync"
+        return Path.home() / "maa-redux-sync"
+
+    def find_save_files(self) -> List[Path]:
+        """Search common locations for likely MAA Redux save files"""
+        save_files = []
+        common_locations = []
+
+        if self.system == "Windows":
+            common_locations = [
+                Path.home() / "AppData" / "Roaming" / "MAA Redux",
+                Path.home() / "AppData" / "Local" / "MAA Redux",
+                Path.home() / "Documents" / "MAA Redux",
+                Path("C:") / "Program Files" / "MAA Redux",
+                Path("C:") / "Program Files (x86)" / "MAA Redux",
+                Path.home() / "Downloads"
+            ]
+        else:  # macOS/Linux
+            common_locations = [
+                Path.home() / "Library" / "Application Support" / "MAA Redux",
+                Path.home() / "Documents" / "MAA Redux",
+                Path.home() / "Downloads",
+                Path("/Applications") / "MAA Redux.app" / "Contents" / "Resources"
+            ]
+
+        # Search for save files (common extensions)
+        save_extensions = ["*.save", "*.dat", "*.sav", "*.data", "*.json"]
+
+        for location in common_locations:
+            if location.exists():
+                for ext in save_extensions:
+                    for save_file in location.rglob(ext):
+                        # Filter for files that might be save files
+                        if self.is_likely_save_file(save_file):
+                            save_files.append(save_file)
+
+        return save_files
+
+    def is_likely_save_file(self, file_path):
+        """Check if a file is likely a save file"""
+        filename = file_path.name.lower()
+        
+        # Common save file indicators
+        save_indicators = [
+            "save", "player", "game", "progress", "data", 
+            "profile", "user", "account", "config"
+        ]
+        
+        # Check if filename contains save indicators
+        for indicator in save_indicators:
+            if indicator in filename:
+                return True
+        
+        # Check file size (save files are typically small-medium size)
+        try:
+            size = file_path.stat().st_size
+            return 100 < size < 50 * 1024 * 1024  # Between 100 bytes and 50MB
+        except:
+            return False
+
+    def validate(self):
+        """Check the installation settings, raising ValueError describing the first problem"""
+        if not self.app_key.strip():
+            raise ValueError("Please enter your Dropbox App Key")
+
+        if not str(self.save_file_path).strip():
+            raise ValueError("Please select your save file")
+
+        save_path = Path(self.save_file_path)
+        if not save_path.exists():
+            raise ValueError("Selected save file does not exist")
+
+        if not save_path.is_file():
+            raise ValueError("Selected path is not a file")
+
+        if not self.app_name.strip():
+            raise ValueError("Please enter the application name")
+
+    def install(self) -> Path:
+        """Run every installation step and return the installation directory"""
+        self.progress(0, "Starting installation...")
+
+        # Step 1: Create installation directory
+        self.progress(10, "Creating installation directory...")
+        install_dir = Path(self.install_location)
+        install_dir.mkdir(parents=True, exist_ok=True)
+
+        # Step 2: Install Python dependencies
+        self.progress(20, "Installing Python dependencies...")
+        self.install_dependencies()
+
+        # Step 3: Copy OAuth module
+        self.progress(30, "Copying OAuth module...")
+        self.copy_oauth_module(install_dir)
+
+        # Step 4: Install main script
+        self.progress(40, "Installing sync script...")
+        self.create_sync_script(install_dir)
+
+        # Step 5: Precompile (and optionally bundle) the sync modules
+        self.progress(50, "Precompiling sync modules...")
+        self.precompile(install_dir)
+        if self.zipapp:
+            self.build_zipapp(install_dir)
+
+        # Step 6: Create configuration
+        self.progress(60, "Creating configuration...")
+        self.create_config_file(install_dir)
+
+        # Step 7: Create helper scripts
+        self.progress(70, "Creating helper scripts...")
+        self.create_helper_scripts(install_dir)
+
+        # Step 8: Setup auto-start
+        if self.auto_start:
+            self.progress(80, "Setting up auto-start...")
+            self.setup_autostart(install_dir)
+
+        # Step 9: Test installation
+        self.progress(90, "Testing installation...")
+        self.test_installation(install_dir)
+
+        self.progress(100, "Installation complete!")
+        return install_dir
+
+    def install_dependencies(self):
+        """Install required Python packages"""
+        packages = ["psutil", "dropbox"]
+
+        for package in packages:
+            try:
+                __import__(package)
+            except ImportError:
+                # pip reports on stderr: stdout carries the headless installer's JSON events
+                subprocess.check_call([sys.executable, "-m", "pip", "install", package], stdout=sys.stderr)
+
+    def copy_oauth_module(self, install_dir):
+        """Copy OAuth module and its support modules to installation directory"""
+        for module_name in SUPPORT_MODULES:
+            module_path = SOURCE_DIR / module_name
+            if module_path.exists():
+                shutil.copy2(module_path, install_dir / module_name)
+            else:
+                raise FileNotFoundError(f"Support module ({module_name}) not found next to the installer")
+    
+    def create_sync_script(self, install_dir):
+        """Install the main synchronization script"""
+        script_path = install_dir / "maa_sync.py"
+        shutil.copy2(SOURCE_DIR / "maa_sync.py", script_path)
+
+        # Make executable on Unix systems
+        if self.system != "Windows":
+            os.chmod(script_path, 0o755)
+
+    def precompile(self, install_dir):
+        """Byte-compile the installed modules so service starts skip compilation"""
+        if not compileall.compile_dir(str(install_dir), maxlevels=0, quiet=1):
+            raise RuntimeError("Failed to byte-compile the sync modules")
+
+    def build_zipapp(self, install_dir):
+        """Bundle the sync service and its modules into a single maa_sync.pyz"""
+        with tempfile.TemporaryDirectory(prefix="maa_sync_pyz_") as staging:
+            staging = Path(staging)
+            for module_name in SYNC_MODULES:
+                source = staging / module_name
+                shutil.copy2(install_dir / module_name, source)
+                # zipimport only finds module.pyc next to the source. Unchecked hash
+                # pycs skip the timestamp check, which zip's 2 s resolution would break.
+                py_compile.compile(str(source), cfile=str(source.with_suffix('.pyc')), doraise=True,
+                                   invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+
+            zipapp.create_archive(staging, install_dir / ZIPAPP_NAME,
+                                  interpreter="/usr/bin/env python3", main="maa_sync:main")
+    
+    def create_config_file(self, install_dir):
+        """Create configuration file"""
+
+        # Tokens given up front (headless installs), otherwise those saved
+        # by the GUI's authorization step in the temp config
+        oauth_tokens = dict(self.oauth_tokens or {})
+        temp_config_path = Path("temp_oauth_config.json")
+        if self.oauth_tokens is None and temp_config_path.exists():
+            try:
+                with open(temp_config_path, 'r', encoding='utf-8') as f:
+                    oauth_tokens = json.load(f)
+                # Clean up temp file
+                temp_config_path.unlink()
+            except Exception as e:
+                logger.warning(f"Failed to load OAuth tokens: {e}")
+
+        config = {
+            "app_name": self.app_name,
+            "save_file_path": str(self.save_file_path),
+            "dropbox_app_key": self.app_key,
+            "dropbox_app_secret": self.app_secret,
+            "dropbox_access_token": oauth_tokens.get("dropbox_access_token", ""),
+            "dropbox_refresh_token": oauth_tokens.get("dropbox_refresh_token", ""),
+            "dropbox_token_expires_in": oauth_tokens.get("dropbox_token_expires_in", 0),
+            "dropbox_token_obtained_at": oauth_tokens.get("dropbox_token_obtained_at", 0),
+            "dropbox_folder": "/SyncedFiles",
+            "sync_filename": Path(self.save_file_path).name
+        }
+
+        # Catch a bad config now rather than when the sync service starts
+        from sync_config import validate_config, SERVICE_REQUIRED
+        validate_config(config, SERVICE_REQUIRED)
+
+        config_path = install_dir / "config.json"
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=4)
+    
+    def create_helper_scripts(self, install_dir):
+        """Create helper scripts for manual operations"""
+        sync = " ".join(self.sync_command())
+        
+        if self.system == "Windows":
+            # Windows batch files
+            start_script = f'''@echo off
+cd /d "{install_dir}"
+echo Starting MAA Redux Save Sync...
+pythonw {sync}
+'''
+            
+            stop_script = f'''@echo off
+cd /d "{install_dir}"
+echo Stopping MAA Redux Save Sync...
+python {sync} --stop
+pause
+'''
+            
+            manual_import = f'''@echo off
+cd /d "{install_dir}"
+echo Importing save from Dropbox...
+python {sync} --import
+pause
+'''
+            
+            manual_upload = f'''@echo off
+cd /d "{install_dir}"
+echo Uploading save to Dropbox...
+python {sync} --upload
+pause
+'''
+            
+            with open(install_dir / "start_sync.bat", 'w') as f:
+                f.write(start_script)
+            with open(install_dir / "stop_sync.bat", 'w') as f:
+                f.write(stop_script)
+            with open(install_dir / "manual_import.bat", 'w') as f:
+                f.write(manual_import)
+            with open(install_dir / "manual_upload.bat", 'w') as f:
+                f.write(manual_upload)
+                
+        else:
+            # Unix shell scripts
+            start_script = f'''#!/bin/bash
+cd "{install_dir}"
+echo "Starting MAA Redux Save Sync..."
+python3 {sync} &
+echo "Sync started in background"
+'''
+            
+            stop_script = f'''#!/bin/bash
+cd "{install_dir}"
+echo "Stopping MAA Redux Save Sync..."
+python3 {sync} --stop
+'''
+            
+            manual_import = f'''#!/bin/bash
+cd "{install_dir}"
+echo "Importing save from Dropbox..."
+python3 {sync} --import
+'''
+            
+            manual_upload = f'''#!/bin/bash
+cd "{install_dir}"
+echo "Uploading save to Dropbox..."
+python3 {sync} --upload
+'''
+            
+            scripts = [
+                ("start_sync.sh", start_script),
+                ("stop_sync.sh", stop_script),
+                ("manual_import.sh", manual_import),
+                ("manual_upload.sh", manual_upload)
+            ]
+            
+            for script_name, content in scripts:
+                script_path = install_dir / script_name
+                with open(script_path, 'w') as f:
+                    f.write(content)
+                os.chmod(script_path, 0o755)
+    
+    def setup_autostart(self, install_dir):
+        """Setup auto-start for the system"""
+        
+        if self.system == "Windows":
+            self.setup_windows_autostart(install_dir)
+        else:
+            self.setup_macos_autostart(install_dir)
+    
+    def setup_windows_autostart(self, install_dir):
+        """Setup Windows auto-start"""
+        
+        # Create VBS script for silent startup
+        vbs_content = f'''Set WshShell = CreateObject("WScript.Shell")
+WshShell.CurrentDirectory = "{install_dir}"
+WshShell.Run "pythonw {" ".join(self.sync_command())}", 0, False
+'''
+        
+        vbs_path = install_dir / "start_sync_silent.vbs"
+        with open(vbs_path, 'w') as f:
+            f.write(vbs_content)
+        
+        # Add to registry
+        try:
+            import winreg
+            key_path = r"Software\\Microsoft\\Windows\\CurrentVersion\\Run"
+            
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_SET_VALUE)
+            winreg.SetValueEx(key, "MAAReduxSync", 0, winreg.REG_SZ, str(vbs_path))
+            winreg.CloseKey(key)
+            
+        except ImportError:
+            # Fallback: create startup folder shortcut
+            startup_folder = Path.home() / "AppData" / "Roaming" / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "Startup"
+            if startup_folder.exists():
+                batch_path = install_dir / "start_sync.bat"
+                shortcut_path = startup_folder / "MAA Redux Sync.bat"
+                try:
+                    shutil.copy2(batch_path, shortcut_path)
+                except Exception as e:
+                    logger.warning(f"Could not create startup shortcut: {e}")
+        except Exception as e:
+            logger.warning(f"Could not set up auto-start: {e}")
+    
+    def setup_macos_autostart(self, install_dir):
+        """Setup macOS LaunchAgent"""
+        
+        program_arguments = "\n".join(
+            f"        <string>{install_dir / arg if arg == ZIPAPP_NAME else arg}</string>"
+            for arg in self.sync_command()
+        )
+        plist_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
+<plist version="1.0">
+<dict>
+    <key>Label</key>
+    <string>com.maa.redux.sync</string>
+    <key>ProgramArguments</key>
+    <array>
+        <string>/usr/bin/python3</string>
+{program_arguments}
+    </array>
+    <key>WorkingDirectory</key>
+    <string>{install_dir}</string>
+    <key>RunAtLoad</key>
+    <true/>
+    <key>KeepAlive</key>
+    <dict>
+        <key>SuccessfulExit</key>
+        <false/>
+    </dict>
+    <key>StandardOutPath</key>
+    <string>{install_dir}/sync_error.log</string>
+    <key>StandardErrorPath</key>
+    <string>{install_dir}/sync_error.log</string>
+</dict>
+</plist>'''
+        
+        try:
+            launchagents_dir = Path.home() / "Library" / "LaunchAgents"
+            launchagents_dir.mkdir(exist_ok=True)
+            
+            plist_path = launchagents_dir / "com.maa.redux.sync.plist"
+            with open(plist_path, 'w') as f:
+                f.write(plist_content)
+            
+            # Load the agent
+            subprocess.run(["launchctl", "load", str(plist_path)], check=False)
+            
+        except Exception as e:
+            logger.warning(f"Could not set up macOS auto-start: {e}")
+    
+    def test_installation(self, install_dir):
+        """Test the installation"""
+
+        # Check if files exist
+        required_files = SYNC_MODULES + ["config.json"]
+        if self.zipapp:
+            required_files.append(ZIPAPP_NAME)
+        for file_name in required_files:
+            file_path = install_dir / file_name
+            if not file_path.exists():
+                raise FileNotFoundError(f"Required file not created: {file_name}")
+        
+        # Test script execution
+        result = subprocess.run(
+            [sys.executable] + self.sync_command() + ["--test"],
+            cwd=install_dir,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+
+        if result.returncode != 0:
+            raise RuntimeError(f"Script test failed: {result.stderr}")
+
+    def start_sync_service(self, install_dir):
+        """Start the sync service in the background"""
+        if self.system == "Windows":
+            # Use VBS script for silent startup
+            vbs_path = install_dir / "start_sync_silent.vbs"
+            if vbs_path.exists():
+                subprocess.Popen(["wscript", str(vbs_path)], cwd=install_dir)
+            else:
+                subprocess.Popen([sys.executable] + self.sync_command(), cwd=install_dir,
+                                 creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            subprocess.Popen([sys.executable] + self.sync_command(), cwd=install_dir)
+
+def emit_event(event: str, **fields):
+    """Write one JSON progress line to stdout for the calling script"""
+    print(json.dumps(dict(event=event, **fields)), flush=True)
+
+def stderr_code_prompt(auth_url: str) -> Optional[str]:
+    """Paste-the-code prompt that keeps stdout free for progress events"""
+    print("Open this URL in a browser, allow access and paste the code Dropbox shows:", file=sys.stderr)
+    print(auth_url, file=sys.stderr)
+    print("Authorization code: ", end="", file=sys.stderr, flush=True)
+    return sys.stdin.readline()
+
+def authorize_headless(app_key: str, app_secret: str, mode: str) -> Dict:
+    """Run the OAuth flow from the console and return the dropbox_* token fields"""
+    from dropbox_oauth import DropboxTokenManager
+
+    with tempfile.TemporaryDirectory(prefix="maa_oauth_") as temp_dir:
+        config_path = Path(temp_dir) / "oauth.json"
+        token_manager = DropboxTokenManager(str(config_path), app_key, app_secret,
+                                            code_prompt=stderr_code_prompt)
+        if not token_manager.authorize_new_user(paste=(mode == "paste")):
+            raise RuntimeError("Dropbox authorization failed")
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+def load_answers(path: str) -> Dict:
+    """Read a headless answers file, raising ValueError if it is unusable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            answers = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Cannot read answers file {path}: {e}")
+
+    if not isinstance(answers, dict):
+        raise ValueError("Answers file must contain a JSON object")
+    if answers.get("authorize") not in (None, False, "browser", "paste"):
+        raise ValueError('"authorize" must be "browser", "paste" or false')
+    if not answers.get("authorize") and not answers.get("refresh_token"):
+        raise ValueError('Provide "refresh_token" or set "authorize" to "browser" or "paste"')
+    return answers
+
+def run_headless(answers_path: str) -> int:
+    """Install from an answers file, reporting progress as JSON lines; returns the exit code"""
+    try:
+        answers = load_answers(answers_path)
+        core = InstallerCore(
+            app_key=answers.get("app_key", ""),
+            app_secret=answers.get("app_secret", ""),
+            save_file_path=answers.get("save_file_path", "auto"),
+            app_name=answers.get("app_name", "MAA Redux"),
+            install_location=answers.get("install_location"),
+            auto_start=answers.get("auto_start", True),
+            zipapp=answers.get("zipapp", False),
+            progress=lambda value, status: emit_event("progress", percent=value, status=status)
+        )
+
+        if core.save_file_path == "auto":
+            save_files = core.find_save_files()
+            if not save_files:
+                raise ValueError("No save files found automatically; set \"save_file_path\"")
+            core.save_file_path = str(save_files[0])
+            emit_event("detected", save_file_path=core.save_file_path, candidates=len(save_files))
+
+        core.validate()
+    except ValueError as e:
+        emit_event("error", stage="config", message=str(e), exit_code=EXIT_BAD_CONFIG)
+        return EXIT_BAD_CONFIG
+
+    if answers.get("authorize"):
+        try:
+            emit_event("progress", percent=0, status="Authorizing with Dropbox...")
+            core.oauth_tokens = authorize_headless(core.app_key, core.app_secret, answers["authorize"])
+        except Exception as e:
+            emit_event("error", stage="authorize", message=str(e), exit_code=EXIT_AUTH_FAILED)
+            return EXIT_AUTH_FAILED
+    else:
+        # Only a refresh token is needed; the sync service fetches an access token on start
+        core.oauth_tokens = {
+            "dropbox_access_token": answers.get("access_token", ""),
+            "dropbox_refresh_token": answers["refresh_token"]
+        }
+
+    try:
+        install_dir = core.install()
+        if answers.get("start_service"):
+            core.start_sync_service(install_dir)
+    except Exception as e:
+        emit_event("error", stage="install", message=str(e), exit_code=EXIT_INSTALL_FAILED)
+        return EXIT_INSTALL_FAILED
+
+    emit_event("done", install_dir=str(install_dir), exit_code=EXIT_OK)
+    return EXIT_OK
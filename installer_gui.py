@@ -0,0 +1,805 @@
+#!/usr/bin/env python3
+"""
+MAA Redux Save Sync - Installer GUI
+Tk front end for the installer; loaded only when the GUI is started
+"""
+
+import os
+import sys
+import threading
+import webbrowser
+from pathlib import Path
+from tkinter import *
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import tkinter as tk
+
+from installer_core import InstallerCore
+
+class MAAReduxSyncInstaller:
+    def __init__(self):
+        self.root = tk.Tk()
+        self.root.title("MAA Redux Save Sync - Installer")
+        self.root.geometry("850x700")
+        self.root.resizable(True, True)
+        self.root.minsize(650, 500)
+        
+        # Set window icon if available
+        try:
+            self.root.iconbitmap('icon.ico')  # Optional: add an icon file
+        except:
+            pass
+        
+        # Variables
+        self.dropbox_app_key = StringVar()
+        self.dropbox_app_secret = StringVar()
+        self.save_file_path = StringVar()
+        self.app_name = StringVar(value="MAA Redux")
+        self.install_location = StringVar()
+        self.auto_start = BooleanVar(value=True)
+
+        # OAuth status
+        self.oauth_authorized = BooleanVar(value=False)
+        self.active_token_manager = None
+        self.auth_cancel_requested = False
+        
+        # Installation logic lives in the GUI-independent core
+        self.core = InstallerCore()
+        self.system = self.core.system
+        self.setup_default_paths()
+        
+        # GUI setup
+        self.create_widgets()
+        self.detect_save_files()
+        
+    def setup_default_paths(self):
+        """Setup default installation paths based on OS"""
+        self.install_location.set(self.core.install_location)
+    
+    def create_widgets(self):
+        """Create the main GUI"""
+        # Main frame
+        main_frame = ttk.Frame(self.root)
+        main_frame.pack(fill=BOTH, expand=True, padx=10, pady=10)
+
+        # Create scrollable content area with proper width management
+        canvas_frame = ttk.Frame(main_frame)
+        canvas_frame.pack(fill="both", expand=True)
+
+        canvas = tk.Canvas(canvas_frame, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(canvas_frame, orient="vertical", command=canvas.yview)
+        scrollable_frame = ttk.Frame(canvas)
+
+        # Configure scrollable frame to update canvas scroll region
+        def configure_scroll_region(event):
+            canvas.configure(scrollregion=canvas.bbox("all"))
+        scrollable_frame.bind("<Configure>", configure_scroll_region)
+
+        # Configure canvas window to fill available width
+        def configure_canvas_window(event):
+            canvas_width = event.width
+            canvas.itemconfig(canvas_window, width=canvas_width)
+
+        canvas_window = canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        canvas.bind("<Configure>", configure_canvas_window)
+        canvas.configure(yscrollcommand=scrollbar.set)
+
+        # Add mouse wheel scrolling
+        def _on_mousewheel(event):
+            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+        canvas.bind("<MouseWheel>", _on_mousewheel)
+
+        # Pack canvas and scrollbar properly
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        # Use scrollable_frame for content
+        content_frame = scrollable_frame
+        
+        # Title
+        title_label = ttk.Label(content_frame, text="MAA Redux Save Sync Installer",
+                               font=("Arial", 16, "bold"))
+        title_label.pack(pady=(0, 20))
+
+        # Description
+        desc_text = ("This installer will set up automatic save file synchronization "
+                    "between your devices using Dropbox. Your game progress will be "
+                    "automatically synced across Windows and Mac.")
+        desc_label = ttk.Label(content_frame, text=desc_text, wraplength=700, justify=CENTER)
+        desc_label.pack(pady=(0, 20))
+
+        # Progress bar (hidden initially)
+        self.progress_var = DoubleVar()
+        self.progress_bar = ttk.Progressbar(content_frame, variable=self.progress_var,
+                                          maximum=100, length=400)
+
+        # Status label
+        self.status_label = ttk.Label(content_frame, text="Ready to install",
+                                     font=("Arial", 10))
+        self.status_label.pack(pady=(0, 10))
+
+        # Configuration frame
+        config_frame = ttk.LabelFrame(content_frame, text="Configuration", padding=15)
+        config_frame.pack(fill=X, pady=(0, 10))
+
+        self.create_config_widgets(config_frame)
+
+        # Installation frame
+        install_frame = ttk.LabelFrame(content_frame, text="Installation", padding=15)
+        install_frame.pack(fill=X, pady=(0, 10))
+
+        self.create_install_widgets(install_frame)
+
+        # Buttons frame (keep outside scrollable area for always visible)
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(side=BOTTOM, fill=X, pady=(10, 10))
+
+        self.create_buttons(button_frame)
+    
+    def create_config_widgets(self, parent):
+        """Create configuration input widgets"""
+
+        # Dropbox OAuth Configuration
+        ttk.Label(parent, text="Dropbox OAuth Settings:", font=("Arial", 10, "bold")).grid(
+            row=0, column=0, sticky=W, pady=(0, 5))
+
+        # App Key
+        ttk.Label(parent, text="App Key:").grid(row=1, column=0, sticky=W, pady=(0, 2))
+        app_key_frame = ttk.Frame(parent)
+        app_key_frame.grid(row=2, column=0, columnspan=2, sticky=EW, pady=(0, 10))
+
+        app_key_entry = ttk.Entry(app_key_frame, textvariable=self.dropbox_app_key, width=40)
+        app_key_entry.pack(side=LEFT, fill=X, expand=True, padx=(0, 10))
+
+        # App Secret
+        ttk.Label(parent, text="App Secret (optional):").grid(row=3, column=0, sticky=W, pady=(0, 2))
+        app_secret_frame = ttk.Frame(parent)
+        app_secret_frame.grid(row=4, column=0, columnspan=2, sticky=EW, pady=(0, 10))
+
+        app_secret_entry = ttk.Entry(app_secret_frame, textvariable=self.dropbox_app_secret,
+                                   width=40, show="*")
+        app_secret_entry.pack(side=LEFT, fill=X, expand=True, padx=(0, 10))
+
+        # OAuth Authorization
+        oauth_frame = ttk.Frame(parent)
+        oauth_frame.grid(row=5, column=0, columnspan=2, sticky=EW, pady=(10, 15))
+
+        self.auth_status_label = ttk.Label(oauth_frame, text="Not Authorized",
+                                          font=("Arial", 9), foreground="red")
+        self.auth_status_label.pack(side=LEFT, padx=(0, 10))
+
+        ttk.Button(oauth_frame, text="Setup Dropbox App",
+                  command=self.open_dropbox_setup).pack(side=RIGHT, padx=(10, 0))
+
+        self.auth_button = ttk.Button(oauth_frame, text="Authorize with Dropbox",
+                                     command=self.authorize_dropbox)
+        self.auth_button.pack(side=RIGHT, padx=(5, 0))
+        
+        # Save File Location
+        ttk.Label(parent, text="Save File Location:", font=("Arial", 10, "bold")).grid(
+            row=6, column=0, sticky=W, pady=(15, 5))
+
+        file_frame = ttk.Frame(parent)
+        file_frame.grid(row=7, column=0, columnspan=2, sticky=EW, pady=(0, 15))
+
+        file_entry = ttk.Entry(file_frame, textvariable=self.save_file_path, width=40)
+        file_entry.pack(side=LEFT, fill=X, expand=True, padx=(0, 10))
+
+        ttk.Button(file_frame, text="Browse",
+                  command=self.browse_save_file).pack(side=RIGHT, padx=(10, 0))
+
+        ttk.Button(file_frame, text="Auto-Detect",
+                  command=self.detect_save_files).pack(side=RIGHT, padx=(5, 0))
+
+        # App Name
+        ttk.Label(parent, text="Application Name:", font=("Arial", 10, "bold")).grid(
+            row=8, column=0, sticky=W, pady=(0, 5))
+
+        ttk.Entry(parent, textvariable=self.app_name, width=30).grid(
+            row=9, column=0, sticky=W, pady=(0, 10))
+        
+        # Configure grid weights
+        parent.columnconfigure(0, weight=1)
+    
+    def create_install_widgets(self, parent):
+        """Create installation option widgets"""
+        
+        # Installation Location
+        ttk.Label(parent, text="Install Location:", font=("Arial", 10, "bold")).grid(
+            row=0, column=0, sticky=W, pady=(0, 5))
+        
+        location_frame = ttk.Frame(parent)
+        location_frame.grid(row=1, column=0, columnspan=2, sticky=EW, pady=(0, 15))
+        
+        location_entry = ttk.Entry(location_frame, textvariable=self.install_location,
+                                  width=40)
+        location_entry.pack(side=LEFT, fill=X, expand=True, padx=(0, 10))
+        
+        ttk.Button(location_frame, text="Browse", 
+                  command=self.browse_install_location).pack(side=RIGHT, padx=(10, 0))
+        
+        # Auto-start option
+        ttk.Checkbutton(parent, text="Start automatically with system", 
+                       variable=self.auto_start).grid(row=2, column=0, sticky=W)
+        
+        # Configure grid weights
+        parent.columnconfigure(0, weight=1)
+    
+    def create_buttons(self, parent):
+        """Create action buttons"""
+
+        # Configure parent padding to ensure visibility
+        parent.configure(relief='flat', borderwidth=2)
+
+        # Left side - Help
+        help_frame = ttk.Frame(parent)
+        help_frame.pack(side=LEFT, pady=10)
+
+        help_button = ttk.Button(help_frame, text="Help & Guide",
+                               command=self.show_help)
+        help_button.pack(side=LEFT, padx=(0, 10), ipadx=10, ipady=5)
+
+        # Right side - Actions
+        action_frame = ttk.Frame(parent)
+        action_frame.pack(side=RIGHT, pady=10)
+
+        test_button = ttk.Button(action_frame, text="Test Configuration",
+                               command=self.test_config)
+        test_button.pack(side=RIGHT, padx=(0, 10), ipadx=10, ipady=5)
+
+        self.install_button = ttk.Button(action_frame, text="Install & Setup",
+                                       command=self.start_installation)
+        self.install_button.pack(side=RIGHT, ipadx=10, ipady=5)
+    
+    def detect_save_files(self):
+        """Auto-detect MAA Redux save files"""
+        self.update_status("Detecting save files...")
+
+        save_files = self.core.find_save_files()
+
+        if save_files:
+            # Automatically use the first found file and open file browser for user to confirm/change
+            if len(save_files) == 1:
+                self.save_file_path.set(str(save_files[0]))
+                self.update_status(f"Auto-detected save file: {save_files[0].name}")
+            else:
+                # Use the first detected file but let user know they can browse for others
+                self.save_file_path.set(str(save_files[0]))
+                self.update_status(f"Found {len(save_files)} save files. Selected: {save_files[0].name}")
+                messagebox.showinfo("Multiple Files Found",
+                                   f"Found {len(save_files)} potential save files.\n"
+                                   f"Selected: {save_files[0].name}\n\n"
+                                   f"Use 'Browse' button if you need to select a different file.")
+        else:
+            self.update_status("No save files found. Please select manually.")
+            messagebox.showinfo("Auto-Detection",
+                               "No MAA Redux save files found automatically.\n"
+                               "Please use 'Browse' to select your save file manually.")
+    
+    def browse_save_file(self):
+        """Browse for save file"""
+        file_path = filedialog.askopenfilename(
+            title="Select MAA Redux Save File",
+            filetypes=[
+                ("Save files", "*.save"),
+                ("Data files", "*.dat"),
+                ("Saved games", "*.sav"),
+                ("JSON files", "*.json"),
+                ("All files", "*.*")
+            ]
+        )
+        if file_path:
+            self.save_file_path.set(file_path)
+    
+    def browse_install_location(self):
+        """Browse for installation directory"""
+        dir_path = filedialog.askdirectory(title="Select Installation Directory")
+        if dir_path:
+            self.install_location.set(dir_path)
+    
+    def open_dropbox_setup(self):
+        """Open Dropbox developer page and show instructions"""
+        webbrowser.open("https://www.dropbox.com/developers/apps")
+
+        instructions = """Dropbox OAuth App Setup Instructions:
+
+1. Click "Create app" on the opened page
+2. Choose "Scoped access"
+3. Choose "App folder" (recommended for security)
+4. Enter app name: "MAA-Redux-Sync"
+5. Click "Create app"
+
+6. Go to "Permissions" tab and enable:
+   ✓ files.metadata.read
+   ✓ files.metadata.write
+   ✓ files.content.read
+   ✓ files.content.write
+
+7. Click "Submit"
+
+8. Go to "Settings" tab:
+   - Copy "App key" and paste it in the installer
+   - Optionally copy "App secret" as well (PKCE works without it)
+
+9. ⚠️  IMPORTANT - Add Redirect URI:
+   In "OAuth 2" section, under "Redirect URIs":
+   - Add: http://localhost:8080/oauth/callback
+   - Add: http://127.0.0.1:8080/oauth/callback
+   - Click "Add" for BOTH URIs
+
+10. Make sure to click "Add" and save the redirect URIs!
+
+11. Click "Authorize with Dropbox" in the installer
+    to complete the OAuth flow
+
+Note: Both localhost and 127.0.0.1 URIs are needed for compatibility.
+If port 8080 is busy, the installer asks you to paste the code
+Dropbox shows instead.
+This method is more secure than access tokens as it uses
+refresh tokens that can be automatically renewed!"""
+
+        messagebox.showinfo("Dropbox OAuth Setup", instructions)
+
+    def authorize_dropbox(self):
+        """Start OAuth authorization flow"""
+        app_key = self.dropbox_app_key.get().strip()
+        app_secret = self.dropbox_app_secret.get().strip()
+
+        if not app_key:
+            messagebox.showerror("Missing App Key", "Please enter your Dropbox App Key first")
+            return
+
+        # Validate App Key format (Dropbox app keys are typically alphanumeric)
+        if len(app_key) < 10:
+            messagebox.showerror("Invalid App Key",
+                               "App Key seems too short. Please check that you copied the complete App Key from Dropbox.")
+            return
+
+        if app_secret and len(app_secret) < 10:
+            messagebox.showerror("Invalid App Secret",
+                               "App Secret seems too short. Please check that you copied the complete App Secret from Dropbox.")
+            return
+
+        try:
+            from dropbox_oauth import DropboxTokenManager
+
+            # Create token manager
+            config_path = "temp_oauth_config.json"
+            token_manager = DropboxTokenManager(
+                config_path,
+                app_key,
+                app_secret,
+                code_prompt=self._prompt_for_code
+            )
+            self.active_token_manager = token_manager
+            self.auth_cancel_requested = False
+
+            self.update_status("Starting OAuth authorization...")
+            self.auth_button.config(text="Cancel Authorization", command=self.cancel_authorization)
+
+            # Start authorization in thread to avoid blocking UI
+            auth_thread = threading.Thread(target=self._perform_oauth, args=(token_manager,))
+            auth_thread.daemon = True
+            auth_thread.start()
+
+        except ImportError:
+            messagebox.showerror("Error", "OAuth module not found. Please ensure dropbox_oauth.py is available.")
+        except Exception as e:
+            messagebox.showerror("Authorization Error", f"Failed to start authorization: {str(e)}")
+            self.auth_button.config(text="Authorize with Dropbox", command=self.authorize_dropbox)
+
+    def cancel_authorization(self):
+        """Abort the pending browser authorization so it can be retried right away"""
+        self.auth_cancel_requested = True
+        if self.active_token_manager:
+            self.active_token_manager.oauth.cancel()
+        self.update_status("Cancelling authorization...")
+
+    def _prompt_for_code(self, auth_url):
+        """Ask for a pasted authorization code (called from the OAuth thread)"""
+        result = {}
+        answered = threading.Event()
+
+        def ask():
+            try:
+                result['code'] = simpledialog.askstring(
+                    "Authorization Code",
+                    "The local callback port is busy, so Dropbox will show a code instead.\n\n"
+                    "Allow access in the browser window that opened, then paste the code here:",
+                    parent=self.root)
+            finally:
+                answered.set()
+
+        self.root.after(0, ask)
+        answered.wait()
+        return result.get('code')
+
+    def _perform_oauth(self, token_manager):
+        """Perform OAuth in background thread"""
+        try:
+            # Show instruction
+            self.root.after(0, lambda: messagebox.showinfo(
+                "Browser Authorization",
+                "Your browser will open for Dropbox authorization.\n\n"
+                "1. Log in to your Dropbox account\n"
+                "2. Click 'Allow' to authorize the app\n"
+                "3. The browser tab will close automatically\n"
+                "4. Return to this installer\n\n"
+                "This may take up to 5 minutes to complete."
+            ))
+
+            # Perform authorization
+            success = token_manager.authorize_new_user()
+
+            if success:
+                self.root.after(0, self._oauth_success)
+            else:
+                self.root.after(0, self._oauth_failed, "Authorization was cancelled or failed")
+
+        except Exception as e:
+            self.root.after(0, self._oauth_failed, str(e))
+
+    def _oauth_success(self):
+        """Handle successful OAuth"""
+        self.oauth_authorized.set(True)
+        self.active_token_manager = None
+        self.auth_status_label.config(text="✓ Authorized", foreground="green")
+        self.auth_button.config(text="Re-authorize", command=self.authorize_dropbox)
+        self.update_status("Dropbox authorization successful!")
+        messagebox.showinfo("Success", "Dropbox authorization completed successfully!\n\n"
+                                      "You can now proceed with installation.")
+
+    def _oauth_failed(self, error_msg):
+        """Handle failed OAuth"""
+        self.oauth_authorized.set(False)
+        self.active_token_manager = None
+        self.auth_status_label.config(text="❌ Failed", foreground="red")
+        self.auth_button.config(text="Authorize with Dropbox", command=self.authorize_dropbox)
+        self.update_status("Dropbox authorization failed")
+
+        # Check for specific error types
+        error_lower = error_msg.lower()
+
+        if self.auth_cancel_requested:
+            self.auth_status_label.config(text="Not Authorized", foreground="red")
+            self.update_status("Authorization cancelled - ready to retry")
+        elif "redirect_uri" in error_lower or "bad request" in error_lower or "invalid_request" in error_lower:
+            messagebox.showerror("App Configuration Error",
+                               f"❌ Configuration Error\n\n"
+                               f"There's an issue with your Dropbox app configuration.\n\n"
+                               f"🔧 Check These Settings:\n\n"
+                               f"1. App Key & Secret:\n"
+                               f"   • Make sure they're copied correctly (no extra spaces)\n"
+                               f"   • App Key should be 15+ characters\n"
+                               f"   • App Secret should be 15+ characters\n\n"
+                               f"2. Redirect URIs (in Dropbox app settings):\n"
+                               f"   • Go to Settings tab in your Dropbox app\n"
+                               f"   • Add these EXACT URIs:\n"
+                               f"     - http://localhost:8080/oauth/callback\n"
+                               f"     - http://127.0.0.1:8080/oauth/callback\n"
+                               f"   • Click 'Add' for each URI\n\n"
+                               f"3. App Type:\n"
+                               f"   • Make sure you selected 'Scoped access'\n"
+                               f"   • App folder or Full Dropbox access\n\n"
+                               f"Error: {error_msg}")
+        else:
+            messagebox.showerror("Authorization Failed",
+                               f"Dropbox authorization failed:\n\n{error_msg}\n\n"
+                               f"Please check:\n"
+                               f"• App Key and App Secret are correct\n"
+                               f"• Redirect URIs are configured:\n"
+                               f"  - http://localhost:8080/oauth/callback\n"
+                               f"  - http://127.0.0.1:8080/oauth/callback\n"
+                               f"• Internet connection is working\n"
+                               f"• No firewall blocking localhost:8080")
+    
+    def test_config(self):
+        """Test the current configuration"""
+        if not self.validate_config():
+            return
+
+        self.update_status("Testing configuration...")
+
+        try:
+            # Test OAuth tokens
+            from dropbox_oauth import DropboxTokenManager
+            import dropbox
+
+            config_path = "temp_oauth_config.json"
+            token_manager = DropboxTokenManager(
+                config_path,
+                self.dropbox_app_key.get().strip(),
+                self.dropbox_app_secret.get().strip()
+            )
+
+            # Get valid access token
+            access_token = token_manager.get_valid_access_token()
+            if not access_token:
+                raise Exception("No valid access token available. Please authorize first.")
+
+            # Test Dropbox connection
+            dbx = dropbox.Dropbox(access_token)
+            account = dbx.users_get_current_account()
+
+            # Test save file access
+            save_path = Path(self.save_file_path.get())
+            if not save_path.exists():
+                raise FileNotFoundError("Save file not found")
+
+            # Test file permissions
+            if not os.access(save_path, os.R_OK):
+                raise PermissionError("Cannot read save file")
+
+            self.update_status("Configuration test successful!")
+            messagebox.showinfo("Test Result",
+                               f"Configuration test successful!\n\n"
+                               f"Dropbox: Connected as {account.name.display_name}\n"
+                               f"Save file: Found ({save_path.name})\n"
+                               f"File size: {save_path.stat().st_size} bytes\n"
+                               f"OAuth: Using refresh tokens ✓")
+
+        except ImportError as e:
+            if "dropbox_oauth" in str(e):
+                messagebox.showerror("Test Failed",
+                                   "OAuth module not found. Please ensure dropbox_oauth.py is available.")
+            else:
+                messagebox.showwarning("Test Incomplete",
+                                     "Dropbox module not installed. "
+                                     "Installation will handle this automatically.")
+        except Exception as e:
+            messagebox.showerror("Test Failed", f"Configuration test failed:\n{str(e)}")
+            self.update_status("Configuration test failed")
+    
+    def validate_config(self):
+        """Validate configuration inputs"""
+        if not self.dropbox_app_key.get().strip():
+            messagebox.showerror("Validation Error", "Please enter your Dropbox App Key")
+            return False
+
+        if not self.oauth_authorized.get():
+            messagebox.showerror("Validation Error", "Please authorize with Dropbox first")
+            return False
+
+        try:
+            self.build_core().validate()
+        except ValueError as e:
+            messagebox.showerror("Validation Error", str(e))
+            return False
+
+        return True
+
+    def build_core(self):
+        """Installer core configured from the current form values"""
+        return InstallerCore(
+            app_key=self.dropbox_app_key.get().strip(),
+            app_secret=self.dropbox_app_secret.get().strip(),
+            save_file_path=self.save_file_path.get().strip(),
+            app_name=self.app_name.get().strip(),
+            install_location=self.install_location.get(),
+            auto_start=self.auto_start.get(),
+            progress=self.update_progress
+        )
+    
+    def start_installation(self):
+        """Start the installation process"""
+        if not self.validate_config():
+            return
+        
+        # Disable install button
+        self.install_button.config(state=DISABLED)
+        
+        # Show progress bar
+        self.progress_bar.pack(pady=10)
+        
+        # Start installation in thread (form values are read here, on the Tk thread)
+        install_thread = threading.Thread(target=self.install_process, args=(self.build_core(),))
+        install_thread.daemon = True
+        install_thread.start()
+    
+    def install_process(self, core):
+        """Main installation process"""
+        try:
+            install_dir = core.install()
+            
+            # Show success message
+            self.root.after(0, self.show_success_dialog, install_dir)
+            
+        except Exception as e:
+            self.root.after(0, self.show_error_dialog, str(e))
+    
+    def update_progress(self, value, status):
+        """Update progress bar and status"""
+        self.root.after(0, lambda: self.progress_var.set(value))
+        self.root.after(0, lambda: self.update_status(status))
+    
+    def update_status(self, status):
+        """Update status label"""
+        self.status_label.config(text=status)
+    
+    def show_success_dialog(self, install_dir):
+        """Show installation success dialog"""
+        
+        self.progress_bar.pack_forget()
+        self.install_button.config(state=NORMAL)
+        
+        helper_scripts = []
+        if self.system == "Windows":
+            helper_scripts = [
+                "start_sync.bat - Start sync manually",
+                "stop_sync.bat - Stop sync service",
+                "manual_import.bat - Import save from Dropbox",
+                "manual_upload.bat - Upload save to Dropbox"
+            ]
+        else:
+            helper_scripts = [
+                "start_sync.sh - Start sync manually",
+                "stop_sync.sh - Stop sync service", 
+                "manual_import.sh - Import save from Dropbox",
+                "manual_upload.sh - Upload save to Dropbox"
+            ]
+        
+        success_msg = f"""Installation completed successfully!
+
+Installation location: {install_dir}
+
+Your MAA Redux save sync is now active. The system will:
+• Automatically sync saves when you start/close the game
+• Create local backups for safety
+• Work across all your devices with the same Dropbox token
+
+Helper scripts created:
+{chr(10).join('• ' + script for script in helper_scripts)}
+
+Log files:
+• sync.log - Main sync activity log
+• sync_error.log - Error logs (macOS only)
+
+The sync service {"is running and " if self.auto_start.get() else ""}will start automatically on system boot."""
+
+        result = messagebox.showinfo("Installation Complete", success_msg)
+        
+        # Ask if user wants to start monitoring now
+        if messagebox.askyesno("Start Now?", 
+                              "Would you like to start the sync service now?\n"
+                              "(It will start automatically on next system boot)"):
+            self.start_sync_service(install_dir)
+    
+    def show_error_dialog(self, error_msg):
+        """Show installation error dialog"""
+        
+        self.progress_bar.pack_forget()
+        self.install_button.config(state=NORMAL)
+        
+        messagebox.showerror("Installation Failed", 
+                           f"Installation failed with error:\n\n{error_msg}\n\n"
+                           f"Please check that:\n"
+                           f"• Python is properly installed\n"
+                           f"• You have write permissions to the install directory\n"
+                           f"• Your internet connection is working\n"
+                           f"• Your Dropbox token is valid")
+    
+    def start_sync_service(self, install_dir):
+        """Start the sync service"""
+        
+        try:
+            self.core.start_sync_service(install_dir)
+            
+            messagebox.showinfo("Service Started", 
+                               "MAA Redux sync service is now running in the background!\n\n"
+                               "Check sync.log for activity logs.")
+        except Exception as e:
+            messagebox.showerror("Start Failed", f"Failed to start sync service:\n{str(e)}")
+    
+    def show_help(self):
+        """Show help information"""
+        
+        help_text = """MAA Redux Save Sync Help
+
+This tool automatically synchronizes your MAA Redux save files between devices using Dropbox.
+
+Setup Requirements:
+• Dropbox account (free tier is sufficient)
+• Python 3.8+ installed
+• MAA Redux game installed
+
+How it works:
+• When you start MAA Redux, it downloads the latest save from Dropbox
+• When you close MAA Redux, it uploads your save to Dropbox
+• This happens automatically on all your configured devices
+• Local backups are created before each sync operation
+
+File Locations:
+• Sync logs: Check sync.log in the installation directory
+• Backups: Created in backups/ subdirectory
+• Configuration: config.json in installation directory
+
+Manual Controls:
+Use the helper scripts in the installation directory:
+• Start/stop the sync service manually
+• Force import/upload operations
+• View logs and troubleshoot issues
+
+Troubleshooting:
+• Make sure MAA Redux is completely closed before starting on another device
+• Check sync.log file for any error messages
+• Verify your Dropbox token is correctly entered and hasn't expired
+• Ensure the save file path is correct and accessible
+• Try manual import/upload to test connectivity
+
+Best Practices:
+• Let the game fully close before switching devices
+• Keep backups of important save files
+• Don't modify save files while the game is running
+• Check logs periodically for any issues
+
+For more help, visit the project documentation or community forums."""
+        
+        help_window = Toplevel(self.root)
+        help_window.title("MAA Redux Save Sync - Help")
+        help_window.geometry("700x600")
+        help_window.transient(self.root)
+        
+        # Create scrollable text widget
+        text_frame = ttk.Frame(help_window)
+        text_frame.pack(fill=BOTH, expand=True, padx=20, pady=20)
+        
+        scrollbar = ttk.Scrollbar(text_frame)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        
+        text_widget = Text(text_frame, wrap=WORD, yscrollcommand=scrollbar.set,
+                          font=("Arial", 10), state=NORMAL)
+        text_widget.pack(side=LEFT, fill=BOTH, expand=True)
+        scrollbar.config(command=text_widget.yview)
+        
+        text_widget.insert(END, help_text)
+        text_widget.config(state=DISABLED)
+        
+        # Close button
+        ttk.Button(help_window, text="Close", 
+                  command=help_window.destroy).pack(pady=10)
+    
+    def run(self):
+        """Start the GUI application"""
+        # Center window on screen
+        self.root.update_idletasks()
+        width = 850
+        height = 700
+        x = (self.root.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.root.winfo_screenheight() // 2) - (height // 2)
+        self.root.geometry(f"{width}x{height}+{x}+{y}")
+        
+        # Handle window closing
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # Start the main loop
+        self.root.mainloop()
+    
+    def on_closing(self):
+        """Handle application closing"""
+        if messagebox.askokcancel("Quit", "Do you want to quit the installer?"):
+            self.root.quit()
+            self.root.destroy()
+
+def main():
+    """Start the GUI installer"""
+    try:
+        # Check Python version
+        if sys.version_info < (3, 8):
+            messagebox.showerror("Python Version Error", 
+                               "Python 3.8 or higher is required.\n"
+                               f"Current version: {sys.version}")
+            sys.exit(1)
+        
+        # Create and run installer
+        installer = MAAReduxSyncInstaller()
+        installer.run()
+        
+    except tk.TclError as e:
+        # No display (e.g. over SSH); a message box can't be shown either
+        print(f"Cannot start the GUI ({e}); use --headless --config answers.json instead", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        messagebox.showerror("Fatal Error", f"Failed to start installer:\n{str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Single-instance guard for the sync service
+"""
+
+import os
+import signal
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+import logging
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Windows locks byte ranges, and a locked range cannot be read by other
+# processes. Lock a byte far past the pid so --stop can still read it.
+WINDOWS_LOCK_OFFSET = 1 << 20
+
+
+def _lock(f, wait: bool = False):
+    """Take the exclusive lock; raises OSError if it is held, unless wait is set"""
+    if FCNTL_AVAILABLE:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+        return
+    while True:
+        f.seek(WINDOWS_LOCK_OFFSET)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            if not wait:
+                raise
+            time.sleep(0.05)
+
+
+def _unlock(f):
+    if FCNTL_AVAILABLE:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(WINDOWS_LOCK_OFFSET)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class InstanceLock:
+    """Exclusive lock on a pidfile, held for the life of the service
+
+    The OS drops the lock when the process dies, so a stale pidfile left by
+    a crash never blocks the next start.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Take the lock and record our pid; False if another instance holds it"""
+        # Append mode so a failed attempt does not wipe the running instance's pid
+        f = open(self.path, 'a+', encoding='utf-8')
+        try:
+            _lock(f)
+        except OSError:
+            f.close()
+            return False
+
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        """Clear the pid and drop the lock"""
+        if self._file is None:
+            return
+        try:
+            self._file.seek(0)
+            self._file.truncate()
+            _unlock(self._file)
+        except OSError as e:
+            logger.warning(f"Failed to release instance lock: {e}")
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise RuntimeError(f"Another instance holds {self.path}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on path (created if missing) for the block, waiting for it
+
+    For short critical sections shared between processes, such as a
+    read-modify-write of a JSON file.
+    """
+    with open(path, 'a+', encoding='utf-8') as f:
+        _lock(f, wait=True)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+def read_pid(path) -> Optional[int]:
+    """Pid recorded in a pidfile, if any"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def is_running(path) -> bool:
+    """True if some process currently holds the lock on path"""
+    if not Path(path).exists():
+        return False
+    probe = InstanceLock(path)
+    if probe.acquire():
+        probe.release()
+        return False
+    return True
+
+
+def stop_instance(path, timeout: float = 15.0) -> bool:
+    """Ask the instance holding the pidfile to exit and wait until it has"""
+    pid = read_pid(path)
+    if pid is None or not is_running(path):
+        logger.info("Sync service is not running")
+        return True
+
+    logger.info(f"Stopping sync service (pid {pid})...")
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError as e:
+        logger.error(f"Failed to signal pid {pid}: {e}")
+        return False
+
+    give_up_at = time.monotonic() + timeout
+    while time.monotonic() < give_up_at:
+        if not is_running(path):
+            logger.info("Sync service stopped")
+            return True
+        time.sleep(0.2)
+
+    logger.error(f"Sync service (pid {pid}) did not exit within {timeout:.0f}s")
+    return False
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+LAN fast path: fetch the save from a machine on the same network instead of Dropbox
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Callable, ContextManager, Dict, Iterable, Optional, Set, Tuple
+import logging
+
+from save_history import content_hash, content_hash_stream
+
+logger = logging.getLogger(__name__)
+
+LAN_PORT = 47810
+PROTOCOL = 'maa-sync-lan/1'
+
+# How long an import waits for a peer to offer the save before using Dropbox
+DISCOVERY_TIMEOUT = 0.3  # seconds
+# Socket timeout for a peer transfer; a stalled peer falls back to Dropbox
+TRANSFER_TIMEOUT = 10.0  # seconds
+
+MAX_MESSAGE = 4096
+IO_CHUNK = 1024 * 1024
+
+
+class _CountingReader:
+    """Wraps a stream, counting the bytes read through it"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.count += len(data)
+        return data
+
+
+def _mac(secret: bytes, message: Dict) -> str:
+    fields = {key: value for key, value in message.items() if key != 'mac'}
+    return hmac.new(secret, json.dumps(fields, sort_keys=True).encode(), hashlib.sha256).hexdigest()
+
+
+def _sign(secret: bytes, message: Dict) -> bytes:
+    message = dict(message, protocol=PROTOCOL, time=time.time())
+    message['mac'] = _mac(secret, message)
+    return json.dumps(message).encode()
+
+
+def _verify(secret: bytes, data: bytes, max_age: float = 60.0) -> Optional[Dict]:
+    """The message in data if it is ours, recent and correctly signed, otherwise None"""
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or message.get('protocol') != PROTOCOL:
+        return None
+    if not hmac.compare_digest(str(message.get('mac', '')), _mac(secret, message)):
+        return None
+    if abs(time.time() - float(message.get('time', 0))) > max_age:
+        return None
+    return message
+
+
+class LanPeer:
+    """Serves this machine's saves to LAN peers and fetches theirs
+
+    A save is only ever fetched by content hash: the importer first asks
+    Dropbox (the source of truth) for the current hash and then asks the
+    LAN, by UDP broadcast and to any configured peer addresses, who has a
+    save with exactly that content. The first peer to answer streams it
+    over TCP, and the download is checked against the hash before it is
+    used. No answer, a timeout or a mismatch all fall back to Dropbox.
+
+    Messages are authenticated with HMAC-SHA256 keyed by lan_secret, so
+    only machines configured with the same secret get answers. Saves are
+    sent exactly as the remote storage holds them: with opener set (client-
+    side encryption) that is the encrypted form, otherwise the plain file.
+
+    Queries are answered only from hashes already cached: hashing (and
+    encrypting or compressing) a save takes longer than a querier waits.
+    A query for a save not hashed since it last changed starts hashing it
+    in the background; prepare() does so ahead of time.
+    """
+
+    def __init__(self, secret: str, port: int = LAN_PORT, peers: Iterable[str] = (),
+                 resolve: Optional[Callable[[str], Optional[Path]]] = None,
+                 opener: Optional[Callable[[Path], ContextManager[BinaryIO]]] = None):
+        self.secret = secret.encode()
+        self.port = port
+        self.peers = list(peers)
+        # remote path -> local save that holds its content, for serving
+        self.resolve = resolve
+        # local save -> stream of its stored form; None serves the file as is
+        self.opener = opener
+        self.instance_id = uuid.uuid4().hex
+        # save -> ((size, mtime_ns), stored content hash, stored size)
+        self._hashes: Dict[Path, Tuple[Tuple[int, int], str, int]] = {}
+        # saves being hashed by a LanHash thread
+        self._hashing: Set[Path] = set()
+        self._hash_lock = threading.Lock()
+        self._udp = None
+        self._tcp = None
+
+    # Serving
+
+    def start(self):
+        """Answer discovery queries and serve transfers in background threads"""
+        if self._udp:
+            return
+        peer = self
+
+        class TransferHandler(socketserver.StreamRequestHandler):
+            timeout = TRANSFER_TIMEOUT
+
+            def handle(self):
+                peer._serve_transfer(self.rfile, self.connection)
+
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            # Several services on one host (or a restart) can share the port
+            udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, 'SO_REUSEPORT'):
+                udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            udp.bind(('', self.port))
+            self._tcp = socketserver.ThreadingTCPServer(('', 0), TransferHandler)
+        except OSError:
+            udp.close()
+            raise
+        self._tcp.daemon_threads = True
+        self._udp = udp
+
+        threading.Thread(target=self._tcp.serve_forever, name="LanTransfer", daemon=True).start()
+        threading.Thread(target=self._answer_queries, name="LanDiscovery", daemon=True).start()
+        logger.info(f"LAN sync listening on UDP {self.port}, serving on TCP {self._tcp.server_address[1]}")
+
+    def stop(self):
+        if self._tcp:
+            self._tcp.shutdown()
+            self._tcp.server_close()
+            self._tcp = None
+        if self._udp:
+            self._udp.close()
+            self._udp = None
+
+    def _answer_queries(self):
+        sock = self._udp
+        while True:
+            try:
+                data, address = sock.recvfrom(MAX_MESSAGE)
+            except OSError:
+                return  # closed by stop()
+            query = _verify(self.secret, data)
+            if not query or query.get('type') != 'query' or query.get('from') == self.instance_id:
+                continue
+            if self._local_copy(query.get('path', ''), query.get('hash', ''), wait=False) is None:
+                continue
+            offer = _sign(self.secret, {'type': 'offer', 'nonce': query.get('nonce'),
+                                        'hash': query['hash'], 'port': self._tcp.server_address[1]})
+            try:
+                sock.sendto(offer, address)
+            except OSError as e:
+                logger.debug(f"Could not answer LAN query from {address[0]}: {e}")
+
+    def _serve_transfer(self, rfile, connection):
+        request = _verify(self.secret, rfile.readline(MAX_MESSAGE))
+        if not request or request.get('type') != 'get':
+            return
+        copy = self._local_copy(request.get('path', ''), request.get('hash', ''))
+        if copy is None:
+            connection.sendall(json.dumps({'error': 'not_available'}).encode() + b'\n')
+            return
+        path, size = copy
+        if self.opener is None:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                connection.sendall(json.dumps({'size': size}).encode() + b'\n')
+                connection.sendfile(f)
+        else:
+            with self.opener(path) as f:
+                connection.sendall(json.dumps({'size': size}).encode() + b'\n')
+                while True:
+                    data = f.read(IO_CHUNK)
+                    if not data:
+                        break
+                    connection.sendall(data)
+        logger.info(f"Sent {path.name} ({size:,} bytes) to LAN peer {connection.getpeername()[0]}")
+
+    def prepare(self, path: Path):
+        """Hash a save's stored form in the background, so queries for it are answered at once"""
+        if self._udp is None or self._cached(path) is not None:
+            return
+        with self._hash_lock:
+            if path in self._hashing:
+                return
+            self._hashing.add(path)
+        threading.Thread(target=self._prepare, args=(path,), name="LanHash", daemon=True).start()
+
+    def _prepare(self, path: Path):
+        try:
+            self._refresh(path)
+        except OSError as e:
+            logger.debug(f"Could not hash {path} for LAN peers: {e}")
+        finally:
+            with self._hash_lock:
+                self._hashing.discard(path)
+
+    def _local_copy(self, remote_path: str, wanted_hash: str,
+                    wait: bool = True) -> Optional[Tuple[Path, int]]:
+        """(our save for remote_path, size as sent) if its stored content hash is wanted_hash
+
+        Without wait a save whose hash is not cached is not offered; it is
+        hashed in the background for the next query instead.
+        """
+        path = self.resolve(remote_path) if self.resolve else None
+        if path is None or not wanted_hash:
+            return None
+        stored = self._cached(path)
+        if stored is None:
+            if not wait:
+                self.prepare(path)
+                return None
+            stored = self._refresh(path)
+            if stored is None:
+                return None
+        return (path, stored[1]) if stored[0] == wanted_hash else None
+
+    @staticmethod
+    def _signature(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _cached(self, path: Path) -> Optional[Tuple[str, int]]:
+        """Cached (stored hash, stored size) of the save, if it has not changed since"""
+        signature = self._signature(path)
+        with self._hash_lock:
+            cached = self._hashes.get(path)
+        if signature is None or not cached or cached[0] != signature:
+            return None
+        return cached[1:]
+
+    def _refresh(self, path: Path) -> Optional[Tuple[str, int]]:
+        """Hash the save's stored form now and cache it; None if it is gone"""
+        # Taken before hashing: a write meanwhile leaves the entry stale, not wrong
+        signature = self._signature(path)
+        if signature is None:
+            return None
+        stored = self._stored_hash(path)
+        with self._hash_lock:
+            self._hashes[path] = (signature,) + stored
+        return stored
+
+    def _stored_hash(self, path: Path) -> Tuple[str, int]:
+        """(content hash, size) of the save as the remote storage holds it"""
+        if self.opener is None:
+            return content_hash(path), path.stat().st_size
+        with self.opener(path) as f:
+            counted = _CountingReader(f)
+            return content_hash_stream(counted), counted.count
+
+    # Fetching
+
+    def find_peer(self, remote_path: str, wanted_hash: str,
+                  timeout: float = DISCOVERY_TIMEOUT) -> Optional[Tuple[str, int]]:
+        """(host, tcp port) of the first peer offering remote_path with wanted_hash"""
+        nonce = uuid.uuid4().hex
+        query = _sign(self.secret, {'type': 'query', 'from': self.instance_id, 'nonce': nonce,
+                                    'path': remote_path.lower(), 'hash': wanted_hash})
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            for host in ['<broadcast>'] + self.peers:
+                try:
+                    sock.sendto(query, (host, self.port))
+                except OSError as e:
+                    logger.debug(f"LAN query to {host} failed: {e}")
+
+            give_up_at = time.monotonic() + timeout
+            while True:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    return None
+                sock.settimeout(remaining)
+                try:
+                    data, address = sock.recvfrom(MAX_MESSAGE)
+                except (socket.timeout, OSError):
+                    return None
+                offer = _verify(self.secret, data)
+                if offer and offer.get('type') == 'offer' and offer.get('nonce') == nonce:
+                    return address[0], int(offer['port'])
+
+    def fetch(self, remote_path: str, wanted_hash: str, dest: Path,
+              discovery_timeout: float = DISCOVERY_TIMEOUT) -> bool:
+        """Download the save with content hash wanted_hash from a LAN peer into dest
+
+        Returns False (leaving dest absent) when no peer has it or the
+        transfer fails; the caller then downloads from Dropbox.
+        """
+        peer = self.find_peer(remote_path, wanted_hash, discovery_timeout)
+        if peer is None:
+            return False
+
+        dest = Path(dest)
+        try:
+            with socket.create_connection(peer, timeout=TRANSFER_TIMEOUT) as sock:
+                sock.sendall(_sign(self.secret, {'type': 'get', 'path': remote_path.lower(),
+                                                 'hash': wanted_hash}) + b'\n')
+                with sock.makefile('rb') as stream:
+                    header = json.loads(stream.readline(MAX_MESSAGE) or b'{}')
+                    if 'size' not in header:
+                        logger.info(f"LAN peer {peer[0]} no longer has the save: {header.get('error')}")
+                        return False
+                    remaining = header['size']
+                    with open(dest, 'wb') as f:
+                        while remaining:
+                            data = stream.read(min(IO_CHUNK, remaining))
+                            if not data:
+                                raise OSError("connection closed mid-transfer")
+                            f.write(data)
+                            remaining -= len(data)
+
+            if content_hash(dest) != wanted_hash:
+                logger.warning(f"Save from LAN peer {peer[0]} does not match its content hash")
+                dest.unlink()
+                return False
+            logger.info(f"Fetched save from LAN peer {peer[0]}")
+            return True
+
+        except (OSError, ValueError) as e:
+            logger.info(f"LAN transfer from {peer[0]} failed: {e}")
+            if dest.exists():
+                dest.unlink()
+            return False
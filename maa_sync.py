@@ -0,0 +1,1234 @@
+#!/usr/bin/env python3
+"""
+MAA Redux Save Sync - Background sync service
+Imports the save before the game starts and uploads it after the game exits.
+Installed next to its support modules and run from the install directory.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import signal
+import argparse
+import threading
+import subprocess
+import urllib.request
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from pathlib import Path
+import gzip
+import queue
+import atexit
+import logging
+import logging.handlers
+
+from sync_config import SyncConfig, ConfigError, SERVICE_REQUIRED
+from instance_lock import InstanceLock, read_pid, stop_instance
+from poll_scheduler import PollScheduler
+from process_matcher import ProcessMatcher, ProcessScanner
+from transfer_scheduler import PathLocks, TransferScheduler, URGENT, BACKGROUND
+from bandwidth_limiter import BandwidthLimiter
+from storage_backends import DropboxBackend, LocalDirectoryBackend, NotFound, Unsupported
+from lan_sync import LanPeer
+from save_settle import wait_until_settled
+from save_history import (BackupIndex, ContentHasher, RevisionCache, SyncState, content_hash,
+                          content_hash_stream, format_history, revision_entry, select_version)
+from save_crypto import CRYPTO_AVAILABLE, SaveCipher, generate_key, is_encrypted
+from save_compression import CompressingReader, decompress, is_compressed, worth_compressing
+from retry_policy import RetryPolicy
+from upload_queue import UploadJournal, UploadQueueWorker
+from sync_metrics import MetricsRecorder, metrics_files, load_records, summarize, format_summary
+from status_server import StatusServer
+
+try:
+    import dropbox
+    DROPBOX_AVAILABLE = True
+except ImportError:
+    DROPBOX_AVAILABLE = False
+    print("Warning: Dropbox module not available")
+
+try:
+    from dropbox_oauth import DropboxTokenManager
+    OAUTH_AVAILABLE = True
+except ImportError:
+    OAUTH_AVAILABLE = False
+    print("Warning: OAuth module not available")
+
+# Logging setup
+LOG_FILE = 'sync.log'
+LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(threadName)s %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+def compress_rotated_log(source, dest):
+    """Rotator for the log handler: gzip the rotated file"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def setup_logging():
+    """Log through a queue: a background listener writes (and rotates) sync.log, plus the console in a terminal"""
+    formatter = logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8', delay=True
+    )
+    file_handler.namer = lambda name: name + '.gz'
+    file_handler.rotator = compress_rotated_log
+    file_handler.setFormatter(formatter)
+    handlers = [file_handler]
+
+    if sys.stderr is not None and sys.stderr.isatty():
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # QueueHandler.prepare still formats on the caller's thread: it merges the message
+    # with its args (and any traceback), as those may change once queued. The plain
+    # '%(message)s' keeps that cheap; timestamps, levels and writes are the listener's.
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+
+logger = logging.getLogger(__name__)
+
+# Touched by --launch so a running monitor does not import again mid-game
+# (one per profile: .launch_import_<profile>)
+LAUNCH_MARKER = '.launch_import'
+LAUNCH_MARKER_TTL = 120  # seconds
+
+METRICS_FILE = 'metrics.jsonl'
+
+CONFIG_FILE = 'config.json'
+
+# Held by the running sync service so only one instance monitors at a time
+PID_FILE = 'maa_sync.pid'
+
+# Monitor restarts after a crash back off from 5 s to 5 min; a run that
+# lasted 10 min counts as healthy and resets the backoff
+RESTART_BASE_DELAY = 5
+RESTART_MAX_DELAY = 300
+RESTART_RESET_AFTER = 600
+
+# Remote revision lists for --history/--restore are cached here
+HISTORY_CACHE_FILE = 'history_cache.json'
+HISTORY_LIMIT = 100  # most revisions Dropbox returns in one call
+
+# Remote revision and plaintext hash each save was last synced with
+SYNC_STATE_FILE = 'sync_state.json'
+
+# Downloads are read in pieces this big when decoded; the first piece
+# identifies encrypted and compressed saves
+IO_CHUNK = 1024 * 1024
+DECODE_HEAD = 16
+
+class DropboxConnection:
+    """The Dropbox client and token manager, shared by every profile of the service"""
+
+    def __init__(self):
+        self.dbx = None
+        self.token_manager = None
+
+class MAAReduxSync:
+    def __init__(self, profile=None, shared=None, connect=True):
+        """Sync one profile of config.json; shared reuses another profile's config, connection and queue"""
+        self.started_at = time.time()
+        self.last_upload_time = 0
+        self.last_import_time = 0
+        self.app_running = False
+        self.app_pids = set()
+        self.matcher = None
+
+        # Serializes swapping a downloaded save into place with launch cancellation
+        self.swap_lock = threading.Lock()
+
+        if shared is not None:
+            self.config = shared.config
+            self.metrics = shared.metrics
+            self.retry_policy = shared.retry_policy
+            self.poll = shared.poll
+            self.scanner = shared.scanner
+            self.limiter = shared.limiter
+            self.connection = shared.connection
+            self.storage = shared.storage
+            self.cipher = shared.cipher
+            self.compression = shared.compression
+            self.lan = shared.lan
+            self.revision_cache = shared.revision_cache
+            self.sync_state = shared.sync_state
+            self.transfer_locks = shared.transfer_locks
+            self.upload_queue = shared.upload_queue
+            self.upload_worker = shared.upload_worker
+            self.profile_name = profile
+            self.apply_config()
+            return
+
+        self.load_config(profile)
+        self.connection = DropboxConnection()
+        self.storage = self.create_storage(connect)
+        self.storage.limiter = self.limiter
+        self.cipher = self.create_cipher()
+        self.compression = self.config['compression']
+        self.lan = self.create_lan_peer()
+        self.revision_cache = RevisionCache(Path(HISTORY_CACHE_FILE))
+        self.sync_state = SyncState(Path(SYNC_STATE_FILE))
+
+        # Uploads that failed (e.g. while offline) are journaled and replayed
+        self.transfer_locks = PathLocks()
+        self.upload_worker = None
+        self.upload_queue = UploadJournal(Path('upload_queue.json'), Path('upload_spool'))
+        if len(self.upload_queue):
+            logger.info(f"{len(self.upload_queue)} queued upload(s) waiting for replay")
+
+    @property
+    def transfer_lock(self):
+        """Held while transferring this profile's save; other profiles' saves go in parallel"""
+        return self.transfer_locks(self.remote_path)
+
+    @property
+    def dbx(self):
+        return self.connection.dbx
+
+    @dbx.setter
+    def dbx(self, client):
+        self.connection.dbx = client
+
+    @property
+    def token_manager(self):
+        return self.connection.token_manager
+
+    @token_manager.setter
+    def token_manager(self, manager):
+        self.connection.token_manager = manager
+
+    def load_config(self, profile=None):
+        """Load and validate config.json, exiting if it is invalid or has no such profile"""
+        try:
+            self.config = SyncConfig(CONFIG_FILE, required=SERVICE_REQUIRED)
+        except ConfigError as e:
+            logger.error(f"Failed to load config: {e}")
+            sys.exit(1)
+
+        names = [settings['name'] for settings in self.config.profiles()]
+        if profile is not None and self.config.profile(profile) is None:
+            logger.error(f"No profile named {profile!r} in config.json (profiles: {', '.join(names)})")
+            sys.exit(1)
+        self.profile_name = profile if profile is not None else names[0]
+
+        # Timing/metrics instrumentation
+        self.metrics = MetricsRecorder(METRICS_FILE)
+        self.retry_policy = RetryPolicy(on_retry=self.metrics.note_retry)
+        self.poll = PollScheduler()
+        self.scanner = ProcessScanner()
+        self.limiter = BandwidthLimiter()
+        self.apply_config()
+
+        logger.info(f"Configuration loaded: {self.app_name}")
+        logger.info(f"OAuth available: {OAUTH_AVAILABLE}")
+
+    def apply_config(self):
+        """Copy settings from the validated config; also run after a hot reload (startup-only keys excepted)"""
+        config = self.config
+        settings = config.profile(self.profile_name)
+        if settings is None:
+            logger.warning(f"Profile {self.profile_name!r} was removed from config.json - "
+                           f"still syncing it until the service restarts")
+            settings = self.profile_settings
+        self.profile_name = settings['name']
+        self.profile_settings = settings
+
+        self.app_name = settings['app_name']
+        if self.matcher is None or (self.matcher.pattern, self.matcher.mode) != (self.app_name, settings['app_match']):
+            self.matcher = ProcessMatcher(self.app_name, settings['app_match'])
+        self.save_file_path = Path(settings['save_file_path'])
+        self.dropbox_folder = settings['dropbox_folder']
+        self.sync_filename = settings['sync_filename']
+        self.remote_path = f"{self.dropbox_folder}/{self.sync_filename}"
+        self.launch_marker = Path(f"{LAUNCH_MARKER}_{self.profile_name}")
+
+        # OAuth credentials
+        self.app_key = config['dropbox_app_key']
+        self.app_secret = config['dropbox_app_secret']
+
+        # Optional OAuth endpoint overrides (e.g. a local token server for testing)
+        self.oauth_options = {}
+        if config['dropbox_token_url']:
+            self.oauth_options['token_url'] = config['dropbox_token_url']
+
+        # Legacy support for old access token method
+        self.legacy_token = config['dropbox_token']
+
+        # Retry settings (deadlines are per operation, in seconds)
+        self.retry_max_attempts = config['retry_max_attempts']
+        self.retry_max_delay = config['retry_max_delay']
+        self.import_deadline = config['import_deadline']
+        self.upload_deadline = config['upload_deadline']
+        self.launch_budget = config['launch_budget']
+
+        # How long the save must stay unchanged before it is uploaded, and the longest wait
+        self.upload_settle_time = config['upload_settle_time']
+        self.upload_settle_timeout = config['upload_settle_timeout']
+
+        # Process polling (seconds between checks, and the idle ceiling for full scans)
+        self.poll.configure(config['poll_interval'], config['poll_max_interval'])
+
+        # Bandwidth caps in KB/s (0 = unlimited), applied to transfers in progress too
+        self.limiter.configure(config['upload_rate_limit'] * 1024, config['download_rate_limit'] * 1024)
+
+        # Optional localhost status endpoint (0 = disabled)
+        self.status_port = config['status_port']
+        # Updated in place: the upload worker holds the same policy
+        self.retry_policy.max_attempts = max(1, self.retry_max_attempts)
+        self.retry_policy.max_delay = self.retry_max_delay
+
+    def create_storage(self, connect=True):
+        """Backend for remote saves; connects to Dropbox when that is the backend and connect is set"""
+        if self.config['storage'] == 'local':
+            storage = LocalDirectoryBackend(self.config['storage_path'])
+            logger.info(f"Storing saves in {storage.root}")
+            if not storage.available:
+                logger.warning(f"Storage directory {storage.root} is not available")
+            return storage
+        if connect:
+            self.init_dropbox()
+        return DropboxBackend(self)
+
+    def create_cipher(self):
+        """Client-side encryption, if enabled in config.json; the key is generated on first use"""
+        if not self.config['encryption']:
+            return None
+        if not CRYPTO_AVAILABLE:
+            logger.error("encryption is on but the cryptography package is not installed "
+                         "(pip install cryptography)")
+            sys.exit(1)
+        key = self.config['encryption_key']
+        if not key:
+            key = generate_key()
+            self.config.update({'encryption_key': key})
+            logger.warning("Generated encryption_key in config.json - copy it to every machine "
+                           "syncing these saves, they cannot read them without it")
+        return SaveCipher(key)
+
+    def create_lan_peer(self):
+        """LAN fast path for imports, if enabled in config.json"""
+        if not self.config['lan_sync']:
+            return None
+        return LanPeer(self.config['lan_secret'], self.config['lan_port'], self.config['lan_peers'],
+                       opener=self.stored_stream if self.cipher or self.compression else None)
+
+    @contextmanager
+    def open_stored(self, local_path):
+        """Open a local save as the remote storage holds it (compressed, encrypted): yields (stream, plain_hash)"""
+        with ExitStack() as stack:
+            f = stack.enter_context(open(local_path, 'rb'))
+            plain_hash = None
+            if self.cipher is not None:
+                # Hash and encrypt one snapshot: a write meanwhile must not land under the old key
+                f, plain_hash = self._spool(f, stack, Path(local_path).parent)
+            stream = f
+            if self.compression:
+                size = os.fstat(f.fileno()).st_size
+                if worth_compressing(f, size):
+                    stream = CompressingReader(f, size)
+            if self.cipher is not None:
+                # The file id comes from exactly the bytes encrypted, compressed or not
+                data_hash = plain_hash
+                if stream is not f:
+                    stream, data_hash = self._spool(stream, stack, Path(local_path).parent)
+                stream = self.cipher.encrypt_stream(stream, data_hash)
+            yield stream, plain_hash
+
+    @staticmethod
+    def _spool(source, stack, directory):
+        """Copy source to an anonymous temporary file: returns (file at offset 0, content hash)"""
+        spool = stack.enter_context(tempfile.TemporaryFile(dir=directory))
+        hasher = ContentHasher()
+        for chunk in iter(lambda: source.read(IO_CHUNK), b''):
+            spool.write(chunk)
+            hasher.update(chunk)
+        spool.seek(0)
+        return spool, hasher.hexdigest()
+
+    @contextmanager
+    def stored_stream(self, local_path):
+        """open_stored without the hash, as the LAN peer's opener"""
+        with self.open_stored(local_path) as (stream, _):
+            yield stream
+
+    def stored_hash(self, local_path):
+        """Content hash the remote storage would report for local_path"""
+        with self.stored_stream(local_path) as f:
+            return content_hash_stream(f)
+
+    def decode_download(self, fetched_path, dest_path):
+        """Decode a downloaded save into dest_path; returns its plain hash, or None if it was stored plain"""
+        with open(fetched_path, 'rb') as src:
+            head = src.read(DECODE_HEAD)
+            src.seek(0)
+            if not is_encrypted(head) and not is_compressed(head):
+                plain = None
+            elif is_encrypted(head) and self.cipher is None:
+                raise RuntimeError("remote save is encrypted - set encryption and encryption_key in config.json")
+            else:
+                chunks = self.cipher.decrypt(src) if is_encrypted(head) else iter(lambda: src.read(IO_CHUNK), b'')
+                hasher = ContentHasher()
+                with open(dest_path, 'wb') as dest:
+                    for chunk in decompress(chunks):
+                        dest.write(chunk)
+                        hasher.update(chunk)
+                plain = hasher.hexdigest()
+
+        if plain is None:
+            os.replace(fetched_path, dest_path)
+        else:
+            fetched_path.unlink()
+        return plain
+
+    def local_save_current(self, remote):
+        """Whether the local save already holds the content of remote (a RemoteFile), by plaintext hash"""
+        if not self.save_file_path.exists():
+            return False
+        synced = self.sync_state.get(self.remote_path)
+        if synced and synced['rev'] == remote.rev:
+            return content_hash(self.save_file_path) == synced['plain_hash']
+        if self.cipher is None and remote.content_hash and remote.size == self.save_file_path.stat().st_size:
+            return content_hash(self.save_file_path) == remote.content_hash
+        return False
+
+    def init_dropbox(self):
+        """Initialize Dropbox connection with OAuth support"""
+        if not DROPBOX_AVAILABLE:
+            logger.error("Dropbox module not available")
+            self.dbx = None
+            self.token_manager = None
+            return
+
+        # Try OAuth first (preferred method); the secret is optional with PKCE
+        if OAUTH_AVAILABLE and self.app_key:
+            try:
+                self.token_manager = DropboxTokenManager(
+                    CONFIG_FILE,
+                    self.app_key,
+                    self.app_secret,
+                    config=self.config,
+                    **self.oauth_options
+                )
+
+                access_token = self.token_manager.get_valid_access_token()
+                if access_token:
+                    self.dbx = self.create_client(access_token)
+                    account = self.dropbox_call('users_get_current_account')
+                    logger.info(f"Connected to Dropbox via OAuth as: {account.name.display_name}")
+                    return
+                else:
+                    logger.warning("No valid OAuth access token available")
+
+            except Exception as e:
+                logger.error(f"OAuth connection failed: {e}")
+
+        # Fallback to legacy token method
+        if self.legacy_token:
+            try:
+                self.dbx = self.create_client(self.legacy_token)
+                account = self.dropbox_call('users_get_current_account')
+                logger.info(f"Connected to Dropbox via legacy token as: {account.name.display_name}")
+                logger.warning("Using legacy access token - consider upgrading to OAuth")
+                self.token_manager = None
+                return
+            except Exception as e:
+                logger.error(f"Legacy token connection failed: {e}")
+
+        # No valid connection method
+        logger.error("No valid Dropbox credentials available")
+        self.dbx = None
+        self.token_manager = None
+
+    def create_client(self, access_token):
+        """Create a Dropbox client without SDK retries: the shared policy is the only retry layer"""
+        return dropbox.Dropbox(access_token, max_retries_on_error=0, max_retries_on_rate_limit=0)
+
+    def refresh_dropbox_connection(self):
+        """Refresh Dropbox connection if using OAuth"""
+        if self.token_manager:
+            with self.metrics.track('token_refresh') as record:
+                try:
+                    access_token = self.token_manager.get_valid_access_token()
+                    if access_token:
+                        self.dbx = self.create_client(access_token)
+                        logger.info("Dropbox connection refreshed")
+                        return True
+                    else:
+                        logger.error("Failed to get valid access token")
+                        record['outcome'] = 'failed'
+                        return False
+                except Exception as e:
+                    logger.error(f"Failed to refresh connection: {e}")
+                    record['outcome'] = 'failed'
+                    return False
+        return True  # No refresh needed for legacy tokens
+
+    def dropbox_call(self, method_name, *args, deadline=None, **kwargs):
+        """Call a Dropbox API method through the shared retry policy"""
+        # Look the method up on every call so a refreshed client is picked up
+        method = getattr(self.dbx, method_name)
+        return self.retry_policy.call(method, *args, deadline=deadline,
+                                      description=method_name, **kwargs)
+    
+    def is_app_running(self):
+        """Check if the target application is running"""
+        return bool(self.find_app_processes())
+
+    def find_app_processes(self, pids=None):
+        """Pids of processes matching app_name, among pids if given, otherwise all"""
+        scan_start = time.perf_counter()
+        matches = self.scanner.find([self.matcher], pids)[0]
+        self.metrics.observe('process_scan' if pids is None else 'process_check', time.perf_counter() - scan_start)
+        return matches
+    
+    @property
+    def backups_dir(self):
+        return self.save_file_path.parent / "backups"
+
+    def create_backup(self, reason="manual"):
+        """Create a backup of the current save file"""
+        if not self.save_file_path.exists():
+            self.metrics.skip('backup', 'no_save_file', reason=reason)
+            return None
+        
+        with self.metrics.track('backup', reason=reason) as record:
+            try:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                backup_name = f"backup_{reason}_{timestamp}_{self.save_file_path.name}"
+                backup_path = self.backups_dir / backup_name
+                
+                # Create backups directory
+                backup_path.parent.mkdir(exist_ok=True)
+
+                # Several backups in one second (e.g. repeated restores) must not overwrite each other
+                counter = 1
+                while backup_path.exists():
+                    backup_path = self.backups_dir / f"backup_{reason}_{timestamp}_{counter}_{self.save_file_path.name}"
+                    counter += 1
+                
+                shutil.copy2(self.save_file_path, backup_path)
+                record['bytes'] = backup_path.stat().st_size
+                logger.info(f"Backup created: {backup_path.name}")
+                return backup_path
+            except Exception as e:
+                logger.error(f"Backup failed: {e}")
+                record['outcome'] = 'failed'
+                return None
+    
+    def quick_import(self, deadline=None, cancel_event=None):
+        """Import save file from Dropbox before game starts, swapping it in only once complete"""
+        with self.limiter.foreground(), self.metrics.track('import') as record:
+            imported = self._quick_import(record, deadline, cancel_event)
+            if not imported and 'skip_reason' not in record:
+                record['outcome'] = 'failed'
+            return imported
+
+    def _quick_import(self, record, deadline, cancel_event):
+        """Import steps for quick_import, filling in its metrics record"""
+        if not self.storage.available:
+            logger.warning(f"{self.storage.label} not available for import")
+            record['skip_reason'] = 'storage_unavailable'
+            return False
+
+        if self.upload_queue.has_pending(self.remote_path):
+            # The local save is newer than the remote one - importing would lose progress
+            logger.info("Skipping import: a newer local save is still queued for upload")
+            record['skip_reason'] = 'pending_upload'
+            if self.upload_worker:
+                self.upload_worker.wake()
+            return False
+
+        if deadline is None:
+            deadline = self.import_deadline
+        import_start = time.monotonic()
+        timings = {}
+        download_path = self.save_file_path.with_name(self.save_file_path.name + '.download')
+        fetch_path = self.save_file_path.with_name(self.save_file_path.name + '.fetch')
+
+        try:
+            remote_path = self.remote_path
+
+            # Phase 1: check if the file exists remotely
+            phase_start = time.monotonic()
+            try:
+                remote = self.storage.stat(remote_path, deadline=deadline)
+                logger.info(f"Remote file found: {datetime.fromtimestamp(remote.modified)}")
+            except NotFound:
+                logger.info("No remote save file found")
+                record['skip_reason'] = 'no_remote_file'
+                return False
+            timings['metadata'] = time.monotonic() - phase_start
+            record['bytes'] = remote.size
+
+            if self.local_save_current(remote):
+                logger.info("Local save is already up to date")
+                record['skip_reason'] = 'unchanged'
+                return True
+
+            # Phase 2: download into the temporary file, from a LAN peer if one has this exact version
+            phase_start = time.monotonic()
+            if self.lan and remote.content_hash and self.lan.fetch(remote_path, remote.content_hash, fetch_path):
+                record['source'] = 'lan'
+            else:
+                remaining = max(0.0, deadline - (time.monotonic() - import_start))
+                self.storage.get(remote_path, fetch_path, deadline=remaining)
+            timings['download'] = time.monotonic() - phase_start
+
+            phase_start = time.monotonic()
+            plain_hash = self.decode_download(fetch_path, download_path)
+            if plain_hash is not None:
+                timings['decode'] = time.monotonic() - phase_start
+            elif remote.content_hash:
+                plain_hash = remote.content_hash
+
+            # Phase 3: back up the local save and swap the download into place
+            with self.swap_lock:
+                if cancel_event is not None and cancel_event.is_set():
+                    logger.warning("Import finished after the launch budget - keeping local save")
+                    record['skip_reason'] = 'over_budget'
+                    return False
+
+                phase_start = time.monotonic()
+                self.create_backup("pre_import")
+                os.replace(download_path, self.save_file_path)
+                timings['swap'] = time.monotonic() - phase_start
+
+            self.sync_state.put(remote_path, remote.rev, plain_hash or content_hash(self.save_file_path))
+            record.update({f"{phase}_ms": round(seconds * 1000, 3) for phase, seconds in timings.items()})
+            self.last_import_time = time.time()
+            logger.info(f"Quick import successful ({self.format_timings(timings)})")
+            if self.lan:
+                self.lan.prepare(self.save_file_path)
+            return True
+
+        except Exception as e:
+            logger.error(f"Import failed: {e}")
+            return False
+
+        finally:
+            for path in (fetch_path, download_path):
+                if path.exists():
+                    path.unlink()
+
+    @staticmethod
+    def format_timings(timings):
+        """Format per-phase timings for the log"""
+        return ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in timings.items())
+
+    def launch(self, command, budget=None):
+        """Import the latest save within a latency budget, then start the game; returns its exit code"""
+        if budget is None:
+            budget = self.launch_budget
+
+        logger.info(f"Launching {command[0]} (import budget {budget:.1f}s)")
+        launch_start = time.monotonic()
+        cancel_event = threading.Event()
+        result = {}
+
+        def run_import():
+            self.storage.reconnect()
+            remaining = max(0.0, budget - (time.monotonic() - launch_start))
+            result['imported'] = self.quick_import(deadline=remaining, cancel_event=cancel_event)
+
+        import_thread = threading.Thread(target=run_import, daemon=True)
+        import_thread.start()
+        import_thread.join(budget)
+
+        # Waits for an in-progress swap; any later import will not touch the save
+        with self.swap_lock:
+            cancel_event.set()
+
+        if import_thread.is_alive():
+            logger.warning(f"Import exceeded the {budget:.1f}s budget - launching with local save")
+        elif result.get('imported'):
+            logger.info("Pre-launch import successful")
+        else:
+            logger.info("No remote save imported - launching with local save")
+
+        # Let a running monitor know the import for this launch is handled
+        self.launch_marker.touch()
+        logger.info(f"Pre-launch phase took {(time.monotonic() - launch_start) * 1000:.0f} ms")
+
+        try:
+            process = subprocess.Popen(command)
+        except OSError as e:
+            logger.error(f"Failed to launch {command[0]}: {e}")
+            return 127
+
+        return_code = process.wait()
+        logger.info(f"{command[0]} exited with code {return_code}")
+
+        # Upload once the game has finished writing the save
+        self.wait_for_save_settled()
+        self.storage.reconnect()
+        if self.upload_save():
+            logger.info("Save uploaded successfully")
+        else:
+            logger.warning("Save upload failed")
+
+        return return_code
+
+    def launched_by_wrapper(self):
+        """Check whether the launch wrapper just handled the import for this game start"""
+        try:
+            return time.time() - self.launch_marker.stat().st_mtime < LAUNCH_MARKER_TTL
+        except OSError:
+            return False
+    
+    def wait_for_save_settled(self):
+        """Wait until the save has stopped changing and no process has it open"""
+        start = time.perf_counter()
+        settled = wait_until_settled(self.save_file_path, self.upload_settle_time, self.upload_settle_timeout)
+        self.metrics.observe('save_settle', time.perf_counter() - start)
+        if not settled:
+            logger.warning(f"Save still changing after {self.upload_settle_timeout:.0f}s - uploading anyway")
+        return settled
+
+    def upload_save(self):
+        """Upload save file to Dropbox after game closes, queueing it if that fails"""
+        if not self.save_file_path.exists():
+            self.metrics.skip('upload', 'no_save_file')
+            return False
+
+        with self.transfer_lock:
+            if self.storage.available and self.upload_file(self.save_file_path, self.remote_path):
+                self.last_upload_time = time.time()
+                # Anything still queued for this file is older than what we just sent
+                self.upload_queue.remove(self.remote_path)
+                if self.lan:
+                    self.lan.prepare(self.save_file_path)
+                return True
+
+            try:
+                self.upload_queue.enqueue(self.save_file_path, self.remote_path)
+                logger.info(f"Save queued for upload when {self.storage.label} is reachable")
+                if self.upload_worker:
+                    self.upload_worker.wake()
+            except Exception as e:
+                logger.error(f"Failed to queue upload: {e}")
+            return False
+
+    def upload_file(self, local_path, remote_path):
+        """Upload a local file to the given remote path"""
+        with self.metrics.track('upload') as record:
+            uploaded = self._upload_file(record, local_path, remote_path)
+            if uploaded:
+                # A new revision exists; cached history is incomplete
+                self.revision_cache.invalidate(remote_path)
+            elif 'skip_reason' not in record:
+                record['outcome'] = 'failed'
+            return uploaded
+
+    def _upload_file(self, record, local_path, remote_path):
+        """Upload steps for upload_file, filling in its metrics record"""
+        if not self.storage.available:
+            record['skip_reason'] = 'storage_unavailable'
+            return False
+
+        try:
+            # One deadline for the whole upload, not one per request
+            give_up_at = time.monotonic() + self.upload_deadline
+            record['bytes'] = Path(local_path).stat().st_size
+            # Over the plaintext, so unchanged saves are recognised even when stored encrypted or compressed
+            plain_hash = content_hash(local_path)
+            synced = self.sync_state.get(remote_path)
+            if (synced and synced['plain_hash'] == plain_hash
+                    and self.remote_rev(remote_path, give_up_at - time.monotonic()) == synced['rev']):
+                logger.info("Remote save is already up to date")
+                record['skip_reason'] = 'unchanged'
+                return True
+
+            with self.open_stored(local_path) as (source, stored_plain_hash):
+                remote = self.storage.put(source, remote_path,
+                                          deadline=max(0.0, give_up_at - time.monotonic()))
+            # The snapshot's hash, when there was one: it is what was uploaded
+            self.sync_state.put(remote_path, remote.rev, stored_plain_hash or plain_hash)
+            record['stored_bytes'] = remote.size
+            logger.info("Upload successful")
+            return True
+
+        except Exception as e:
+            logger.error(f"Upload failed: {e}")
+            return False
+
+    def remote_rev(self, remote_path, deadline=None):
+        """Current revision of remote_path, or None if there is none"""
+        try:
+            return self.storage.stat(remote_path, deadline=self.upload_deadline if deadline is None else deadline).rev
+        except NotFound:
+            return None
+
+    def remote_history(self, refresh=False):
+        """Remote revisions of the save, newest first: one cached call for the whole list"""
+        if not refresh:
+            cached = self.revision_cache.get(self.remote_path)
+            if cached is not None:
+                return cached
+
+        revisions = [revision_entry(remote) for remote in self.storage.revisions(self.remote_path, limit=HISTORY_LIMIT)]
+        self.revision_cache.put(self.remote_path, revisions)
+        return revisions
+
+    def load_history(self, refresh=False):
+        """(remote revisions, local backups); remote is empty when the storage is unavailable"""
+        remote = []
+        if self.storage.available:
+            try:
+                remote = self.remote_history(refresh)
+            except NotFound:
+                logger.info("No remote save file found")
+            except Unsupported as e:
+                logger.info(f"{e} - showing local backups only")
+            except Exception as e:
+                logger.error(f"Failed to list remote revisions: {e}")
+        else:
+            logger.warning(f"{self.storage.label} not available - showing local backups only")
+        return remote, BackupIndex(self.backups_dir, self.save_file_path.name).entries()
+
+    def show_history(self, refresh=False):
+        """Print remote revisions and local backups with sizes and hashes"""
+        remote, local = self.load_history(refresh)
+        local_hash = stored_hash = None
+        if self.save_file_path.exists():
+            local_hash = content_hash(self.save_file_path)
+            # Remote hashes are of what is stored: ciphertext or compressed data when those are on
+            stored_hash = self.stored_hash(self.save_file_path) if self.cipher or self.compression else local_hash
+        print(format_history(f"{self.storage.label} revisions of {self.remote_path}:", remote, stored_hash))
+        print()
+        print(format_history(f"Local backups in {self.backups_dir}:", local, local_hash))
+        return 0
+
+    def restore(self, target):
+        """Restore a remote revision, a local backup or the version current at a point in time"""
+        if self.is_app_running():
+            logger.error(f"{self.app_name} is running - close it before restoring a save")
+            return False
+
+        remote, local = self.load_history()
+        version = select_version(target, remote, local)
+        if version is None:
+            logger.error(f"No revision, backup or point in time matches {target!r} (see --history)")
+            return False
+
+        with self.transfer_lock:
+            if version['source'] == 'remote':
+                restored = self._restore_revision(version)
+            else:
+                restored = self._restore_backup(version)
+        if restored:
+            logger.info(f"Restored {version['source']} version {version['id']}")
+        return restored
+
+    def _restore_revision(self, version):
+        """Make a remote revision current again and stream it into place"""
+        download_path = self.save_file_path.with_name(self.save_file_path.name + '.download')
+        fetch_path = self.save_file_path.with_name(self.save_file_path.name + '.fetch')
+        give_up_at = time.monotonic() + self.upload_deadline
+        try:
+            # Server-side restore: nothing is uploaded, and the next import won't undo it
+            restored = self.storage.restore(self.remote_path, version['id'], deadline=self.upload_deadline)
+            self.revision_cache.invalidate(self.remote_path)
+            # A queued upload of the old local save would overwrite the restore
+            self.upload_queue.remove(self.remote_path)
+
+            self.storage.get(self.remote_path, fetch_path, rev=restored.rev,
+                             deadline=max(0.0, give_up_at - time.monotonic()))
+            if content_hash(fetch_path) != version['content_hash']:
+                logger.error("Downloaded revision does not match its content hash - keeping local save")
+                return False
+            plain_hash = self.decode_download(fetch_path, download_path) or content_hash(download_path)
+
+            with self.swap_lock:
+                self.create_backup("pre_restore")
+                os.replace(download_path, self.save_file_path)
+            self.sync_state.put(self.remote_path, restored.rev, plain_hash)
+            return True
+
+        except Exception as e:
+            logger.error(f"Restore failed: {e}")
+            return False
+
+        finally:
+            for path in (fetch_path, download_path):
+                if path.exists():
+                    path.unlink()
+
+    def _restore_backup(self, version):
+        """Copy a local backup into place and upload it so the remote storage has it too"""
+        restore_path = self.save_file_path.with_name(self.save_file_path.name + '.restore')
+        try:
+            shutil.copy2(version['path'], restore_path)
+            with self.swap_lock:
+                self.create_backup("pre_restore")
+                os.replace(restore_path, self.save_file_path)
+        except Exception as e:
+            logger.error(f"Restore failed: {e}")
+            if restore_path.exists():
+                restore_path.unlink()
+            return False
+
+        if self.storage.available and self.upload_file(self.save_file_path, self.remote_path):
+            self.last_upload_time = time.time()
+            self.upload_queue.remove(self.remote_path)
+        else:
+            self.upload_queue.enqueue(self.save_file_path, self.remote_path)
+            logger.warning(f"Restored locally; the upload is queued until {self.storage.label} is reachable")
+        return True
+
+    def replay_queued_upload(self, snapshot_path, remote_path):
+        """Upload callback for the queue worker (reconnects if we started offline)"""
+        self.storage.reconnect()
+        if self.upload_file(snapshot_path, remote_path):
+            self.last_upload_time = time.time()
+            return True
+        return False
+
+    def on_game_started(self):
+        """Transfer job for a detected game start: import before the game loads its save"""
+        if self.launched_by_wrapper():
+            logger.info("Import already handled by launch wrapper")
+        elif self.quick_import():
+            logger.info("Pre-load import successful")
+        else:
+            logger.info("No remote save to import or import failed")
+
+    def on_game_closed(self, closed_at):
+        """Transfer job for a game exit: upload once the save has settled"""
+        # Wait for complete shutdown and file writes
+        self.wait_for_save_settled()
+
+        # Upload save if enough time has passed since last upload
+        if closed_at - self.last_upload_time > 30:  # 30 second cooldown
+            if self.upload_save():
+                logger.info("Save uploaded successfully")
+            else:
+                logger.warning("Save upload failed")
+        else:
+            logger.info("Skipping upload (too soon since last upload)")
+            self.metrics.skip('upload', 'cooldown')
+
+class SyncDaemon:
+    """The background service: monitors every profile in config.json, transferring on a TransferScheduler"""
+
+    def __init__(self, primary):
+        self.primary = primary
+        self.config = primary.config
+        self.metrics = primary.metrics
+        self.poll = primary.poll
+        self.scanner = primary.scanner
+        self.started_at = time.time()
+        self.status_server = None
+
+        # The other profiles reuse the primary's config, connection and queue
+        self.profiles = [primary] + [type(primary)(profile=settings['name'], shared=primary)
+                                     for settings in self.config.profiles()
+                                     if settings['name'] != primary.profile_name]
+        self.profile_names = [sync.profile_name for sync in self.profiles]
+        self.scheduler = TransferScheduler(self.config['transfer_workers'])
+        self.config_generation = self.config.generation
+
+    def reload_config(self):
+        """Apply config.json edits made while running; a cheap stat when nothing changed"""
+        # The token manager may have noticed (or written) the change first
+        self.config.reload_if_changed()
+        if self.config.generation == self.config_generation:
+            return
+        self.config_generation = self.config.generation
+        for sync in self.profiles:
+            sync.apply_config()
+        if [settings['name'] for settings in self.config.profiles()] != self.profile_names:
+            logger.warning("Profiles were added, removed or renamed - restart the sync service to apply")
+
+    def find_app_processes(self, pids=None):
+        """Pids matching each profile's game (one set per profile), in a single pass over the processes"""
+        scan_start = time.perf_counter()
+        matches = self.scanner.find([sync.matcher for sync in self.profiles], pids)
+        self.metrics.observe('process_scan' if pids is None else 'process_check', time.perf_counter() - scan_start)
+        return matches
+
+    def poll_app(self):
+        """Per-tick running check; reads process details only for new pids or when a full scan is due"""
+        new_pids = self.poll.refresh_pids()
+        idle = [sync for sync in self.profiles if not sync.app_pids]
+
+        # A running game is gone once none of its processes are left
+        exited = False
+        for sync in self.profiles:
+            if sync.app_pids:
+                sync.app_pids &= self.poll.pids
+                exited = exited or not sync.app_pids
+
+        if exited or (idle and self.poll.full_scan_due()):
+            found = self.find_app_processes()
+            for sync, pids in zip(self.profiles, found):
+                sync.app_pids = pids
+            # Games already running don't keep the full scans of idle profiles at full speed
+            self.poll.scanned(any(sync.app_pids for sync in idle))
+        elif new_pids:
+            for sync, pids in zip(self.profiles, self.find_app_processes(new_pids)):
+                sync.app_pids |= pids
+
+        return any(sync.app_pids for sync in self.profiles)
+
+    def status_snapshot(self):
+        """Current daemon state for the status endpoint"""
+        primary = self.primary
+        return {
+            'pid': os.getpid(),
+            'app_name': primary.app_name,
+            'game_running': any(sync.app_running for sync in self.profiles),
+            'storage': primary.storage.name,
+            'storage_available': primary.storage.available,
+            'dropbox_connected': primary.dbx is not None,
+            'last_import': max(sync.last_import_time for sync in self.profiles) or None,
+            'last_upload': max(sync.last_upload_time for sync in self.profiles) or None,
+            'pending_uploads': len(primary.upload_queue),
+            'token_expires_at': primary.token_manager.token_expires_at if primary.token_manager else None,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'full_scan_interval': self.poll.scan_interval,
+            'profiles': [{
+                'name': sync.profile_name,
+                'app_name': sync.app_name,
+                'game_running': sync.app_running,
+                'last_import': sync.last_import_time or None,
+                'last_upload': sync.last_upload_time or None,
+                'pending_transfers': self.scheduler.pending(sync.profile_name)
+            } for sync in self.profiles],
+            'counters': self.metrics.totals()
+        }
+
+    def start_status_server(self):
+        """Start the localhost status endpoint if a port is configured"""
+        port = self.primary.status_port
+        if not port or self.status_server:
+            return
+        try:
+            self.status_server = StatusServer(self.status_snapshot, port)
+            self.status_server.start()
+        except OSError as e:
+            logger.warning(f"Could not start status endpoint on port {port}: {e}")
+            self.status_server = None
+
+    def start_upload_worker(self):
+        """Start the background replay of queued uploads, shared by all profiles"""
+        primary = self.primary
+        if primary.upload_worker:
+            return
+        options = {}
+        if primary.storage.name != 'dropbox':
+            # The default probe checks that the Dropbox API is reachable
+            options['connectivity_check'] = lambda: primary.storage.available
+        worker = UploadQueueWorker(
+            primary.upload_queue,
+            self.replay_queued_upload,
+            primary.transfer_locks,
+            retry_policy=primary.retry_policy,
+            **options
+        )
+        for sync in self.profiles:
+            sync.upload_worker = worker
+        worker.start()
+
+    def local_save(self, remote_path):
+        """The save file of the profile syncing remote_path, for serving LAN peers"""
+        for sync in self.profiles:
+            if sync.remote_path.lower() == remote_path.lower():
+                return sync.save_file_path
+        return None
+
+    def start_lan_peer(self):
+        """Offer this machine's saves to LAN peers"""
+        lan = self.primary.lan
+        if lan is None:
+            return
+        lan.resolve = self.local_save
+        try:
+            lan.start()
+        except OSError as e:
+            logger.warning(f"Could not start LAN sync on port {lan.port}: {e}")
+            return
+        for sync in self.profiles:
+            lan.prepare(sync.save_file_path)
+
+    def replay_queued_upload(self, snapshot_path, remote_path):
+        """Upload callback for the queue worker, credited to the profile owning remote_path"""
+        for sync in self.profiles:
+            if sync.remote_path.lower() == remote_path.lower():
+                return sync.replay_queued_upload(snapshot_path, remote_path)
+        return self.primary.replay_queued_upload(snapshot_path, remote_path)
+
+    def monitor(self):
+        """Main monitoring loop"""
+        logger.info("=== MAA Redux Save Sync Started ===")
+        for sync in self.profiles:
+            logger.info(f"Profile {sync.profile_name}: monitoring {sync.app_name}, save file {sync.save_file_path}")
+        logger.info(f"{self.primary.storage.label} available: {self.primary.storage.available}")
+
+        self.start_upload_worker()
+        self.start_status_server()
+        self.start_lan_peer()
+        self.scheduler.start()
+
+        # After a restart, app_running is kept, so a game that was already
+        # running is not mistaken for a launch
+        try:
+            while True:
+                self.reload_config()
+                self.poll_app()
+                current_time = time.time()
+
+                for sync in self.profiles:
+                    if sync.app_pids and not sync.app_running:
+                        logger.info(f"Detected {sync.app_name} starting...")
+                        self.poll.note_activity()
+                        sync.app_running = True
+                        # Quick import before game loads saves
+                        self.scheduler.submit(sync.profile_name, sync.on_game_started, description="Import",
+                                              priority=URGENT)
+
+                    elif not sync.app_pids and sync.app_running:
+                        logger.info(f"{sync.app_name} closed")
+                        self.poll.note_activity()
+                        sync.app_running = False
+                        self.scheduler.submit(sync.profile_name, sync.on_game_closed, current_time,
+                                              description="Upload", priority=BACKGROUND)
+
+                self.poll.wait()
+
+        except KeyboardInterrupt:
+            logger.info("Sync stopped by user")
+
+def supervise(daemon):
+    """Run the monitor loop, restarting it with backoff when it crashes"""
+    delay = RESTART_BASE_DELAY
+    while True:
+        started = time.monotonic()
+        try:
+            daemon.monitor()
+            return
+        except Exception as e:
+            logger.exception(f"Monitor error: {e}")
+
+        if time.monotonic() - started >= RESTART_RESET_AFTER:
+            delay = RESTART_BASE_DELAY
+        logger.info(f"Restarting monitor in {delay}s")
+        time.sleep(delay)
+        delay = min(delay * 2, RESTART_MAX_DELAY)
+
+def acquire_instance_lock():
+    """Become the only running sync service, or exit if one is already running"""
+    instance_lock = InstanceLock(PID_FILE)
+    if not instance_lock.acquire():
+        logger.info(f"Sync service already running (pid {read_pid(PID_FILE)}) - exiting")
+        sys.exit(0)
+    atexit.register(instance_lock.release)
+
+    # Let --stop (SIGTERM) unwind normally so the lock and pidfile are released
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    return instance_lock
+
+def print_status():
+    """Print the running daemon's status from its localhost endpoint"""
+    try:
+        port = SyncConfig(CONFIG_FILE)['status_port']
+    except ConfigError as e:
+        logger.error(f"Failed to load config: {e}")
+        return 1
+
+    if not port:
+        logger.error("Status endpoint disabled - set status_port in config.json")
+        return 1
+
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/status", timeout=5) as response:
+            print(response.read().decode())
+        return 0
+    except OSError as e:
+        logger.error(f"Sync service not reachable on port {port}: {e}")
+        return 1
+
+def main():
+    parser = argparse.ArgumentParser(description='MAA Redux Save Sync')
+    parser.add_argument('--test', action='store_true', help='Test configuration and exit')
+    parser.add_argument('--import', dest='do_import', action='store_true', help='Import save from Dropbox and exit')
+    parser.add_argument('--upload', action='store_true', help='Upload save to Dropbox and exit')
+    parser.add_argument('--budget', type=float, help='Import latency budget for --launch, in seconds')
+    parser.add_argument('--metrics', action='store_true', help='Print sync latency summary and exit')
+    parser.add_argument('--status', action='store_true', help='Query the running sync service and exit')
+    parser.add_argument('--stop', action='store_true', help='Stop the running sync service and exit')
+    parser.add_argument('--history', action='store_true', help='List Dropbox revisions and local backups and exit')
+    parser.add_argument('--restore', metavar='REV|BACKUP|TIME',
+                        help='Restore a revision, a backup or the version current at a time (e.g. "2026-10-18 21:30")')
+    parser.add_argument('--refresh', action='store_true', help='With --history/--restore, skip the cached revision list')
+    parser.add_argument('--profile', metavar='NAME',
+                        help='Profile for one-shot commands when config.json lists several (default: the first)')
+    parser.add_argument('--launch', nargs=argparse.REMAINDER, metavar='CMD',
+                        help='Import save, start the game with CMD, upload when it exits')
+    
+    args = parser.parse_args()
+    setup_logging()
+
+    if args.metrics:
+        print(format_summary(summarize(load_records(metrics_files(METRICS_FILE)))))
+        sys.exit(0)
+    
+    if args.status:
+        sys.exit(print_status())
+
+    if args.stop:
+        sys.exit(0 if stop_instance(PID_FILE) else 1)
+
+    # Only the background service is exclusive; one-shot commands may run alongside it
+    if not (args.test or args.launch is not None or args.do_import or args.upload
+            or args.history or args.restore):
+        acquire_instance_lock()
+
+    # --launch connects inside its import budget
+    sync = MAAReduxSync(profile=args.profile, connect=args.launch is None)
+    
+    if args.test:
+        logger.info("Configuration test passed")
+        sys.exit(0)
+    elif args.history:
+        sys.exit(sync.show_history(refresh=args.refresh))
+    elif args.restore:
+        if args.refresh:
+            sync.revision_cache.invalidate(sync.remote_path)
+        sys.exit(0 if sync.restore(args.restore) else 1)
+    elif args.launch is not None:
+        if not args.launch:
+            parser.error("--launch requires a command to run")
+        sys.exit(sync.launch(args.launch, budget=args.budget))
+    elif args.do_import:
+        if sync.quick_import():
+            logger.info("Manual import successful")
+        else:
+            logger.error("Manual import failed")
+            sys.exit(1)
+    elif args.upload:
+        if sync.upload_save():
+            logger.info("Manual upload successful")
+        else:
+            logger.error("Manual upload failed")
+            if sync.upload_queue.has_pending(sync.remote_path):
+                logger.info("Save queued - the sync service will upload it when Dropbox is reachable")
+            sys.exit(1)
+    else:
+        supervise(SyncDaemon(sync))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Adaptive polling for the sync service's monitor loop
+"""
+
+import os
+import time
+from typing import Set
+
+import psutil
+
+PROC_DIR = '/proc'
+
+
+def list_pids() -> Set[int]:
+    """Pids of all running processes, without reading any per-process details"""
+    if os.path.isdir(PROC_DIR):
+        # One directory listing; psutil.pids() does the same with more overhead
+        return {int(entry) for entry in os.listdir(PROC_DIR) if entry.isdigit()}
+    return set(psutil.pids())
+
+
+class PollScheduler:
+    """Decides when the monitor runs a full process scan
+
+    Every tick (interval seconds) only the pid list is compared with the
+    previous one, and only processes that appeared since are inspected: the
+    game cannot start without a new pid. Full scans, which also catch a pid
+    reused between two ticks, run every tick while a launch is likely (the
+    game ran within active_window seconds) and otherwise back off
+    exponentially up to max_interval.
+    """
+
+    def __init__(self, interval: float = 2.0, max_interval: float = 60.0, active_window: float = 900.0):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.active_window = active_window
+        self.scan_interval = interval
+        # Startup counts as activity: the service often starts right before the game
+        self.last_activity = time.monotonic()
+        self.next_full_scan = 0.0
+        self.pids: Set[int] = set()
+
+    def configure(self, interval: float, max_interval: float):
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.scan_interval = min(max(self.scan_interval, interval), self.max_interval)
+
+    def note_activity(self):
+        """The game started or stopped; poll at full speed again"""
+        self.last_activity = time.monotonic()
+        self.scan_interval = self.interval
+        self.next_full_scan = 0.0
+
+    def launch_likely(self) -> bool:
+        return time.monotonic() - self.last_activity < self.active_window
+
+    def refresh_pids(self) -> Set[int]:
+        """Update the pid list and return the pids that appeared since the last tick"""
+        current = list_pids()
+        new = current - self.pids if self.pids else set()
+        self.pids = current
+        return new
+
+    def full_scan_due(self) -> bool:
+        return time.monotonic() >= self.next_full_scan
+
+    def scanned(self, found: bool):
+        """Record a full scan and schedule the next one"""
+        if found or self.launch_likely():
+            self.scan_interval = self.interval
+        else:
+            self.scan_interval = min(self.scan_interval * 2, self.max_interval)
+        self.next_full_scan = time.monotonic() + self.scan_interval
+
+    def wait(self):
+        time.sleep(self.interval)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Find the game's processes by name or executable path
+"""
+
+import fnmatch
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import psutil
+
+MATCH_MODES = ('substring', 'exact', 'glob', 'regex')
+
+
+def _strip_extension(name: str) -> str:
+    """'MAA Redux.exe' -> 'MAA Redux', so exact patterns work on every OS"""
+    root, ext = os.path.splitext(name)
+    return root if ext.lower() in ('.exe', '.app') else name
+
+
+class ProcessMatcher:
+    """Matches processes against app_name, compiled once per pattern
+
+    Modes (case-insensitive):
+      substring  pattern appears in the process name or executable path
+      exact      process name, or executable file name, equals the pattern
+                 (a .exe/.app extension is ignored)
+      glob       fnmatch pattern against the name, executable path or file name
+      regex      re.search against the name or executable path
+
+    ProcessScanner applies matchers to the running processes, checking any
+    number of them in one pass over the process table.
+    """
+
+    def __init__(self, pattern: str, mode: str = 'substring'):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode {mode!r}; expected one of {', '.join(MATCH_MODES)}")
+        self.pattern = pattern
+        self.mode = mode
+
+        lowered = pattern.lower()
+        if mode == 'substring':
+            self._match_name = lambda name: lowered in name.lower()
+            self._match_exe = self._match_name
+        elif mode == 'exact':
+            target = _strip_extension(lowered)
+            self._match_name = lambda name: _strip_extension(name.lower()) == target
+            self._match_exe = lambda exe: self._match_name(os.path.basename(exe))
+        else:
+            if mode == 'glob':
+                regex = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+                self._match_name = lambda name: regex.match(name) is not None
+                self._match_exe = lambda exe: (regex.match(exe) is not None
+                                               or regex.match(os.path.basename(exe)) is not None)
+            else:
+                regex = re.compile(pattern, re.IGNORECASE)
+                self._match_name = lambda name: regex.search(name) is not None
+                self._match_exe = self._match_name
+
+    def matches(self, name: Optional[str], exe: Optional[str]) -> bool:
+        return bool(name and self._match_name(name)) or bool(exe and self._match_exe(exe))
+
+
+class ProcessScanner:
+    """One pass over the process table for any number of ProcessMatchers
+
+    Names are checked first and the executable path, which costs a readlink
+    or a system call per process, is only resolved when no name matched.
+    Processes that matched nothing are remembered by pid, create time and
+    name, so a long-running process is inspected once rather than on every
+    scan; a reused pid has a new create time and is inspected again. Full
+    scans also compare the name, which process_iter reads in the same pass:
+    a wrapper that exec()s into the game keeps its pid and create time but
+    not its name, and is matched on the next full scan. Checks of new pids
+    skip on pid and create time alone. The memory is dropped whenever the
+    set of patterns changes.
+    """
+
+    def __init__(self):
+        # pid -> (create_time, name) of processes that matched none of the patterns
+        self._ignored: Dict[int, Tuple[float, str]] = {}
+        self._patterns: Tuple[Tuple[str, str], ...] = ()
+
+    def find(self, matchers: Sequence[ProcessMatcher], pids: Optional[Iterable[int]] = None) -> List[Set[int]]:
+        """Pids matching each matcher (one set per matcher, in order), among pids if given, otherwise all processes"""
+        patterns = tuple((matcher.pattern, matcher.mode) for matcher in matchers)
+        if patterns != self._patterns:
+            self._ignored = {}
+            self._patterns = patterns
+
+        if pids is None:
+            processes = psutil.process_iter(['create_time', 'name'])
+        else:
+            processes = []
+            for pid in pids:
+                try:
+                    processes.append(psutil.Process(pid))
+                except psutil.NoSuchProcess:
+                    continue
+
+        matches = [set() for _ in matchers]
+        seen = {}
+        for proc in processes:
+            try:
+                ignored = self._ignored.get(proc.pid)
+                if pids is None:
+                    create_time, name = proc.info['create_time'], proc.info['name']
+                    skip = ignored == (create_time, name)
+                else:
+                    create_time, name = proc.create_time(), None
+                    skip = ignored is not None and ignored[0] == create_time
+                if create_time is not None and skip:
+                    seen[proc.pid] = ignored
+                    continue
+
+                if name is None:
+                    name = proc.name()
+                found = [index for index, matcher in enumerate(matchers) if matcher.matches(name, None)]
+                if len(found) < len(matchers):
+                    try:
+                        exe = proc.exe()
+                    except psutil.AccessDenied:
+                        exe = None
+                    if exe:
+                        found += [index for index, matcher in enumerate(matchers)
+                                  if index not in found and matcher.matches(None, exe)]
+                for index in found:
+                    matches[index].add(proc.pid)
+                if not found and create_time is not None:
+                    seen[proc.pid] = (create_time, name)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        if pids is None:
+            # A full scan saw every live process; forget the ones that exited
+            self._ignored = seen
+        else:
+            self._ignored.update(seen)
+        return matches
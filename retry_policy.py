@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Shared retry policy for Dropbox API and OAuth requests
+"""
+
+import random
+import socket
+import time
+import urllib.error
+from typing import Callable, Optional, Tuple
+import logging
+
+try:
+    import dropbox
+    DROPBOX_AVAILABLE = True
+except ImportError:
+    DROPBOX_AVAILABLE = False
+
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def classify_error(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """Return (retryable, retry_after) for an exception raised by a request"""
+    # urllib (used by the OAuth helper). HTTPError is a URLError subclass,
+    # so it has to be checked first.
+    if isinstance(error, urllib.error.HTTPError):
+        if error.code == 429 or error.code >= 500:
+            return True, _parse_retry_after(error.headers.get('Retry-After') if error.headers else None)
+        return False, None
+    if isinstance(error, (urllib.error.URLError, socket.timeout, ConnectionError)):
+        return True, None
+
+    # Dropbox SDK
+    if DROPBOX_AVAILABLE:
+        if isinstance(error, dropbox.exceptions.RateLimitError):
+            retry_after = error.backoff
+            if retry_after is None and error.error is not None:
+                retry_after = getattr(error.error, 'retry_after', None)
+            return True, retry_after
+        if isinstance(error, dropbox.exceptions.AuthError):
+            return False, None
+        if isinstance(error, dropbox.exceptions.InternalServerError):
+            return True, None
+        if isinstance(error, dropbox.exceptions.HttpError):
+            return error.status_code >= 500, None
+
+    # Transport errors from the requests session used by the Dropbox SDK
+    if REQUESTS_AVAILABLE and isinstance(error, (requests.exceptions.ConnectionError,
+                                                 requests.exceptions.Timeout)):
+        return True, None
+
+    return False, None
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter and an optional deadline"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5,
+                 max_delay: float = 30.0, deadline: Optional[float] = None,
+                 jitter: bool = True, on_retry: Optional[Callable[[BaseException], None]] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.jitter = jitter
+        self.on_retry = on_retry
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            # The server told us how long to wait - never retry earlier than that
+            delay = max(delay, retry_after)
+        return delay
+
+    def call(self, func: Callable, *args, deadline: Optional[float] = None,
+             description: str = "request", **kwargs):
+        """Call func, retrying transient failures until attempts or deadline run out
+
+        `deadline` is a budget in seconds for the whole operation including
+        retries and overrides the policy default. The last error is re-raised
+        unchanged when giving up, so callers keep their existing handlers.
+        """
+        budget = self.deadline if deadline is None else deadline
+        give_up_at = time.monotonic() + budget if budget is not None else None
+
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                retryable, retry_after = classify_error(e)
+                if not retryable or attempt >= self.max_attempts:
+                    raise
+
+                delay = self.compute_delay(attempt, retry_after)
+                if give_up_at is not None and time.monotonic() + delay > give_up_at:
+                    logger.warning(f"{description} failed and retry would exceed deadline: {e}")
+                    raise
+
+                logger.warning(f"{description} failed (attempt {attempt}/{self.max_attempts}), "
+                               f"retrying in {delay:.1f}s: {e}")
+                if self.on_retry:
+                    self.on_retry(e)
+                time.sleep(delay)
+                attempt += 1
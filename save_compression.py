@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Transfer compression of saves: zlib-compressed remote objects with a small header
+"""
+
+import io
+import struct
+import zlib
+from typing import BinaryIO, Iterable, Iterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Object layout: MAGIC, version, method, original size, then the zlib stream
+MAGIC = b'\x89MAAZ\r\n\x1a\n'
+VERSION = 1
+METHOD_ZLIB = 1
+HEADER = struct.Struct(f'>{len(MAGIC)}sBBQ')
+
+COMPRESS_LEVEL = 6
+IO_CHUNK = 1024 * 1024
+
+# Compression is used when sampled slices shrink to at most this fraction
+MAX_RATIO = 0.9
+SAMPLES = 8
+SAMPLE_SIZE = 64 * 1024
+
+
+class CompressionError(Exception):
+    """A compressed save is corrupt or truncated"""
+
+
+def sampled_ratio(f: BinaryIO, size: int) -> float:
+    """Compressed/original size of a few slices spread evenly over the file
+
+    Small files are compressed whole. Leaves f at offset 0.
+    """
+    if size <= SAMPLES * SAMPLE_SIZE:
+        offsets = [0]
+        length = size
+    else:
+        offsets = [size * index // SAMPLES for index in range(SAMPLES)]
+        length = SAMPLE_SIZE
+
+    original = compressed = 0
+    for offset in offsets:
+        f.seek(offset)
+        data = f.read(length)
+        original += len(data)
+        compressed += len(zlib.compress(data, COMPRESS_LEVEL))
+    f.seek(0)
+    return compressed / original if original else 1.0
+
+
+def worth_compressing(f: BinaryIO, size: int) -> bool:
+    return sampled_ratio(f, size) <= MAX_RATIO
+
+
+class CompressingReader(io.RawIOBase):
+    """Header plus the zlib stream of source, compressed as it is read
+
+    Deterministic: the same file always compresses to the same bytes.
+    """
+
+    def __init__(self, source: BinaryIO, size: int):
+        super().__init__()
+        self.source = source
+        self.compressor = zlib.compressobj(COMPRESS_LEVEL)
+        self.buffer = bytearray(HEADER.pack(MAGIC, VERSION, METHOD_ZLIB, size))
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        data = self.source.read(IO_CHUNK)
+        if data:
+            self.buffer += self.compressor.compress(data)
+        else:
+            self.buffer += self.compressor.flush()
+            self.finished = True
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self.buffer) < size) and not self.finished:
+            self._fill()
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def is_compressed(head: bytes) -> bool:
+    """Whether data starting with head is a compressed save"""
+    return head[:len(MAGIC)] == MAGIC
+
+
+def decompress(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompress a stored save given as chunks; uncompressed data passes through
+
+    Output comes in pieces of at most IO_CHUNK, however well the data
+    compressed, so memory stays bounded.
+    """
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= HEADER.size:
+            break
+    if len(head) < HEADER.size or not is_compressed(head):
+        if head:
+            yield head
+        yield from chunks
+        return
+
+    _, version, method, size = HEADER.unpack_from(head)
+    if version != VERSION or method != METHOD_ZLIB:
+        raise CompressionError(f"unsupported compression (version {version}, method {method})")
+
+    decompressor = zlib.decompressobj()
+    written = 0
+    pending = head[HEADER.size:]
+    try:
+        while True:
+            while pending:
+                data = decompressor.decompress(pending, IO_CHUNK)
+                pending = decompressor.unconsumed_tail
+                written += len(data)
+                yield data
+            if decompressor.eof:
+                break
+            pending = next(chunks, None)
+            if pending is None:
+                break
+    except zlib.error as e:
+        raise CompressionError(f"corrupt compressed save: {e}")
+
+    if not decompressor.eof or decompressor.unused_data or next(chunks, None) or written != size:
+        raise CompressionError("compressed save is truncated or corrupt")
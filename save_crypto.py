@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Client-side encryption of saves: streaming AES-256-GCM in 1 MB chunks
+"""
+
+import base64
+import hashlib
+import hmac
+import io
+import os
+import struct
+from typing import BinaryIO, Iterator
+import logging
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, version, chunk size, file id, then chunks of
+# ciphertext + 16-byte tag. The last chunk may be short (or empty).
+MAGIC = b'\x89MAAENC\r\n\x1a'
+VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+# Largest chunk size accepted from a file's header, which is not yet authenticated when read
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+TAG_SIZE = 16
+FILE_ID_SIZE = 16
+HEADER = struct.Struct(f'>{len(MAGIC)}sBI{FILE_ID_SIZE}s')
+
+
+class DecryptionError(Exception):
+    """The file is not a save encrypted with this key, or was altered or truncated"""
+
+
+def generate_key() -> str:
+    """New random 256-bit key, as stored in config.json"""
+    return base64.urlsafe_b64encode(os.urandom(32)).decode()
+
+
+def decode_key(text: str) -> bytes:
+    """Raise ValueError unless text is a key made by generate_key"""
+    try:
+        key = base64.urlsafe_b64decode(text.encode())
+    except (ValueError, TypeError):
+        raise ValueError("not base64")
+    if len(key) != 32:
+        raise ValueError("must decode to 32 bytes")
+    return key
+
+
+def is_encrypted(head: bytes) -> bool:
+    """Whether data starting with head is an encrypted save"""
+    return head[:len(MAGIC)] == MAGIC
+
+
+def _nonce(counter: int, last: bool) -> bytes:
+    # 11-byte chunk counter and a last-chunk flag, so chunks cannot be
+    # reordered, dropped or the file truncated at a chunk boundary
+    return counter.to_bytes(11, 'big') + (b'\x01' if last else b'\x00')
+
+
+class SaveCipher:
+    """Encrypts and decrypts saves with one key from config.json
+
+    Each file gets its own AES-GCM key, derived from the master key and a
+    file id that is itself derived from the content hash of exactly the
+    bytes encrypted (for a compressed save, the compressed bytes). Two
+    different inputs thus never share a key and nonces, while the same
+    input always encrypts to the same bytes: Dropbox's content hash stays
+    comparable with the local save and a LAN peer can re-create exactly
+    what Dropbox holds. Only equality of two saves is revealed, which the
+    stored sizes and upload times mostly reveal anyway.
+    """
+
+    def __init__(self, key: str, chunk_size: int = CHUNK_SIZE):
+        if not CRYPTO_AVAILABLE:
+            raise RuntimeError("Encryption needs the cryptography package (pip install cryptography)")
+        self._key = decode_key(key)
+        self.chunk_size = chunk_size
+
+    def _file_key(self, file_id: bytes) -> AESGCM:
+        return AESGCM(hmac.new(self._key, b'maa-sync file key' + file_id, hashlib.sha256).digest())
+
+    def file_id(self, data_hash: str) -> bytes:
+        """Id of the data to encrypt, from its content hash - never reuse one for other data"""
+        return hmac.new(self._key, b'maa-sync file id' + data_hash.encode(), hashlib.sha256).digest()[:FILE_ID_SIZE]
+
+    def encrypted_size(self, plain_size: int) -> int:
+        chunks = max(1, -(-plain_size // self.chunk_size))
+        return HEADER.size + plain_size + chunks * TAG_SIZE
+
+    def encrypt_stream(self, source: BinaryIO, data_hash: str) -> 'EncryptingReader':
+        """File-like reader yielding the encrypted form of source, whose bytes have content hash data_hash"""
+        return EncryptingReader(self, source, self.file_id(data_hash))
+
+    def decrypt(self, source: BinaryIO) -> Iterator[bytes]:
+        """Plaintext of an encrypted save read from source, one chunk at a time"""
+        header = source.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise DecryptionError("file too short")
+        magic, version, chunk_size, file_id = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise DecryptionError("not an encrypted save")
+        if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise DecryptionError(f"bad chunk size {chunk_size}")
+
+        aead = self._file_key(file_id)
+        counter = 0
+        chunk = source.read(chunk_size + TAG_SIZE)
+        while True:
+            next_chunk = source.read(chunk_size + TAG_SIZE)
+            last = not next_chunk
+            try:
+                plain = aead.decrypt(_nonce(counter, last), chunk, header)
+            except InvalidTag:
+                raise DecryptionError("wrong key, or the file was altered or truncated")
+            yield plain
+            if last:
+                return
+            counter += 1
+            chunk = next_chunk
+
+
+class EncryptingReader(io.RawIOBase):
+    """Encrypts a plaintext stream chunk by chunk as it is read
+
+    Upload code reads it like a file in whatever sizes it likes; at most
+    two plaintext chunks and one ciphertext chunk are held in memory.
+    """
+
+    def __init__(self, cipher: SaveCipher, source: BinaryIO, file_id: bytes):
+        super().__init__()
+        self.source = source
+        self.chunk_size = cipher.chunk_size
+        self.header = HEADER.pack(MAGIC, VERSION, cipher.chunk_size, file_id)
+        self.aead = cipher._file_key(file_id)
+        self.counter = 0
+        self.buffer = bytearray(self.header)
+        self.next_plain = source.read(self.chunk_size)
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        plain = self.next_plain
+        self.next_plain = self.source.read(self.chunk_size)
+        last = not self.next_plain
+        self.buffer += self.aead.encrypt(_nonce(self.counter, last), plain, self.header)
+        self.counter += 1
+        self.finished = last
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self.buffer) < size) and not self.finished:
+            self._fill()
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
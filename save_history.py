@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Save version history: Dropbox revisions and local backups
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dropbox hashes files in 4 MB blocks
+DROPBOX_HASH_BLOCK = 4 * 1024 * 1024
+
+# Remote revision lists are reused for this long before asking Dropbox again
+REVISION_CACHE_TTL = 300  # seconds
+
+
+def content_hash(path: Path) -> str:
+    """Dropbox content hash: SHA-256 over the SHA-256 of each 4 MB block
+
+    Streams the file, so memory stays at one block whatever the save size.
+    Comparable with the content_hash Dropbox reports in file metadata.
+    """
+    with open(path, 'rb') as f:
+        return content_hash_stream(f)
+
+
+def content_hash_stream(stream) -> str:
+    """content_hash of everything left to read in a binary stream"""
+    overall = hashlib.sha256()
+    while True:
+        block = stream.read(DROPBOX_HASH_BLOCK)
+        if not block:
+            break
+        overall.update(hashlib.sha256(block).digest())
+    return overall.hexdigest()
+
+
+class ContentHasher:
+    """content_hash of data seen a piece at a time, in pieces of any size"""
+
+    def __init__(self):
+        self._overall = hashlib.sha256()
+        self._block = hashlib.sha256()
+        self._filled = 0
+
+    def update(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            take = min(len(view), DROPBOX_HASH_BLOCK - self._filled)
+            self._block.update(view[:take])
+            self._filled += take
+            view = view[take:]
+            if self._filled == DROPBOX_HASH_BLOCK:
+                self._overall.update(self._block.digest())
+                self._block = hashlib.sha256()
+                self._filled = 0
+
+    def hexdigest(self) -> str:
+        overall = self._overall.copy()
+        if self._filled:
+            overall.update(self._block.digest())
+        return overall.hexdigest()
+
+
+def _write_json_atomic(path: Path, data):
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def parse_point_in_time(text: str) -> Optional[float]:
+    """Parse '2026-10-18 21:30', '2026-10-18T21:30:05' or '20261018_213005' (local time) to epoch seconds"""
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M',
+                '%Y-%m-%d', '%Y%m%d_%H%M%S'):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+class BackupIndex:
+    """backups/index.json: size, mtime and content hash of each local backup
+
+    Hashes are computed lazily, the first time history is browsed, and
+    reused for as long as the file's size and mtime are unchanged, so
+    create_backup itself stays a plain copy. With save_name only backups of
+    that save are listed, for profiles whose saves share a directory.
+    """
+
+    def __init__(self, backups_dir: Path, save_name: Optional[str] = None):
+        self.backups_dir = Path(backups_dir)
+        self.index_path = self.backups_dir / "index.json"
+        self.save_name = save_name
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rebuilding backup index: {e}")
+            return {}
+
+    def entries(self) -> List[Dict]:
+        """Backups newest first, each with name, path, modified, size and content_hash"""
+        if not self.backups_dir.is_dir():
+            return []
+
+        index = self._load()
+        updated = {}
+        for path in self.backups_dir.iterdir():
+            if not path.is_file() or not path.name.startswith('backup_'):
+                continue
+            stat = path.stat()
+            cached = index.get(path.name)
+            if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                updated[path.name] = cached
+            else:
+                updated[path.name] = {
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'content_hash': content_hash(path)
+                }
+
+        if updated != index:
+            _write_json_atomic(self.index_path, updated)
+
+        entries = [{
+            'source': 'local',
+            'id': name,
+            'path': self.backups_dir / name,
+            'modified': entry['mtime_ns'] / 1e9,
+            'size': entry['size'],
+            'content_hash': entry['content_hash']
+        } for name, entry in updated.items() if not self.save_name or name.endswith(f"_{self.save_name}")]
+        return sorted(entries, key=lambda entry: entry['modified'], reverse=True)
+
+
+class RevisionCache:
+    """On-disk cache of Dropbox revision lists, one per remote path
+
+    Revisions are immutable, so a cached list is only incomplete, never
+    wrong; it is refreshed after REVISION_CACHE_TTL or when this machine
+    uploads a new revision.
+    """
+
+    def __init__(self, cache_path: Path, ttl: float = REVISION_CACHE_TTL):
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, remote_path: str) -> Optional[List[Dict]]:
+        """Cached revisions of remote_path, or None if missing or expired"""
+        cached = self._load().get(remote_path.lower())
+        if not cached or time.time() - cached['fetched_at'] > self.ttl:
+            return None
+        return cached['revisions']
+
+    def put(self, remote_path: str, revisions: List[Dict]):
+        with self._lock:
+            cache = self._load()
+            cache[remote_path.lower()] = {'fetched_at': time.time(), 'revisions': revisions}
+            _write_json_atomic(self.cache_path, cache)
+
+    def invalidate(self, remote_path: str):
+        """Forget remote_path's revisions (called after uploading a new one)"""
+        if not self.cache_path.exists():
+            return
+        with self._lock:
+            cache = self._load()
+            if cache.pop(remote_path.lower(), None) is not None:
+                _write_json_atomic(self.cache_path, cache)
+
+
+class SyncState:
+    """sync_state.json: which remote revision each local save was last synced with
+
+    Per remote path, the revision this machine last uploaded or imported
+    and the content hash of the plaintext save at the time. Unlike the
+    remote content hash this stays comparable with the local save when
+    saves are stored encrypted, so unchanged saves are still skipped.
+    """
+
+    def __init__(self, state_path: Path):
+        self.state_path = Path(state_path)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, remote_path: str) -> Optional[Dict]:
+        """{'rev', 'plain_hash'} of the last sync of remote_path, or None"""
+        return self._load().get(remote_path.lower())
+
+    def put(self, remote_path: str, rev: str, plain_hash: str):
+        with self._lock:
+            state = self._load()
+            state[remote_path.lower()] = {'rev': rev, 'plain_hash': plain_hash, 'synced_at': time.time()}
+            _write_json_atomic(self.state_path, state)
+
+    def forget(self, remote_path: str):
+        """Force the next upload or import of remote_path to transfer"""
+        with self._lock:
+            state = self._load()
+            if state.pop(remote_path.lower(), None) is not None:
+                _write_json_atomic(self.state_path, state)
+
+    def is_synced(self, remote_path: str, rev: str, plain_hash: str) -> bool:
+        """Whether revision rev of remote_path holds exactly the plaintext plain_hash"""
+        synced = self.get(remote_path)
+        return bool(synced) and synced['rev'] == rev and synced['plain_hash'] == plain_hash
+
+
+def revision_entry(remote) -> Dict:
+    """History entry for a storage_backends.RemoteFile"""
+    return {
+        'source': 'remote',
+        'id': remote.rev,
+        'modified': remote.modified,
+        'size': remote.size,
+        'content_hash': remote.content_hash
+    }
+
+
+def format_history(title: str, entries: List[Dict], local_hash: Optional[str]) -> str:
+    """Table of versions; the one matching the current local save is marked"""
+    lines = [title]
+    if not entries:
+        lines.append("  (none)")
+    for entry in entries:
+        modified = datetime.fromtimestamp(entry['modified']).strftime('%Y-%m-%d %H:%M:%S')
+        marker = "  <- local save" if local_hash and entry['content_hash'] == local_hash else ""
+        lines.append(f"  {entry['id']:<48} {modified}  {entry['size']:>12,} B  "
+                     f"{(entry['content_hash'] or '')[:12]}{marker}")
+    return "\n".join(lines)
+
+
+def select_version(target: str, remote: List[Dict], local: List[Dict]) -> Optional[Dict]:
+    """Find the version named by target: a revision, a backup name, or a point in time
+
+    For a point in time the newest version (remote or local) modified at or
+    before it is chosen.
+    """
+    for entry in remote + local:
+        if entry['id'] == target:
+            return entry
+
+    point = parse_point_in_time(target)
+    if point is None:
+        return None
+    candidates = [entry for entry in remote + local if entry['modified'] <= point]
+    return max(candidates, key=lambda entry: entry['modified'], default=None)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Wait for the game to finish writing its save before it is uploaded
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+import logging
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """(size, mtime) of path, or None while it does not exist (e.g. mid atomic replace)"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def open_handles(path: Path) -> List[int]:
+    """Pids of processes that currently have path open
+
+    Processes we may not inspect (other users, protected system processes)
+    are skipped; the game runs as the same user as the sync service.
+    """
+    target = os.path.normcase(os.path.realpath(path))
+    holders = []
+    for proc in psutil.process_iter():
+        try:
+            for open_file in proc.open_files():
+                if os.path.normcase(open_file.path) == target:
+                    holders.append(proc.pid)
+                    break
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return holders
+
+
+def wait_until_settled(path: Path, settle_time: float = 1.0, timeout: float = 60.0,
+                       interval: float = 0.1) -> bool:
+    """Block until path has not changed for settle_time and no process has it open
+
+    A file last modified more than settle_time ago counts as settled right
+    away, so an upload after the game closed normally waits only for the
+    open-handle check. Returns False if the file was still changing (or
+    held open) when timeout ran out.
+    """
+    path = Path(path)
+    give_up_at = time.monotonic() + timeout
+
+    signature = file_signature(path)
+    age = time.time() - signature[1] / 1e9 if signature else 0.0
+    stable_since = time.monotonic() - min(max(age, 0.0), settle_time)
+
+    reported = False
+    while True:
+        now = time.monotonic()
+        if now - stable_since >= settle_time:
+            if signature is None:
+                # Nothing to wait for; the upload reports the missing file
+                return True
+            holders = open_handles(path)
+            if not holders:
+                return True
+            if not reported:
+                logger.info(f"Save still open by pid(s) {', '.join(map(str, holders))} - waiting")
+                reported = True
+            stable_since = now
+
+        if now >= give_up_at:
+            return False
+
+        time.sleep(interval)
+        current = file_signature(path)
+        if current != signature:
+            signature = current
+            stable_since = time.monotonic()
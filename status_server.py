@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Localhost status/metrics endpoint for the MAA Redux sync daemon
+
+GET /status  - current daemon state as JSON
+GET /metrics - the same state in Prometheus text format
+"""
+
+import json
+import threading
+import urllib.parse
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = "maa_sync"
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler serving daemon status"""
+
+    def do_GET(self):
+        """Serve /status and /metrics"""
+        path = urllib.parse.urlparse(self.path).path
+
+        if path in ('/', '/status'):
+            body = json.dumps(self.server.status_provider(), indent=2, default=str).encode()
+            content_type = 'application/json'
+        elif path == '/metrics':
+            body = format_prometheus(self.server.status_provider()).encode()
+            content_type = 'text/plain; version=0.0.4'
+        else:
+            self.send_response(404)
+            self.send_header('Content-type', 'text/plain')
+            self.end_headers()
+            self.wfile.write(b'Not found')
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Suppress log messages"""
+        pass
+
+
+class StatusServer:
+    """Serves daemon status on 127.0.0.1 from a background thread"""
+
+    def __init__(self, status_provider: Callable[[], Dict], port: int):
+        self.status_provider = status_provider
+        self.port = port
+        self.server = None
+
+    def start(self):
+        """Bind the endpoint and start serving"""
+        # Always loopback-only: the status includes token expiry and file paths
+        self.server = HTTPServer(('127.0.0.1', self.port), StatusRequestHandler)
+        self.server.status_provider = self.status_provider
+
+        server_thread = threading.Thread(target=self.server.serve_forever, name="StatusServer")
+        server_thread.daemon = True
+        server_thread.start()
+        logger.info(f"Status endpoint listening on http://127.0.0.1:{self.server.server_port}/status")
+
+    def stop(self):
+        """Stop serving"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def format_prometheus(status: Dict) -> str:
+    """Render a status snapshot in Prometheus text exposition format"""
+    lines = []
+
+    def gauge(name, value, help_text):
+        if value is None:
+            return
+        lines.append(f"# HELP {METRICS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_{name} gauge")
+        lines.append(f"{METRICS_PREFIX}_{name} {float(value)}")
+
+    gauge('game_running', int(bool(status.get('game_running'))), "1 while the game is running")
+    gauge('dropbox_connected', int(bool(status.get('dropbox_connected'))), "1 when a Dropbox client is available")
+    gauge('storage_available', int(bool(status.get('storage_available'))), "1 when the remote storage is usable")
+    gauge('pending_uploads', status.get('pending_uploads'), "Uploads waiting in the offline queue")
+    gauge('last_import_timestamp_seconds', status.get('last_import') or None, "Time of the last successful import")
+    gauge('last_upload_timestamp_seconds', status.get('last_upload') or None, "Time of the last successful upload")
+    gauge('token_expires_at_seconds', status.get('token_expires_at'), "Access token expiry time")
+    gauge('uptime_seconds', status.get('uptime_seconds'), "Seconds since the daemon started")
+
+    counters = status.get('counters', {})
+    series = [
+        ('operations_total', 'count', "Sync operations recorded"),
+        ('operation_errors_total', 'errors', "Sync operations that failed"),
+        ('operation_skips_total', 'skipped', "Sync operations that were skipped"),
+        ('operation_retries_total', 'retries', "Retries performed by sync operations"),
+        ('operation_bytes_total', 'bytes', "Bytes transferred by sync operations"),
+    ]
+    for name, key, help_text in series:
+        lines.append(f"# HELP {METRICS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_{name} counter")
+        for operation, totals in sorted(counters.items()):
+            lines.append(f'{METRICS_PREFIX}_{name}{{op="{operation}"}} {totals.get(key, 0)}')
+
+    lines.append(f"# HELP {METRICS_PREFIX}_operation_latency_ms Recent successful operation latency")
+    lines.append(f"# TYPE {METRICS_PREFIX}_operation_latency_ms gauge")
+    for operation, totals in sorted(counters.items()):
+        for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms')):
+            if totals.get(key) is not None:
+                lines.append(f'{METRICS_PREFIX}_operation_latency_ms{{op="{operation}",quantile="{quantile}"}} '
+                             f'{totals[key]}')
+
+    return "\n".join(lines) + "\n"
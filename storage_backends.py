@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Remote storage backends for the sync service: Dropbox, a local directory (NAS) or memory
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timezone
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import logging
+
+from bandwidth_limiter import DOWN, UP
+from save_history import DROPBOX_HASH_BLOCK
+
+try:
+    import dropbox
+except ImportError:
+    dropbox = None
+
+logger = logging.getLogger(__name__)
+
+# Files larger than one chunk are streamed through an upload session
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# How often watch() re-checks a backend that cannot push changes
+WATCH_INTERVAL = 2.0  # seconds
+
+# Revisions kept per file by the in-memory backend
+MEMORY_KEEP_REVISIONS = 10
+
+
+class StorageError(Exception):
+    """A storage operation failed"""
+
+
+class NotFound(StorageError):
+    """The remote file (or revision) does not exist"""
+
+
+class Unsupported(StorageError):
+    """The backend cannot do this, e.g. keep revisions"""
+
+
+class RemoteFile(NamedTuple):
+    path: str
+    size: int
+    modified: float  # epoch seconds
+    rev: str
+    # Dropbox content hash (see save_history.content_hash); None when the
+    # backend would have to read the whole file to know it
+    content_hash: Optional[str] = None
+
+
+class StorageBackend:
+    """Where the sync service keeps remote saves
+
+    Paths look like Dropbox paths ('/SyncedFiles/save.dat'). Deadlines are
+    seconds for the whole operation; backends without retries ignore them.
+    Network errors propagate as raised by the underlying client. With
+    limiter (a bandwidth_limiter.BandwidthLimiter) set, transfers are
+    capped and yield to foreground transfers chunk by chunk.
+    """
+
+    name = 'storage'
+    label = 'Remote'
+    limiter = None
+
+    @property
+    def available(self) -> bool:
+        """Whether the backend can be used right now (connected, mounted)"""
+        return True
+
+    def reconnect(self) -> bool:
+        """Try to become available again; returns available"""
+        return self.available
+
+    def stat(self, path: str, deadline: Optional[float] = None) -> RemoteFile:
+        """Metadata of path; raises NotFound if it does not exist"""
+        raise NotImplementedError
+
+    def get(self, path: str, local_path: Path, rev: Optional[str] = None,
+            deadline: Optional[float] = None) -> RemoteFile:
+        """Download path (or one revision of it) to local_path"""
+        raise NotImplementedError
+
+    def put(self, source, path: str, deadline: Optional[float] = None) -> RemoteFile:
+        """Upload source to path, replacing what is there
+
+        source is a local file path or a binary stream; streams are read
+        sequentially and only once, so they can be produced on the fly
+        (e.g. encrypted while uploading).
+        """
+        raise NotImplementedError
+
+    def list(self, folder: str, deadline: Optional[float] = None) -> List[RemoteFile]:
+        """Files directly inside folder; raises NotFound if it does not exist"""
+        raise NotImplementedError
+
+    def watch(self, path: str, since_rev: Optional[str], timeout: float) -> bool:
+        """Block until path's revision differs from since_rev (None: absent)
+
+        Returns False if timeout passed first. This implementation polls
+        stat(); backends that can be notified of changes override it.
+        """
+        give_up_at = time.monotonic() + timeout
+        while True:
+            if self._current_rev(path) != since_rev:
+                return True
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(WATCH_INTERVAL, remaining))
+
+    def revisions(self, path: str, limit: int = 100) -> List[RemoteFile]:
+        """Earlier versions of path, newest first"""
+        raise Unsupported(f"{self.label} storage keeps no revisions")
+
+    def restore(self, path: str, rev: str, deadline: Optional[float] = None) -> RemoteFile:
+        """Make revision rev the current version of path"""
+        raise Unsupported(f"{self.label} storage keeps no revisions")
+
+    def _current_rev(self, path: str) -> Optional[str]:
+        try:
+            return self.stat(path).rev
+        except NotFound:
+            return None
+
+    def _throttle(self, direction: str, amount: int):
+        if self.limiter is not None:
+            self.limiter.throttle(direction, amount)
+
+    def _chunk_size(self, direction: str, default: int) -> int:
+        return self.limiter.chunk_size(direction, default) if self.limiter is not None else default
+
+    def _copy(self, source, dest, direction: str):
+        """Copy between open files in chunks, throttled"""
+        chunk_size = self._chunk_size(direction, UPLOAD_CHUNK_SIZE)
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                return
+            self._throttle(direction, len(data))
+            dest.write(data)
+
+
+class DropboxBackend(StorageBackend):
+    """Dropbox through the sync service's shared client
+
+    sync is the MAAReduxSync owning the connection: calls go through its
+    dropbox_call (retry policy and deadlines), an expired token is
+    refreshed once with refresh_dropbox_connection, and reconnect() runs
+    init_dropbox. Its client is looked up on every call, so a refreshed
+    client is picked up.
+    """
+
+    name = 'dropbox'
+    label = 'Dropbox'
+
+    def __init__(self, sync, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self.sync = sync
+        self.chunk_size = chunk_size
+
+    @property
+    def available(self) -> bool:
+        # No client without the dropbox module or valid credentials
+        return self.sync.dbx is not None
+
+    def reconnect(self) -> bool:
+        if not self.available and dropbox is not None:
+            self.sync.init_dropbox()
+        return self.available
+
+    def _call(self, method_name, *args, **kwargs):
+        """dropbox_call with one token refresh on AuthError and API errors mapped to StorageError"""
+        try:
+            try:
+                return self.sync.dropbox_call(method_name, *args, **kwargs)
+            except dropbox.exceptions.AuthError:
+                logger.info("Authentication error, attempting to refresh token...")
+                if not self.sync.refresh_dropbox_connection():
+                    raise StorageError("Dropbox token expired and could not be refreshed")
+                return self.sync.dropbox_call(method_name, *args, **kwargs)
+        except dropbox.exceptions.AuthError as e:
+            raise StorageError(f"Dropbox authorization failed: {e}")
+        except dropbox.exceptions.ApiError as e:
+            if _is_not_found(e.error):
+                raise NotFound(str(e.error))
+            raise StorageError(f"{method_name} failed: {e.error}")
+
+    def stat(self, path, deadline=None):
+        return _remote_file(self._call('files_get_metadata', path, deadline=deadline))
+
+    def get(self, path, local_path, rev=None, deadline=None):
+        extra = {'rev': rev} if rev else {}
+        if self.limiter is None or not self.limiter.limited(DOWN):
+            return _remote_file(self._call('files_download_to_file', str(local_path), path,
+                                           deadline=deadline, **extra))
+
+        # Capped: read the body ourselves, a chunk at a time
+        metadata, response = self._call('files_download', path, deadline=deadline, **extra)
+        try:
+            with open(local_path, 'wb') as f:
+                for data in response.iter_content(self._chunk_size(DOWN, self.chunk_size)):
+                    self._throttle(DOWN, len(data))
+                    f.write(data)
+        finally:
+            response.close()
+        return _remote_file(metadata)
+
+    def put(self, source, path, deadline=None):
+        """Upload, streaming anything over one chunk
+
+        Small saves go up in a single request. Larger ones use an upload
+        session, so memory stays bounded and files over the 150 MB
+        single-request limit still work. Under an upload cap the chunks
+        shrink to about a second of data each, so the link never sees a
+        long burst at full speed.
+        """
+        mode = dropbox.files.WriteMode('overwrite')
+        chunk_size = self._chunk_size(UP, self.chunk_size)
+        give_up_at = _give_up_at(deadline)
+
+        with _open_source(source) as f:
+            chunk = f.read(chunk_size)
+            next_chunk = f.read(chunk_size)
+            self._throttle(UP, len(chunk))
+            if not next_chunk:
+                return _remote_file(self._call('files_upload', chunk, path, mode=mode,
+                                               deadline=_remaining(give_up_at)))
+
+            session = self._call('files_upload_session_start', chunk, deadline=_remaining(give_up_at))
+            cursor = dropbox.files.UploadSessionCursor(session_id=session.session_id, offset=len(chunk))
+            chunk = next_chunk
+
+            while True:
+                next_chunk = f.read(chunk_size)
+                self._throttle(UP, len(chunk))
+                if not next_chunk:
+                    break
+                self._call('files_upload_session_append_v2', chunk, cursor, deadline=_remaining(give_up_at))
+                cursor.offset += len(chunk)
+                chunk = next_chunk
+
+            commit = dropbox.files.CommitInfo(path=path, mode=mode)
+            return _remote_file(self._call('files_upload_session_finish', chunk, cursor, commit,
+                                           deadline=_remaining(give_up_at)))
+
+    def list(self, folder, deadline=None):
+        give_up_at = _give_up_at(deadline)
+        result = self._call('files_list_folder', folder, deadline=_remaining(give_up_at))
+        entries = list(result.entries)
+        while result.has_more:
+            result = self._call('files_list_folder_continue', result.cursor, deadline=_remaining(give_up_at))
+            entries.extend(result.entries)
+        return [_remote_file(entry) for entry in entries if isinstance(entry, dropbox.files.FileMetadata)]
+
+    def watch(self, path, since_rev, timeout):
+        """Long-poll the file's folder: no requests while nothing changes"""
+        folder = path.rsplit('/', 1)[0]
+        give_up_at = time.monotonic() + timeout
+        while True:
+            # Cursor before the check, so a change in between is not missed
+            cursor = self._call('files_list_folder_get_latest_cursor', folder).cursor
+            if self._current_rev(path) != since_rev:
+                return True
+            remaining = give_up_at - time.monotonic()
+            if remaining < 1:
+                return False
+            # Dropbox accepts 30..480 s and may add up to 90 s of jitter
+            result = self.sync.dbx.files_list_folder_longpoll(cursor, max(30, min(480, int(remaining))))
+            if not result.changes and time.monotonic() >= give_up_at:
+                return False
+            if result.backoff:
+                time.sleep(result.backoff)
+
+    def revisions(self, path, limit=100):
+        result = self._call('files_list_revisions', path, limit=limit)
+        return [_remote_file(entry) for entry in result.entries]
+
+    def restore(self, path, rev, deadline=None):
+        # Server-side: nothing is uploaded
+        return _remote_file(self._call('files_restore', path, rev, deadline=deadline))
+
+
+def _give_up_at(deadline: Optional[float]) -> Optional[float]:
+    """Monotonic time an operation with deadline (seconds, or None) must finish by"""
+    return None if deadline is None else time.monotonic() + deadline
+
+
+def _remaining(give_up_at: Optional[float]) -> Optional[float]:
+    """Seconds left for the next request of an operation; StorageError once none are"""
+    if give_up_at is None:
+        return None
+    remaining = give_up_at - time.monotonic()
+    if remaining <= 0:
+        raise StorageError("Operation deadline exceeded")
+    return remaining
+
+
+@contextmanager
+def _open_source(source):
+    """A binary stream for put()'s source, opened (and closed) here if it is a path"""
+    if hasattr(source, 'read'):
+        yield source
+    else:
+        with open(source, 'rb') as f:
+            yield f
+
+
+def _is_not_found(error) -> bool:
+    """Whether a Dropbox API error union says the path (or revision) does not exist"""
+    for kind in ('path', 'path_lookup'):
+        if getattr(error, f'is_{kind}', lambda: False)():
+            lookup = getattr(error, f'get_{kind}')()
+            return getattr(lookup, 'is_not_found', lambda: False)()
+    return False
+
+
+def _remote_file(metadata) -> RemoteFile:
+    """RemoteFile for a Dropbox FileMetadata"""
+    modified = metadata.server_modified
+    if modified.tzinfo is None:
+        # The SDK returns naive datetimes in UTC
+        modified = modified.replace(tzinfo=timezone.utc)
+    return RemoteFile(metadata.path_display or metadata.path_lower, metadata.size,
+                      modified.timestamp(), metadata.rev, metadata.content_hash)
+
+
+class LocalDirectoryBackend(StorageBackend):
+    """A directory, typically a NAS or shared-drive mount, as remote storage
+
+    '/SyncedFiles/save.dat' is stored as <root>/SyncedFiles/save.dat.
+    Uploads are copied next to the target and renamed into place, so a
+    machine reading the share never sees a partial save. The root must
+    exist; the backend is unavailable while it is not mounted.
+    """
+
+    name = 'local'
+    label = 'Local directory'
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @property
+    def available(self) -> bool:
+        return self.root.is_dir()
+
+    def _local(self, path: str) -> Path:
+        parts = [part for part in path.split('/') if part]
+        if any(part in ('.', '..') for part in parts):
+            raise StorageError(f"Invalid storage path {path!r}")
+        return self.root.joinpath(*parts)
+
+    def _remote_file(self, path: str, stat) -> RemoteFile:
+        return RemoteFile(path, stat.st_size, stat.st_mtime, f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+    def stat(self, path, deadline=None):
+        try:
+            stat = self._local(path).stat()
+        except FileNotFoundError:
+            raise NotFound(path)
+        return self._remote_file(path, stat)
+
+    def get(self, path, local_path, rev=None, deadline=None):
+        source = self._local(path)
+        remote = self.stat(path)
+        if rev and rev != remote.rev:
+            raise Unsupported(f"{self.label} storage keeps no revisions")
+        try:
+            with open(source, 'rb') as src, open(local_path, 'wb') as dest:
+                self._copy(src, dest, DOWN)
+        except FileNotFoundError:
+            raise NotFound(path)
+        return remote
+
+    def put(self, source, path, deadline=None):
+        if not self.available:
+            raise StorageError(f"Storage directory {self.root} is not available")
+        target = self._local(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with _open_source(source) as src, open(tmp_path, 'wb') as dest:
+                self._copy(src, dest, UP)
+            os.replace(tmp_path, target)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return self.stat(path)
+
+    def list(self, folder, deadline=None):
+        directory = self._local(folder)
+        if not directory.is_dir():
+            raise NotFound(folder)
+        prefix = folder.rstrip('/')
+        return [self._remote_file(f"{prefix}/{entry.name}", entry.stat())
+                for entry in directory.iterdir()
+                if entry.is_file() and not entry.name.startswith('.')]
+
+
+class MemoryBackend(StorageBackend):
+    """Remote storage in memory, with revisions: sync logic without a network
+
+    For benchmarks and tests; everything is lost when the process exits.
+    """
+
+    name = 'memory'
+    label = 'Memory'
+
+    def __init__(self, keep_revisions: int = MEMORY_KEEP_REVISIONS):
+        self.keep_revisions = keep_revisions
+        # lower-cased path -> [(RemoteFile, data)], newest first
+        self._files: Dict[str, List] = {}
+        self._changed = threading.Condition()
+
+    def _commit(self, path: str, data: bytes) -> RemoteFile:
+        remote = RemoteFile(path, len(data), time.time(), uuid.uuid4().hex[:16], _memory_hash(data))
+        with self._changed:
+            versions = self._files.setdefault(path.lower(), [])
+            versions.insert(0, (remote, data))
+            del versions[self.keep_revisions:]
+            self._changed.notify_all()
+        return remote
+
+    def _version(self, path: str, rev: Optional[str] = None):
+        with self._changed:
+            for remote, data in self._files.get(path.lower(), []):
+                if rev is None or remote.rev == rev:
+                    return remote, data
+        raise NotFound(path if rev is None else f"{path} revision {rev}")
+
+    def stat(self, path, deadline=None):
+        return self._version(path)[0]
+
+    def get(self, path, local_path, rev=None, deadline=None):
+        remote, data = self._version(path, rev)
+        self._throttle(DOWN, len(data))
+        with open(local_path, 'wb') as f:
+            f.write(data)
+        return remote
+
+    def put(self, source, path, deadline=None):
+        with _open_source(source) as f:
+            data = f.read()
+        self._throttle(UP, len(data))
+        return self._commit(path, data)
+
+    def list(self, folder, deadline=None):
+        prefix = folder.rstrip('/').lower() + '/'
+        with self._changed:
+            files = [versions[0][0] for key, versions in self._files.items()
+                     if key.startswith(prefix) and '/' not in key[len(prefix):]]
+        if not files:
+            raise NotFound(folder)
+        return files
+
+    def watch(self, path, since_rev, timeout):
+        with self._changed:
+            return self._changed.wait_for(lambda: self._current_rev(path) != since_rev, timeout)
+
+    def revisions(self, path, limit=100):
+        with self._changed:
+            versions = self._files.get(path.lower())
+            if not versions:
+                raise NotFound(path)
+            return [remote for remote, _ in versions[:limit]]
+
+    def restore(self, path, rev, deadline=None):
+        _, data = self._version(path, rev)
+        return self._commit(path, data)
+
+
+def _memory_hash(data: bytes) -> str:
+    """save_history.content_hash of in-memory data"""
+    overall = hashlib.sha256()
+    for offset in range(0, len(data), DROPBOX_HASH_BLOCK):
+        overall.update(hashlib.sha256(data[offset:offset + DROPBOX_HASH_BLOCK]).digest())
+    return overall.hexdigest()
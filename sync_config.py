@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Shared config.json access for the sync service and the OAuth token manager
+"""
+
+import base64
+import binascii
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigError(ValueError):
+    """config.json is missing, unreadable or has invalid values"""
+
+
+class ConfigField(NamedTuple):
+    types: Tuple[type, ...]
+    default: Any
+    # Extra check on the value; returns an error message or None
+    check: Optional[Callable[[Any], Optional[str]]] = None
+
+
+def _non_empty(value) -> Optional[str]:
+    return None if value.strip() else "must not be empty"
+
+
+def _at_least(minimum) -> Callable[[Any], Optional[str]]:
+    return lambda value: None if value >= minimum else f"must be at least {minimum}"
+
+
+def _positive(value) -> Optional[str]:
+    return None if value > 0 else "must be greater than 0"
+
+
+def _port(value) -> Optional[str]:
+    return None if 0 <= value <= 65535 else "must be between 0 and 65535"
+
+
+def _service_port(value) -> Optional[str]:
+    return None if 1 <= value <= 65535 else "must be between 1 and 65535"
+
+
+def _match_mode(value) -> Optional[str]:
+    modes = ('substring', 'exact', 'glob', 'regex')
+    return None if value in modes else f"must be one of {', '.join(modes)}"
+
+
+def _storage(value) -> Optional[str]:
+    kinds = ('dropbox', 'local')
+    return None if value in kinds else f"must be one of {', '.join(kinds)}"
+
+
+def _host_list(value) -> Optional[str]:
+    return None if all(isinstance(host, str) and host.strip() for host in value) else "must be a list of host names"
+
+
+def _encryption_key(value) -> Optional[str]:
+    if not value:
+        return None  # generated by the service on first use
+    try:
+        key = base64.urlsafe_b64decode(value.encode())
+    except (binascii.Error, ValueError):
+        key = b''
+    return None if len(key) == 32 else "must be a base64-encoded 32-byte key"
+
+
+def _dropbox_folder(value) -> Optional[str]:
+    return None if value.startswith('/') else "must start with '/'"
+
+
+def _file_name(value) -> Optional[str]:
+    if not value.strip() or '/' in value or '\\' in value:
+        return "must be a plain file name"
+    return None
+
+
+def _profile_name(value) -> Optional[str]:
+    if not re.fullmatch(r'[\w .-]+', value):
+        return "may only contain letters, digits, spaces, '.', '-' and '_'"
+    return None
+
+
+NUMBER = (int, float)
+
+CONFIG_SCHEMA: Dict[str, ConfigField] = {
+    'app_name': ConfigField((str,), None, _non_empty),
+    # How app_name is matched against process names and executable paths
+    'app_match': ConfigField((str,), 'substring', _match_mode),
+    'save_file_path': ConfigField((str,), None, _non_empty),
+    'dropbox_folder': ConfigField((str,), '/SyncedFiles', _dropbox_folder),
+    'sync_filename': ConfigField((str,), 'save.dat', _file_name),
+
+    # OAuth credentials and tokens (tokens are written by DropboxTokenManager)
+    'dropbox_app_key': ConfigField((str,), ''),
+    'dropbox_app_secret': ConfigField((str,), ''),
+    'dropbox_access_token': ConfigField((str,), ''),
+    'dropbox_refresh_token': ConfigField((str,), ''),
+    'dropbox_token_expires_in': ConfigField((int,), 0, _at_least(0)),
+    'dropbox_token_obtained_at': ConfigField((int,), 0, _at_least(0)),
+    'dropbox_token_url': ConfigField((str,), ''),
+    'dropbox_token': ConfigField((str,), ''),  # legacy long-lived access token
+
+    # Where remote saves live: Dropbox, or a directory such as a NAS mount
+    'storage': ConfigField((str,), 'dropbox', _storage),
+    'storage_path': ConfigField((str,), ''),
+
+    # Retries, deadlines and budgets (seconds)
+    'retry_max_attempts': ConfigField((int,), 5, _at_least(1)),
+    'retry_max_delay': ConfigField(NUMBER, 30, _at_least(0)),
+    'import_deadline': ConfigField(NUMBER, 20, _positive),
+    'upload_deadline': ConfigField(NUMBER, 120, _positive),
+    'launch_budget': ConfigField(NUMBER, 5, _positive),
+    'upload_settle_time': ConfigField(NUMBER, 1, _at_least(0)),
+    'upload_settle_timeout': ConfigField(NUMBER, 60, _at_least(0)),
+
+    # Process polling (seconds)
+    'poll_interval': ConfigField(NUMBER, 2, _positive),
+    'poll_max_interval': ConfigField(NUMBER, 60, _positive),
+
+    'status_port': ConfigField((int,), 0, _port),
+
+    # Several games synced by one service; see PROFILE_KEYS
+    'profiles': ConfigField((list,), []),
+    # LAN fast path: fetch saves from peers with the same lan_secret
+    'lan_sync': ConfigField((bool,), False),
+    'lan_secret': ConfigField((str,), ''),
+    'lan_port': ConfigField((int,), 47810, _service_port),
+    'lan_peers': ConfigField((list,), [], _host_list),  # addresses to ask besides the broadcast
+
+    # Client-side encryption of remote saves; the key is kept with the tokens
+    # and must be the same on every machine syncing these saves
+    'encryption': ConfigField((bool,), False),
+    'encryption_key': ConfigField((str,), '', _encryption_key),
+
+    # Store saves zlib-compressed when a sample shows they shrink enough
+    'compression': ConfigField((bool,), False),
+
+    # Bandwidth caps for transfers in KB/s (0 = unlimited)
+    'upload_rate_limit': ConfigField(NUMBER, 0, _at_least(0)),
+    'download_rate_limit': ConfigField(NUMBER, 0, _at_least(0)),
+
+    # Worker threads shared by all profiles' imports and uploads
+    'transfer_workers': ConfigField((int,), 2, _at_least(1)),
+}
+
+# Keys the sync service cannot run without
+SERVICE_REQUIRED = ('app_name', 'save_file_path')
+
+# Per-game settings. Each entry of "profiles" sets these (plus an optional
+# name); without "profiles" the top-level keys form the only profile.
+PROFILE_KEYS = ('app_name', 'app_match', 'save_file_path', 'dropbox_folder', 'sync_filename')
+PROFILE_NAME_FIELD = ConfigField((str,), None, _profile_name)
+DEFAULT_PROFILE = 'default'
+
+
+def _field_error(field: ConfigField, value) -> Optional[str]:
+    """Type and value check of one setting"""
+    # bool is an int subclass but never a valid number here
+    if (isinstance(value, bool) and bool not in field.types) or not isinstance(value, field.types):
+        expected = " or ".join(t.__name__ for t in field.types)
+        return f"expected {expected}, got {type(value).__name__}"
+    return field.check(value) if field.check else None
+
+
+def _regex_error(app_name, app_match) -> Optional[str]:
+    if app_match != 'regex' or not isinstance(app_name, str):
+        return None
+    try:
+        re.compile(app_name)
+    except re.error as e:
+        return f"invalid regular expression ({e})"
+    return None
+
+
+def _validate_profiles(values: Dict, problems: List[str]) -> List[Dict]:
+    """Normalize "profiles": every entry gets a name and all PROFILE_KEYS
+
+    app_match and sync_filename default to the top-level values, and
+    dropbox_folder to a sub-folder of the top-level one named after the
+    profile, so two games never share a remote file by accident.
+    """
+    profiles = []
+    seen = {'name': set(), 'save_file_path': set(), 'remote': set()}
+    for index, entry in enumerate(values['profiles']):
+        where = f"profiles[{index}]"
+        if not isinstance(entry, dict):
+            problems.append(f"{where}: expected object, got {type(entry).__name__}")
+            continue
+
+        profile = {}
+        for key in SERVICE_REQUIRED:
+            if entry.get(key) in (None, ''):
+                problems.append(f"{where}.{key}: required")
+        name = entry.get('name') or entry.get('app_name')
+        if name is not None:
+            error = _field_error(PROFILE_NAME_FIELD, name)
+            if error:
+                problems.append(f"{where}.name: {error}")
+            profile['name'] = name
+
+        for key in PROFILE_KEYS:
+            value = entry.get(key)
+            if value is None:
+                if key == 'dropbox_folder' and isinstance(name, str) and isinstance(values[key], str):
+                    value = f"{values['dropbox_folder'].rstrip('/')}/{name}"
+                else:
+                    value = values.get(key)
+            elif key not in SERVICE_REQUIRED or value != '':
+                error = _field_error(CONFIG_SCHEMA[key], value)
+                if error:
+                    problems.append(f"{where}.{key}: {error}")
+            profile[key] = value
+
+        error = _regex_error(profile['app_name'], profile['app_match'])
+        if error:
+            problems.append(f"{where}.app_name: {error}")
+
+        if all(isinstance(profile.get(key), str) for key in ('name', 'save_file_path', 'dropbox_folder',
+                                                                 'sync_filename')):
+            for kind, value, message in (
+                    ('name', profile['name'].lower(), "duplicate profile name"),
+                    ('save_file_path', os.path.normcase(os.path.abspath(profile['save_file_path'])),
+                     "save_file_path: used by another profile"),
+                    ('remote', f"{profile['dropbox_folder'].rstrip('/')}/{profile['sync_filename']}".lower(),
+                     "dropbox_folder/sync_filename: used by another profile")):
+                if value in seen[kind]:
+                    problems.append(f"{where}: {message}")
+                seen[kind].add(value)
+        profiles.append(profile)
+    return profiles
+
+
+def validate_config(data: Dict, required: Iterable[str] = ()) -> Dict:
+    """Check data against CONFIG_SCHEMA and return it with defaults filled in
+
+    Raises ConfigError listing every problem. Unknown keys are kept as they
+    are so newer settings survive an older service rewriting the file.
+    """
+    if not isinstance(data, dict):
+        raise ConfigError("config.json must contain a JSON object")
+
+    if isinstance(data.get('profiles'), list) and data['profiles']:
+        # Each profile names its own game and save
+        required = [key for key in required if key not in PROFILE_KEYS]
+    missing = [key for key in required if data.get(key) in (None, '')]
+    problems = [f"{key}: required" for key in missing]
+
+    values = dict(data)
+    for key, field in CONFIG_SCHEMA.items():
+        if key in missing:
+            continue
+        if key not in data or data[key] is None:
+            values[key] = field.default
+            continue
+        error = _field_error(field, data[key])
+        if error:
+            problems.append(f"{key}: {error}")
+
+    error = _regex_error(values.get('app_name'), values.get('app_match'))
+    if error:
+        problems.append(f"app_name: {error}")
+
+    if values.get('storage') == 'local' and not str(values.get('storage_path') or '').strip():
+        problems.append("storage_path: required when storage is 'local'")
+
+    if values.get('lan_sync') is True and len(str(values.get('lan_secret') or '')) < 16:
+        problems.append("lan_secret: at least 16 characters required when lan_sync is on")
+
+    if isinstance(values['profiles'], list):
+        values['profiles'] = _validate_profiles(values, problems)
+
+    if problems:
+        raise ConfigError("Invalid configuration - " + "; ".join(problems))
+    return values
+
+
+class SyncConfig:
+    """config.json loaded once, validated, and re-read only when the file changes
+
+    The sync service and its token manager share one instance, so the file is
+    parsed once per change instead of once per reader. Writes go through
+    update()/remove(), which replace the file atomically.
+
+    generation goes up with every change to the values, whoever loaded or
+    wrote it, so each reader tracks changes by the generation it last saw;
+    reload_if_changed() only tells the caller whether that call reloaded.
+    """
+
+    def __init__(self, path='config.json', required: Iterable[str] = ()):
+        self.path = Path(path)
+        self.required = tuple(required)
+        self._lock = threading.RLock()
+        self._raw: Dict = {}
+        self._values: Dict = validate_config({})
+        self._signature = None
+        self.generation = 0
+        self.load()
+
+    def _stat_signature(self):
+        """(mtime, size) of the file, or None when it does not exist"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """Read and validate the file, raising ConfigError if it is invalid"""
+        with self._lock:
+            signature = self._stat_signature()
+            raw = {}
+            if signature is not None:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        raw = json.load(f)
+                except (OSError, ValueError) as e:
+                    raise ConfigError(f"Cannot read {self.path}: {e}")
+            elif self.required:
+                raise ConfigError(f"{self.path} not found")
+
+            self._values = validate_config(raw, self.required)
+            self._raw = raw
+            self._signature = signature
+            self.generation += 1
+
+    def reload_if_changed(self) -> bool:
+        """Re-read the file if its mtime or size changed; returns True if it was reloaded
+
+        An invalid edit is logged and the last good values stay in effect.
+        """
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return False
+        with self._lock:
+            if signature == self._signature:
+                return False
+            try:
+                self.load()
+            except ConfigError as e:
+                logger.error(f"Ignoring config change: {e}")
+                # Don't retry the same broken file on every check
+                self._signature = signature
+                return False
+        logger.info(f"Configuration reloaded from {self.path}")
+        return True
+
+    def profiles(self) -> List[Dict]:
+        """Settings of each game to sync: the "profiles" list, or one profile from the top-level keys"""
+        values = self._values
+        if values['profiles']:
+            return values['profiles']
+        profile = {key: values[key] for key in PROFILE_KEYS}
+        profile['name'] = DEFAULT_PROFILE
+        return [profile]
+
+    def profile(self, name: str) -> Optional[Dict]:
+        """Settings of the named profile, or None if config.json has no such profile"""
+        for profile in self.profiles():
+            if profile['name'].lower() == name.lower():
+                return profile
+        return None
+
+    def get(self, key: str, default=None):
+        return self._values.get(key, default)
+
+    def __getitem__(self, key: str):
+        return self._values[key]
+
+    def update(self, values: Dict):
+        """Validate values, merge them into the file and replace it atomically"""
+        with self._lock:
+            # Merge into the latest file, not a stale copy of it
+            self.reload_if_changed()
+            raw = dict(self._raw)
+            raw.update(values)
+            self._write(raw)
+
+    def remove(self, keys: Iterable[str]):
+        """Drop keys from the file"""
+        keys = set(keys)
+        with self._lock:
+            self.reload_if_changed()
+            raw = {k: v for k, v in self._raw.items() if k not in keys}
+            self._write(raw)
+
+    def _write(self, raw: Dict):
+        """Replace the file with raw; the caller holds the lock"""
+        values = validate_config(raw, self.required)
+
+        # A concurrent reader never sees a partial file
+        tmp_path = self.path.with_name(f"{self.path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(raw, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+        self._raw = raw
+        self._values = values
+        self.generation += 1
+        # Our own write is not a change to reload
+        self._signature = self._stat_signature()
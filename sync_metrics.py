@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Structured metrics for MAA Redux Save Sync
+
+Sync operations are recorded as JSON lines in a size-rotated metrics file.
+Run this module directly to summarize one or more metrics files:
+
+    python sync_metrics.py metrics.jsonl other_machine/metrics.jsonl
+"""
+
+import json
+import math
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (pct in 0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class MetricsRecorder:
+    """Records timed sync operations to a rolling JSON lines file
+
+    Besides the file, running totals per operation are kept in memory so a
+    long-running daemon can report them without re-reading the file.
+    """
+
+    def __init__(self, path: str = 'metrics.jsonl', max_bytes: int = 5 * 1024 * 1024,
+                 backup_count: int = 3, sample_window: float = 60.0):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sample_window = sample_window
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._totals = defaultdict(lambda: {'count': 0, 'errors': 0, 'skipped': 0,
+                                            'bytes': 0, 'retries': 0})
+        self._recent = defaultdict(lambda: deque(maxlen=500))
+        self._samples = {}
+
+    @contextmanager
+    def track(self, operation: str, **fields):
+        """Time a block and record it when it finishes
+
+        Yields the record dict; the block may add fields such as 'bytes' or
+        'skip_reason', or set 'outcome' itself. Exceptions are recorded as
+        outcome 'error' and re-raised.
+        """
+        record = {'op': operation, 'retries': 0}
+        record.update(fields)
+        stack = self._stack()
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['outcome'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            record['duration_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            if 'outcome' not in record:
+                record['outcome'] = 'skipped' if 'skip_reason' in record else 'ok'
+            self.record(record)
+
+    def note_retry(self, error: Optional[BaseException] = None):
+        """Count a retry against the innermost operation tracked on this thread"""
+        stack = self._stack()
+        if stack:
+            stack[-1]['retries'] += 1
+
+    def skip(self, operation: str, skip_reason: str, **fields):
+        """Record an operation that was skipped without running"""
+        record = {'op': operation, 'outcome': 'skipped', 'skip_reason': skip_reason,
+                  'duration_ms': 0.0, 'retries': 0}
+        record.update(fields)
+        self.record(record)
+
+    def observe(self, operation: str, duration: float):
+        """Aggregate a high-frequency measurement (seconds)
+
+        Operations like process scans run every few seconds, so instead of one
+        line per call a summary line is written once per sample window.
+        """
+        now = time.time()
+        with self._lock:
+            window = self._samples.get(operation)
+            if window is None:
+                window = self._samples[operation] = {'start': now, 'values': []}
+            window['values'].append(duration * 1000)
+            if now - window['start'] < self.sample_window:
+                return
+            values = window['values']
+            del self._samples[operation]
+
+        self.record({
+            'op': operation,
+            'outcome': 'sampled',
+            'samples': len(values),
+            'duration_ms': round(sum(values) / len(values), 3),
+            'p95_ms': round(percentile(values, 95), 3),
+            'max_ms': round(max(values), 3)
+        })
+
+    def record(self, record: Dict):
+        """Write a record and update the in-memory totals"""
+        record.setdefault('ts', round(time.time(), 3))
+
+        with self._lock:
+            if record['outcome'] != 'sampled':
+                totals = self._totals[record['op']]
+                totals['count'] += 1
+                totals['bytes'] += record.get('bytes', 0) or 0
+                totals['retries'] += record.get('retries', 0)
+                if record['outcome'] == 'skipped':
+                    totals['skipped'] += 1
+                elif record['outcome'] != 'ok':
+                    totals['errors'] += 1
+                if record['outcome'] == 'ok':
+                    self._recent[record['op']].append(record['duration_ms'])
+
+            try:
+                self._rotate_if_needed()
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            except OSError as e:
+                logger.warning(f"Failed to write metrics: {e}")
+
+    def totals(self) -> Dict[str, Dict]:
+        """Running totals per operation, with p50/p95 over recent successful runs"""
+        with self._lock:
+            result = {}
+            for operation, totals in self._totals.items():
+                recent = list(self._recent[operation])
+                result[operation] = dict(totals, p50_ms=percentile(recent, 50),
+                                         p95_ms=percentile(recent, 95))
+            return result
+
+    def _stack(self) -> List[Dict]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _rotate_if_needed(self):
+        try:
+            if self.path.stat().st_size < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+
+        for index in range(self.backup_count - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                older.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+
+
+def metrics_files(path: str) -> List[Path]:
+    """A metrics file followed by its rotated backups"""
+    base = Path(path)
+    return [base] + sorted(base.parent.glob(f"{base.name}.[0-9]*"))
+
+
+def load_records(paths: Iterable[Path]) -> List[Dict]:
+    """Read metrics records from the given files, skipping unreadable lines"""
+    records = []
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def summarize(records: Iterable[Dict]) -> Dict[str, Dict]:
+    """Latency percentiles and counts per operation"""
+    grouped = defaultdict(list)
+    for record in records:
+        grouped[record.get('op', '?')].append(record)
+
+    summary = {}
+    for operation, items in sorted(grouped.items()):
+        durations = [r['duration_ms'] for r in items if r.get('outcome') in ('ok', 'sampled')]
+        skips = defaultdict(int)
+        for r in items:
+            if r.get('skip_reason'):
+                skips[r['skip_reason']] += 1
+        summary[operation] = {
+            'count': len(items),
+            'errors': sum(1 for r in items if r.get('outcome') in ('error', 'failed')),
+            'retries': sum(r.get('retries', 0) for r in items),
+            'bytes': sum(r.get('bytes', 0) or 0 for r in items),
+            'p50_ms': percentile(durations, 50),
+            'p95_ms': percentile(durations, 95),
+            'skips': dict(skips)
+        }
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict]) -> str:
+    """Render a summary as a text table"""
+    def ms(value):
+        return f"{value:.1f}" if value is not None else "-"
+
+    lines = [f"{'operation':<16}{'count':>8}{'errors':>8}{'retries':>9}{'p50 ms':>11}{'p95 ms':>11}{'MB':>10}"]
+    for operation, row in summary.items():
+        lines.append(f"{operation:<16}{row['count']:>8}{row['errors']:>8}{row['retries']:>9}"
+                     f"{ms(row['p50_ms']):>11}{ms(row['p95_ms']):>11}{row['bytes'] / 1e6:>10.2f}")
+        if row['skips']:
+            reasons = ", ".join(f"{reason}={count}" for reason, count in sorted(row['skips'].items()))
+            lines.append(f"{'':<16}skipped: {reasons}")
+    return "\n".join(lines)
+
+
+def main():
+    paths = []
+    for arg in sys.argv[1:] or ['metrics.jsonl']:
+        paths.extend(metrics_files(arg))
+    print(format_summary(summarize(load_records(paths))))
+
+
+if __name__ == "__main__":
+    main()
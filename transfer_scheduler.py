@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Fair, prioritized scheduling of Dropbox transfers across sync profiles
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Job priorities, most urgent first
+URGENT = 0      # imports: a game is waiting for its save
+NORMAL = 1
+BACKGROUND = 2  # uploads after the game closed
+PRIORITIES = (URGENT, NORMAL, BACKGROUND)
+
+
+class PathLocks:
+    """One lock per remote path, compared case-insensitively as Dropbox does
+
+    Held for a whole transfer, so an upload, a queued replay and a restore
+    of the same file never interleave, while other profiles' files transfer
+    alongside. Limits shared by all transfers are left to the scheduler and
+    the bandwidth limiter.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def __call__(self, remote_path: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(remote_path.lower(), threading.Lock())
+
+
+class TransferScheduler:
+    """Runs transfer jobs on a few worker threads, by priority and round-robin across profiles
+
+    Each profile has its own FIFO queue. A worker takes the most urgent job
+    waiting at the head of a profile's queue; among equally urgent ones,
+    the profile that has waited longest goes first, so a profile with a
+    backlog (or one slow upload after another) cannot starve the others.
+    A profile's jobs run one at a time and in order, so an upload never
+    overtakes the import submitted before it.
+
+    One extra worker runs only URGENT jobs, so an import never waits for a
+    thread behind long uploads.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = max(1, workers)
+        self._queues: Dict[str, Deque] = {}
+        # Per priority: profiles whose next job has that priority and none running, in turn order
+        self._ready: Dict[int, Deque[str]] = {priority: deque() for priority in PRIORITIES}
+        self._busy: Set[str] = set()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def start(self):
+        """Start the worker threads (a no-op if they are running)"""
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            self._threads = [threading.Thread(target=self._run, args=(BACKGROUND,),
+                                              name=f"Transfer-{index + 1}", daemon=True)
+                             for index in range(self.workers)]
+            self._threads.append(threading.Thread(target=self._run, args=(URGENT,),
+                                                  name="Transfer-urgent", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the workers once their current jobs finish; queued jobs are dropped"""
+        with self._cond:
+            self._stopping = True
+            threads, self._threads = self._threads, []
+            self._cond.notify_all()
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, profile: str, func: Callable, *args, description: str = "Transfer",
+               priority: int = NORMAL) -> Future:
+        """Queue func(*args) for profile; the returned Future holds its result"""
+        future = Future()
+        with self._cond:
+            jobs = self._queues.setdefault(profile, deque())
+            jobs.append((future, func, args, description, priority))
+            if len(jobs) == 1 and profile not in self._busy:
+                self._ready[priority].append(profile)
+                # notify_all: the urgent worker cannot take every job
+                self._cond.notify_all()
+        return future
+
+    def pending(self, profile: Optional[str] = None) -> int:
+        """Queued and running jobs, for one profile or all of them"""
+        with self._cond:
+            if profile is not None:
+                return len(self._queues.get(profile, ())) + (profile in self._busy)
+            return sum(len(jobs) for jobs in self._queues.values()) + len(self._busy)
+
+    def _take(self, least_urgent: int) -> Optional[str]:
+        for priority in PRIORITIES:
+            if priority > least_urgent:
+                break
+            if self._ready[priority]:
+                return self._ready[priority].popleft()
+        return None
+
+    def _next_job(self, least_urgent: int):
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                profile = self._take(least_urgent)
+                if profile is not None:
+                    break
+                self._cond.wait()
+            self._busy.add(profile)
+            return profile, self._queues[profile].popleft()
+
+    def _finish(self, profile: str):
+        with self._cond:
+            self._busy.discard(profile)
+            jobs = self._queues[profile]
+            if jobs:
+                # Back of the line: every other waiting profile at that priority goes first
+                self._ready[jobs[0][4]].append(profile)
+                self._cond.notify_all()
+            else:
+                del self._queues[profile]
+
+    def _run(self, least_urgent: int):
+        while True:
+            job = self._next_job(least_urgent)
+            if job is None:
+                return
+            profile, (future, func, args, description, _) = job
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args))
+                    except Exception as e:
+                        logger.exception(f"{description} for profile {profile} failed: {e}")
+                        future.set_exception(e)
+            finally:
+                self._finish(profile)
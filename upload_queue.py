@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Durable offline upload queue for MAA Redux Save Sync
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import logging
+
+from instance_lock import file_lock
+from retry_policy import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+def dropbox_reachable(timeout: float = 5.0) -> bool:
+    """Cheap connectivity probe: can we open a TCP connection to the Dropbox API?"""
+    try:
+        with socket.create_connection(("api.dropboxapi.com", 443), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+class UploadJournal:
+    """On-disk journal of pending uploads, keeping only the latest version per remote file
+
+    Each pending upload is a snapshot of the save taken when the upload failed,
+    so later writes to the save file (or a new game session) cannot change what
+    gets replayed. The journal itself is rewritten atomically on every change.
+
+    --upload and --launch runs queue into the same journal as the sync
+    service, so nothing is kept in memory: every change re-reads the file
+    under a lock file shared by all processes, and every query reads it.
+    """
+
+    def __init__(self, journal_path: Path, spool_dir: Path):
+        self.journal_path = Path(journal_path)
+        self.spool_dir = Path(spool_dir)
+        self.lock_path = self.journal_path.with_suffix('.lock')
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _changing(self):
+        """Current entries, for the block to modify; written back when it exits normally"""
+        with self._lock, file_lock(self.lock_path):
+            entries = self._load()
+            yield entries
+            self._write(entries)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Load pending entries, dropping any whose snapshot has disappeared"""
+        if not self.journal_path.exists():
+            return {}
+
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load upload journal: {e}")
+            return {}
+
+        return {remote: entry for remote, entry in entries.items()
+                if Path(entry.get('snapshot', '')).exists()}
+
+    def _write(self, entries: Dict[str, Dict]):
+        """Persist the journal atomically"""
+        tmp_path = self.journal_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def enqueue(self, local_path: Path, remote_path: str) -> Dict:
+        """Snapshot local_path and record it as the pending upload for remote_path"""
+        self.spool_dir.mkdir(exist_ok=True)
+        digest = hashlib.sha1(remote_path.encode('utf-8')).hexdigest()[:12]
+        snapshot = self.spool_dir / f"{digest}_{time.time_ns()}{Path(local_path).suffix}"
+        shutil.copy2(local_path, snapshot)
+
+        entry = {
+            'snapshot': str(snapshot),
+            'queued_at': time.time(),
+            'size': snapshot.stat().st_size
+        }
+
+        with self._changing() as entries:
+            previous = entries.get(remote_path)
+            entries[remote_path] = entry
+
+        # Only the latest version matters - older snapshots are superseded
+        if previous:
+            self._delete_snapshot(previous['snapshot'])
+
+        logger.info(f"Queued upload for {remote_path} ({entry['size']} bytes)")
+        return entry
+
+    def get(self, remote_path: str) -> Optional[Dict]:
+        """Return the pending entry for remote_path, if any"""
+        return self._load().get(remote_path)
+
+    def has_pending(self, remote_path: str) -> bool:
+        """Check whether remote_path has an upload waiting"""
+        return remote_path in self._load()
+
+    def remote_paths(self) -> List[str]:
+        """Remote paths with pending uploads, oldest first"""
+        entries = self._load()
+        return sorted(entries, key=lambda remote: entries[remote]['queued_at'])
+
+    def remove(self, remote_path: str, snapshot: Optional[str] = None):
+        """Drop the entry for remote_path
+
+        If snapshot is given the entry is only dropped while it still refers to
+        that snapshot, so a newer version queued meanwhile is kept.
+        """
+        with self._changing() as entries:
+            entry = entries.get(remote_path)
+            if not entry or (snapshot and entry['snapshot'] != snapshot):
+                return
+            del entries[remote_path]
+
+        self._delete_snapshot(entry['snapshot'])
+
+    def _delete_snapshot(self, snapshot: str):
+        try:
+            Path(snapshot).unlink()
+        except OSError as e:
+            logger.warning(f"Could not remove upload snapshot {snapshot}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+
+class UploadQueueWorker(threading.Thread):
+    """Background thread that replays the upload journal once Dropbox is reachable"""
+
+    def __init__(self, journal: UploadJournal, upload_func: Callable[[Path, str], bool],
+                 transfer_locks: Callable[[str], threading.Lock], retry_policy: RetryPolicy,
+                 interval: float = 60.0,
+                 connectivity_check: Callable[[], bool] = dropbox_reachable):
+        super().__init__(name="UploadQueueWorker", daemon=True)
+        self.journal = journal
+        self.upload_func = upload_func
+        self.transfer_locks = transfer_locks
+        self.retry_policy = retry_policy
+        self.interval = interval
+        self.connectivity_check = connectivity_check
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._failures = 0
+
+    def wake(self):
+        """Ask the worker to try replaying immediately"""
+        self._wake.set()
+
+    def stop(self):
+        """Stop the worker thread"""
+        self._stop_event.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            delay = self.interval
+            if len(self.journal):
+                if self.replay():
+                    self._failures = 0
+                else:
+                    self._failures += 1
+                    delay = self._backoff_delay()
+
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _backoff_delay(self) -> float:
+        return min(self.interval, self.retry_policy.compute_delay(self._failures))
+
+    def replay(self) -> bool:
+        """Upload every pending entry; returns True once the journal is empty"""
+        if not self.connectivity_check():
+            logger.debug("Dropbox unreachable, keeping uploads queued")
+            return False
+
+        for remote_path in self.journal.remote_paths():
+            # Hold the file's transfer lock so a live upload of a newer version
+            # cannot interleave with the replay of an older one
+            with self.transfer_locks(remote_path):
+                entry = self.journal.get(remote_path)
+                if not entry:
+                    continue
+
+                logger.info(f"Replaying queued upload for {remote_path}")
+                if not self.upload_func(Path(entry['snapshot']), remote_path):
+                    return False
+                self.journal.remove(remote_path, entry['snapshot'])
+                logger.info(f"Queued upload for {remote_path} completed")
+
+        return True